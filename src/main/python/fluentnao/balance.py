@@ -0,0 +1,91 @@
+'''
+Created on 18 Oct 2026
+
+Whole body balance which is set up once for a run of leg moves rather than once per move.
+'''
+
+# joints with at least this stiffness don't need to be stiffened again
+STIFF_THRESHOLD = 0.9
+
+# chains which make up the whole body
+BODY_CHAINS = ["Head", "LArm", "RArm", "LLeg", "RLeg"]
+
+
+def chains_needing_stiffness(nao, chains=BODY_CHAINS, threshold=STIFF_THRESHOLD):
+    '''
+    Return the chains which have a joint with less than threshold stiffness, using a
+    single query of the stiffness of the whole body
+    '''
+    stiffnesses = dict(zip(nao.get_body_joint_names(), nao.env.motion.getStiffnesses("Body")))
+    return [c for c in chains
+            if any(stiffnesses.get(j, 0.0) < threshold for j in getattr(nao.joints, c))]
+
+
+class BalanceSession(object):
+    '''
+    Keeps whole body motion enabled from start() until the matching end() and only
+    changes the foot constraints when they differ from the ones already set. Sessions
+    can be nested, only the outermost start() and end() do any work.
+    '''
+
+    def __init__(self, nao):
+        super(BalanceSession, self).__init__()
+        self.nao = nao
+        self.depth = 0
+        self.foot_states = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end()
+
+    def is_active(self):
+        return self.depth > 0
+
+    def start(self):
+        self.depth = self.depth + 1
+        if self.depth == 1:
+            self.foot_states = {}
+            self.nao.stiffen()
+            self.nao.whole_body_enable()
+        return self
+
+    def end(self):
+        if self.depth == 0:
+            return self
+        self.depth = self.depth - 1
+        if self.depth == 0:
+            # wait for the moves made with the feet constrained before freeing them
+            self.nao.go()
+            self.nao.foot_state(self.nao.joints.SupportLeg.Legs, self.nao.joints.StateName.Free)
+            self.foot_states = {}
+            self.nao.whole_body_disable()
+        return self
+
+    def close(self):
+        '''
+        End the session however many times it has been started
+        '''
+        if self.depth > 0:
+            self.depth = 1
+            self.end()
+        return self
+
+    def set_foot_states(self, left_state, right_state):
+        '''
+        Constrain each foot, moves already made with different constraints are completed first
+        '''
+        wanted = { 'RLeg' : right_state, 'LLeg' : left_state }
+        changed = [leg for leg in ['RLeg', 'LLeg'] if self.foot_states.get(leg) != wanted[leg]]
+        if not changed:
+            return self
+        if self.foot_states:
+            self.nao.go()
+        if len(changed) == 2 and left_state == right_state:
+            self.nao.foot_state(self.nao.joints.SupportLeg.Legs, left_state)
+        else:
+            for leg in changed:
+                self.nao.foot_state(leg, wanted[leg])
+        self.foot_states.update(wanted)
+        return self
@@ -16,6 +16,11 @@ class Arms():
     def go(self):
         self.nao.go()
 
+    def join(self):
+        # wait only for the moves of this part
+        self.nao.join(self.chains.LArm, self.chains.RArm)
+        return self;
+
 
     ###################################
     # Stiff
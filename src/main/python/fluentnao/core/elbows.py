@@ -14,6 +14,11 @@ class Elbows():
 
     def go(self):
         self.nao.go()
+
+    def join(self):
+        # wait only for the moves of this part
+        self.nao.join(self.chains.LArm, self.chains.RArm)
+        return self;
         
     ###################################
     # Bent
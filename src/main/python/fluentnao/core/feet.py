@@ -12,37 +12,34 @@ class Feet():
     def go(self):
         self.nao.go()
 
+    def join(self):
+        # wait only for the moves of this part
+        self.nao.join(self.chains.LLeg, self.chains.RLeg)
+        return self;
+
     ###################################
     # plane
     ###################################
     def left_plane_on(self):
 
-        # stiffen body & enable wb
-        self.nao.stiff()
-        self.nao.whole_body_enable()
+        # stiffen body & enable wb, does nothing if already in a balance session
+        self.nao.balance_session.start()
 
         # constrain feet
-        self.nao.foot_state(self.joints.SupportLeg.RLeg, self.joints.StateName.Fixed)
-        self.nao.foot_state(self.joints.SupportLeg.LLeg, self.joints.StateName.Plane)
+        self.nao.balance_session.set_foot_states(self.joints.StateName.Plane, self.joints.StateName.Fixed)
 
     def right_plane_on(self):
 
-        # stiffen body & enable wb
-        self.nao.stiff()
-        self.nao.whole_body_enable()
+        # stiffen body & enable wb, does nothing if already in a balance session
+        self.nao.balance_session.start()
 
         # constrain feet
-        self.nao.foot_state(self.joints.SupportLeg.RLeg, self.joints.StateName.Plane)
-        self.nao.foot_state(self.joints.SupportLeg.LLeg, self.joints.StateName.Fixed)
+        self.nao.balance_session.set_foot_states(self.joints.StateName.Fixed, self.joints.StateName.Plane)
 
     def plane_off(self):
 
-        # block call
-        self.go()
-
-        # free feet & disable wb
-        self.nao.foot_state(self.joints.SupportLeg.Legs, self.joints.StateName.Free)
-        self.nao.whole_body_disable()
+        # when this ends the session: block call, free feet & disable wb
+        self.nao.balance_session.end()
 
     ###################################
     # point
@@ -12,6 +12,11 @@ class Head():
     def go(self):
         self.nao.go()
 
+    def join(self):
+        # wait only for the moves of this part
+        self.nao.join(self.chains.Head)
+        return self;
+
 
     ###################################
     # Stiff
@@ -1,15 +1,64 @@
+# LED groups made up of several of the robot's own groups, these are created on the robot
+# the first time they are used so that they can be faded with a single call
+LED_GROUPS = { 'FluentNaoHead' : ["BrainLedsBack", "BrainLedsMiddle", "BrainLedsFront"] }
+
 class Leds():
 
-    def __init__(self, nao):
-        
+    def __init__(self, nao, posted=False, parent=None):
+
         # jobs for threading
         self.nao = nao
         self.joints = nao.joints
         self.chains = nao.chains
         self.log = nao.log
 
+        # when posted, LED changes don't wait for the fade to finish
+        self.posted = posted
+        if parent:
+            self.groups = parent.groups
+            self.tasks = parent.tasks
+        else:
+            self.groups = set()
+            self.tasks = []
+            # nao.leds.post.eyes() changes the eyes without blocking
+            self.post = Leds(nao, True, self)
+
         # http://html-color-codes.com/
 
+    def go(self):
+        self.nao.go()
+
+    ###################################
+    # groups & fading
+    ###################################
+    def group(self, name):
+        # create the group on the robot the first time it is used
+        if name in LED_GROUPS and name not in self.groups:
+            proxy = self.nao.env.leds
+            members = []
+            for g in LED_GROUPS[name]:
+                members.extend(proxy.listGroup(g))
+            proxy.createGroup(name, members)
+            self.groups.add(name)
+        return name
+
+    def fade(self, name, hex, duration):
+        # record the fade if a timeline is being recorded, otherwise send it now
+        if self.nao.timeline is not None:
+            self.nao.timeline.add_led(name, hex, duration)
+        elif self.posted:
+            self.tasks.append(self.nao.env.leds.post.fadeRGB(name, hex, duration))
+        else:
+            self.nao.env.leds.fadeRGB(name, hex, duration)
+        return self;
+
+    def wait(self):
+        # wait for any posted LED changes to finish
+        for taskId in self.tasks:
+            self.nao.env.leds.wait(taskId, 0)
+        self.tasks[:] = []
+        return self;
+
     ###################################
     # LEDs
     ###################################
@@ -18,23 +67,16 @@ class Leds():
         return self;
 
     def eyes(self, hex=0xCC0033, intensity=0):
-        self.nao.env.leds.fadeRGB(self.joints.LEDs.FaceLeds, hex, intensity) # intensity & duration
-        return self;
+        return self.fade(self.joints.LEDs.FaceLeds, hex, intensity) # intensity & duration
 
     def head(self, hex=0xCC0033, intensity=0):
-        self.nao.env.leds.fadeRGB("BrainLedsBack", hex, intensity) # intensity & duration
-        self.nao.env.leds.fadeRGB("BrainLedsMiddle", hex, intensity) # intensity & duration
-        self.nao.env.leds.fadeRGB("BrainLedsFront", hex, intensity) # intensity & duration
-        return self;
+        return self.fade(self.group('FluentNaoHead'), hex, intensity) # intensity & duration
 
     def ears(self, hex=0xCC0033, intensity=0):
-        self.nao.env.leds.fadeRGB(self.joints.LEDs.EarLeds, hex, intensity) # intensity & duration
-        return self;
+        return self.fade(self.joints.LEDs.EarLeds, hex, intensity) # intensity & duration
 
     def chest(self, hex=0xCC0033, intensity=0):
-        self.nao.env.leds.fadeRGB(self.joints.LEDs.ChestLeds, hex, intensity) # intensity & duration
-        return self;
+        return self.fade(self.joints.LEDs.ChestLeds, hex, intensity) # intensity & duration
 
     def feet(self, hex=0xCC0033, intensity=0):
-        self.nao.env.leds.fadeRGB(self.joints.LEDs.FeetLeds, hex, intensity) # intensity & duration
-        return self;
\ No newline at end of file
+        return self.fade(self.joints.LEDs.FeetLeds, hex, intensity) # intensity & duration
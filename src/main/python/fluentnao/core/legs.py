@@ -13,6 +13,11 @@ class Legs():
 
     def go(self):
         self.nao.go()
+
+    def join(self):
+        # wait only for the moves of this part
+        self.nao.join(self.chains.LLeg, self.chains.RLeg)
+        return self;
         
 
     ###################################
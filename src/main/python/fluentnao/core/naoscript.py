@@ -1,6 +1,21 @@
+import ast
+import collections
+import copy
+import hashlib
 import httplib
+import inspect
 import json
 
+from fluentnao.core.arms import Arms
+from fluentnao.core.audio import Audio
+from fluentnao.core.elbows import Elbows
+from fluentnao.core.feet import Feet
+from fluentnao.core.hands import Hands
+from fluentnao.core.head import Head
+from fluentnao.core.leds import Leds
+from fluentnao.core.legs import Legs
+from fluentnao.core.wrists import Wrists
+
 class NaoScript():
 
     # init method
@@ -44,17 +59,184 @@ class NaoScript():
     def run_script(self, cmds, split_str=";"):
         line = 0;
         try:
-            if (len(cmds) > 0):
-                for cmd in cmds.split(split_str):
-                    line += 1
-                    if not "#" in cmd:
-                        cmd = cmd.replace("nao.", "").strip()
-                        cmd = cmd.replace(";", "").strip()
-                        if (len(cmd) > 0):
-                            cmd = "self.nao." + cmd
-                            self.log("line " + str(line) + ": " + cmd)
-                            eval(cmd)   
-        except:
-            self.log("errors occured")
+            plan = compile_script(cmds, split_str)
+            for (line, steps) in plan:
+                self.log("line " + str(line) + ": " + describe_steps(steps))
+                run_steps(self.nao, steps)
+            # start any buffered moves the script didn't send with go()
+            self.nao.flush()
+        except ScriptError as e:
+            self.log("error on line " + str(e.line) + ": " + e.reason)
+            self.nao.say("you have an error in your code on line " + str(e.line))
+        except Exception as e:
+            self.log("error on line " + str(line) + ": " + str(e))
             self.nao.say("you have an error in your code on line " + str(line))
-        
+        finally:
+            # don't leave whole body balance on if the script didn't turn it off
+            self.nao.balance_session.close()
+
+
+###################################
+# script compiler
+###################################
+
+# a script is compiled to a list of (line number, steps) where each step is either
+# (STEP_ATTRIBUTE, name) or (STEP_CALL, args, kwargs) applied to the result of the previous step.
+# Calls with arguments which could be changed by the method called are (STEP_COPY_CALL, args, kwargs)
+# and are given a copy of the arguments so that later runs of the cached plan are not affected.
+# A line which can't be compiled is (STEP_ERROR, ScriptError) and ends the plan, so that the
+# lines before it still run as they did when scripts were run line by line
+STEP_ATTRIBUTE = 0
+STEP_CALL = 1
+STEP_COPY_CALL = 2
+STEP_ERROR = 3
+
+# number of compiled scripts to keep
+MAX_CACHED_SCRIPTS = 32
+
+# parts of nao which scripts may use, by the name of the attribute holding them
+SCRIPT_PARTS = { 'arms' : Arms, 'audio' : Audio, 'elbows' : Elbows, 'feet' : Feet, 'hands' : Hands,
+                 'head' : Head, 'leds' : Leds, 'legs' : Legs, 'post' : Leds, 'wrists' : Wrists }
+
+_compiled_scripts = collections.OrderedDict()
+_command_names = None
+
+class ScriptError(Exception):
+    def __init__(self, line, message):
+        super(ScriptError, self).__init__(message)
+        self.line = line
+        self.reason = message
+
+    def __str__(self):
+        return "line {}: {}".format(self.line, self.reason)
+
+
+def compile_script(cmds, split_str=";"):
+    '''
+    Return the plan for a script, compiling it only if the same script has not been seen recently
+    '''
+    content = cmds.encode('utf-8') if isinstance(cmds, unicode) else cmds
+    key = hashlib.sha1(split_str + "\0" + content).hexdigest()
+    try:
+        plan = _compiled_scripts.pop(key)
+    except KeyError:
+        plan = parse_script(cmds, split_str)
+        if len(_compiled_scripts) >= MAX_CACHED_SCRIPTS:
+            _compiled_scripts.popitem(last=False)
+    _compiled_scripts[key] = plan
+    return plan
+
+def parse_script(cmds, split_str=";"):
+    '''
+    Parse a FluentNAO script into a plan. Each statement must be a chain of FluentNAO commands
+    and parts starting from nao, or from one of its parts, and calls may only have literal
+    arguments. The first line that is not valid is compiled to a STEP_ERROR which raises
+    ScriptError when it is run and the rest of the script is not parsed.
+    '''
+    plan = []
+    for (i, cmd) in enumerate(cmds.split(split_str)):
+        line = i + 1
+        cmd = cmd.strip()
+        if not cmd:
+            continue
+        try:
+            plan.extend((line, steps) for steps in _parse_line(line, cmd))
+        except ScriptError as e:
+            plan.append((line, [(STEP_ERROR, e)]))
+            break
+    return plan
+
+def _parse_line(line, cmd):
+    try:
+        tree = ast.parse(cmd.rstrip(";"), mode='exec')
+    except SyntaxError as e:
+        raise ScriptError(line, "syntax error: {}".format(e.msg))
+    for statement in tree.body:
+        if not isinstance(statement, ast.Expr):
+            raise ScriptError(line, "only calls of nao methods are allowed")
+    return [_parse_chain(line, statement.value) for statement in tree.body]
+
+def _parse_chain(line, node):
+    steps = []
+    while True:
+        if isinstance(node, ast.Call):
+            if getattr(node, 'starargs', None) or getattr(node, 'kwargs', None):
+                raise ScriptError(line, "* and ** arguments are not allowed")
+            args = [_literal(line, a) for a in node.args]
+            kwargs = dict((k.arg, _literal(line, k.value)) for k in node.keywords)
+            if all(_is_immutable(v) for v in args + kwargs.values()):
+                steps.append((STEP_CALL, args, kwargs))
+            else:
+                steps.append((STEP_COPY_CALL, args, kwargs))
+            node = node.func
+        elif isinstance(node, ast.Attribute):
+            steps.append(_attribute_step(line, node.attr))
+            node = node.value
+        elif isinstance(node, ast.Name):
+            # scripts may leave out the leading nao.
+            if node.id != 'nao':
+                steps.append(_attribute_step(line, node.id))
+            break
+        else:
+            raise ScriptError(line, "only calls of nao methods are allowed")
+    steps.reverse()
+    if not steps:
+        raise ScriptError(line, "nothing to do")
+    return steps
+
+def command_names():
+    '''
+    Return the names scripts may use, the parts of nao and the public methods of nao and its parts
+    '''
+    global _command_names
+    if _command_names is None:
+        # nao.py imports this module
+        from fluentnao.nao import Nao
+        names = set(SCRIPT_PARTS.keys())
+        for cls in [Nao] + SCRIPT_PARTS.values():
+            names.update(name for (name, member) in inspect.getmembers(cls, inspect.ismethod)
+                         if not name.startswith('_'))
+        _command_names = frozenset(names)
+    return _command_names
+
+def _attribute_step(line, name):
+    if not name in command_names():
+        raise ScriptError(line, "{} is not a FluentNAO command".format(name))
+    return (STEP_ATTRIBUTE, name)
+
+def _is_immutable(value):
+    if isinstance(value, tuple):
+        return all(_is_immutable(v) for v in value)
+    return value is None or isinstance(value, (bool, int, long, float, complex, basestring))
+
+def _literal(line, node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise ScriptError(line, "arguments must be numbers, strings or constants")
+
+def run_steps(nao, steps):
+    result = nao
+    for step in steps:
+        if step[0] == STEP_ATTRIBUTE:
+            result = getattr(result, step[1])
+        elif step[0] == STEP_CALL:
+            result = result(*step[1], **step[2])
+        elif step[0] == STEP_COPY_CALL:
+            (args, kwargs) = copy.deepcopy((step[1], step[2]))
+            result = result(*args, **kwargs)
+        else:
+            raise step[1]
+    return result
+
+def describe_steps(steps):
+    text = "nao"
+    for step in steps:
+        if step[0] == STEP_ATTRIBUTE:
+            text = text + "." + step[1]
+        elif step[0] == STEP_ERROR:
+            text = text + " " + step[1].reason
+        else:
+            args = [repr(a) for a in step[1]] + ["{}={!r}".format(k, v) for (k, v) in step[2].iteritems()]
+            text = text + "(" + ",".join(args) + ")"
+    return text
@@ -13,6 +13,11 @@ class Wrists():
 
     def go(self):
         self.nao.go()
+
+    def join(self):
+        # wait only for the moves of this part
+        self.nao.join(self.chains.LArm, self.chains.RArm)
+        return self;
         
     ###################################
     # Center
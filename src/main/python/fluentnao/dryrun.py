@@ -0,0 +1,160 @@
+'''
+Created on 18 Oct 2026
+
+Run FluentNAO scripts without a robot. A DryRunEnvironment stands in for NaoEnvironment
+and records the joint targets that Nao would have sent, so that scripts can be checked,
+timed or converted to keyframes offline.
+'''
+
+from fluentnao.nao import Nao
+from fluentnao.core.naoscript import ScriptError, compile_script, run_steps
+from recorder.topology import JOINT_NAMES, JOINT_CHAIN_HEAD, JOINT_CHAIN_LEFT_ARM, JOINT_CHAIN_LEFT_LEG, \
+    JOINT_CHAIN_RIGHT_LEG, JOINT_CHAIN_RIGHT_ARM
+
+CHAIN_JOINT_NAMES = { 'Body' : JOINT_NAMES,
+                      'Head' : JOINT_CHAIN_HEAD,
+                      'LArm' : JOINT_CHAIN_LEFT_ARM,
+                      'LLeg' : JOINT_CHAIN_LEFT_LEG,
+                      'RLeg' : JOINT_CHAIN_RIGHT_LEG,
+                      'RArm' : JOINT_CHAIN_RIGHT_ARM }
+
+# used when no limits table is given, wide enough that no move is limited
+UNLIMITED = [-10.0, 10.0, 10.0, 0.0]
+
+
+class DryRunProxy(object):
+    '''
+    Accepts any method call, records it and returns a task id. post calls are recorded in the same way.
+    '''
+
+    def __init__(self, name, calls):
+        super(DryRunProxy, self).__init__()
+        self.name = name
+        self.calls = calls
+        self.post = self
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        def call(*args):
+            self.calls.append((self.name, method, args))
+            return len(self.calls)
+        return call
+
+    def isRunning(self, task_id):
+        return False
+
+    def wait(self, task_id, timeout):
+        pass
+
+    def listGroup(self, name):
+        return [name]
+
+    def getStiffnesses(self, names):
+        return [1.0] * len(JOINT_NAMES)
+
+
+class DryRunMotion(DryRunProxy):
+    '''
+    Keeps the angle of each joint up to date as moves are made and records
+    each angleInterpolation as a keyframe
+    '''
+
+    def __init__(self, calls, start_angles=None, limits=None):
+        super(DryRunMotion, self).__init__('ALMotion', calls)
+        self.angles = dict((n, 0.0) for n in JOINT_NAMES)
+        if start_angles:
+            self.angles.update(start_angles)
+        self.limits = limits
+        self.moves = []
+
+    def angleInterpolation(self, names, angle_lists, time_lists, is_absolute):
+        if isinstance(names, basestring):
+            (names, angle_lists, time_lists) = ([names], [angle_lists], [time_lists])
+        changes = {}
+        duration = 0.0
+        for (name, angles, times) in zip(names, angle_lists, time_lists):
+            angles = angles if isinstance(angles, list) else [angles]
+            times = times if isinstance(times, list) else [times] * len(angles)
+            changes[name] = angles[-1]
+            duration = max([duration] + times)
+        self.angles.update(changes)
+        self.moves.append((changes, duration))
+        self.calls.append((self.name, 'angleInterpolation', (names, angle_lists, time_lists, is_absolute)))
+        return len(self.calls)
+
+    def getJointNames(self, name):
+        return CHAIN_JOINT_NAMES.get(name, [name])
+
+    def getAngles(self, names, use_sensors):
+        if isinstance(names, basestring):
+            names = self.getJointNames(names)
+        return [self.angles[n] for n in names]
+
+    def getLimits(self, name):
+        limits = self.limits or {}
+        return [list(limits[n]) if n in limits else UNLIMITED for n in self.getJointNames(name)]
+
+    def keyframes(self):
+        '''
+        Return the moves as keyframes in the same form as parsed JSON and EDN code
+        '''
+        return [{ 'changes' : changes, 'duration' : duration, 'is_blocking' : True }
+                for (changes, duration) in self.moves]
+
+    def duration(self):
+        '''
+        Return the time in seconds the script would take to move, if each keyframe
+        waits for the previous one to finish
+        '''
+        return sum(duration for (changes, duration) in self.moves)
+
+
+class DryRunEnvironment(object):
+    '''
+    Stands in for NaoEnvironment. All proxies other than motion just record the calls made to them.
+    '''
+
+    def __init__(self, start_angles=None, limits=None):
+        super(DryRunEnvironment, self).__init__()
+        self.calls = []
+        self.limits = limits
+        self.motion = DryRunMotion(self.calls, start_angles, limits)
+        self.proxies = {}
+
+    def joint_limits(self):
+        return self.limits
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in self.proxies:
+            self.proxies[name] = DryRunProxy(name, self.calls)
+        return self.proxies[name]
+
+
+def dry_run(script, split_str="\n", start_angles=None, limits=None):
+    '''
+    Run a FluentNAO script against a DryRunEnvironment and return the environment.
+    Raises ScriptError for the first line that can't be run.
+    '''
+    env = DryRunEnvironment(start_angles, limits)
+    nao = Nao(env, log_function=lambda msg: None, buffered=True)
+    # moves are recorded as written, a joint told to stay where it is is part of the keyframe
+    nao.drop_no_op_moves = False
+    line = 0
+    try:
+        for (line, steps) in compile_script(script, split_str):
+            run_steps(nao, steps)
+        nao.go()
+    except ScriptError:
+        raise
+    except Exception as e:
+        raise ScriptError(line, str(e))
+    return env
+
+def script_keyframes(script, split_str="\n", start_angles=None):
+    '''
+    Convert a FluentNAO script to keyframes, one per go()
+    '''
+    return dry_run(script, split_str, start_angles).motion.keyframes()
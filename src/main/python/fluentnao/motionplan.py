@@ -0,0 +1,52 @@
+'''
+Created on 18 Oct 2026
+
+Optimisation of buffered moves before they are sent to the robot, so that joints which
+are moved several times or told to go where they already are don't cost extra RPCs.
+'''
+
+import collections
+import math
+
+# moves to within this many radians of a joint's last angle are not sent
+ANGLE_TOLERANCE = math.radians(0.1)
+
+
+def is_same_angle(a, b, tolerance=ANGLE_TOLERANCE):
+    return abs(a - b) <= tolerance
+
+def is_no_op(angles, last_angle, tolerance=ANGLE_TOLERANCE):
+    '''
+    True if every angle of a move is where the joint was last sent
+    '''
+    if last_angle is None:
+        return False
+    return all(is_same_angle(a, last_angle, tolerance) for a in angles)
+
+def optimise_moves(moves, last_angles, tolerance=ANGLE_TOLERANCE):
+    '''
+    Take an iterable of (joint name, angles, times) and return (moves, hold) where moves
+    is an OrderedDict of joint name -> (angles, times) in which the last move of each joint
+    replaces any earlier ones and moves which would leave a joint at its angle in last_angles
+    are dropped. hold is the longest time in seconds of the dropped moves, as keeping a
+    joint where it is for a while may be deliberate
+    '''
+    merged = collections.OrderedDict()
+    for (name, angles, times) in moves:
+        merged.pop(name, None)
+        merged[name] = (angles, times)
+    hold = 0.0
+    for (name, (angles, times)) in merged.items():
+        if is_no_op(angles, last_angles.get(name), tolerance):
+            hold = max([hold] + times)
+            del merged[name]
+    return (merged, hold)
+
+def update_last_angles(last_angles, moves):
+    '''
+    Record the final angle of each move in an OrderedDict from optimise_moves
+    '''
+    for (name, (angles, times)) in moves.iteritems():
+        if angles:
+            last_angles[name] = angles[-1]
+    return last_angles
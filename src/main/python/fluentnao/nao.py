@@ -18,23 +18,60 @@ from fluentnao.core.wrists import Wrists
 from fluentnao.core.leds import Leds
 from fluentnao.core.audio import Audio
 from fluentnao.core.naoscript import NaoScript
+from fluentnao.tasks import TaskTracker, DEFAULT_TIMEOUT_MS
+from fluentnao.timeline import Timeline, ImmediateCommand
+from fluentnao.motionplan import optimise_moves, update_last_angles
+from fluentnao.balance import BalanceSession, chains_needing_stiffness, STIFF_THRESHOLD
+from naoutil.limits import clamp_angle
 
 import almath
 import math
 import time
 from datetime import datetime, timedelta
 
+# chains which can move independently of each other
+PART_CHAINS = ["Head", "LArm", "RArm", "LLeg", "RLeg"]
+
 class Nao(object):
 
     # init method
-    def __init__(self, env, log_function=None):
+    def __init__(self, env, log_function=None, buffered=False):
         super(Nao, self).__init__()
         
         # jobs for threading
         self.jobs = []
+
+        # in buffered mode moves are held here as (joint, angles, times) until go()
+        # and then optimised and sent as one command
+        self.buffered = buffered
+        self.pending_moves = []
+
+        # when recording a timeline moves are added to it instead of being sent
+        self.timeline = None
         
         # set motion proxy & log
         self.env = env
+        self.tasks = None
+        self.job_futures = {}
+        # chains moved by each job, None for jobs such as postures which move the whole body
+        self.job_chains = {}
+        # chain -> set of chains whose moves must finish before it moves
+        self.dependencies = {}
+        # how many seconds jobs such as timelines are expected to take, waits for them
+        # allow this long on top of the usual timeout
+        self.job_seconds = {}
+        # chain -> time.time() until which moves dropped because they left the chain's
+        # joints where they were keep it still
+        self.hold_until = {}
+
+        # last angle in radians each joint was told to move to
+        self.commanded_angles = {}
+        # last angle in radians each joint was sent by flush()
+        self.sent_angles = {}
+        # False to send moves which leave joints where they were last sent, so that
+        # every move written in a script is recorded
+        self.drop_no_op_moves = True
+        self.body_joint_names = None
         self.log_function = log_function
         if not log_function:
             self.logger = logging.getLogger("fluentnao.nao.Nao")
@@ -42,6 +79,11 @@ class Nao(object):
         # joints
         self.joints = Joints()
         self.chains = self.joints.Chains
+        self.joint_chains = {}
+        for c in PART_CHAINS:
+            self.joint_chains[c] = c
+            for j in getattr(self.joints, c):
+                self.joint_chains[j] = c
 
         # other
         self.naoscript = NaoScript(self)
@@ -60,6 +102,7 @@ class Nao(object):
         # legs
         self.feet = Feet(self)
         self.legs = Legs(self, self.feet)
+        self.balance_session = BalanceSession(self)
 
         # global duration
         self.set_duration(1.5)
@@ -82,6 +125,8 @@ class Nao(object):
         return self;
 
     def wait(self, seconds):
+        if self.timeline is not None:
+            raise ImmediateCommand("wait can't be recorded")
         time.sleep(seconds)
         return self;
 
@@ -90,54 +135,62 @@ class Nao(object):
     # Postures
     ###################################
     def stand_init(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("StandInit", speed))
         taskId = self.env.robotPosture.post.goToPosture("StandInit", speed)
-        self.jobs.append(taskId)
+        self.add_job(taskId)
         self.go()
         return self;
     
     def sit_relax(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("SitRelax", speed))
         taskId = self.env.robotPosture.post.goToPosture("SitRelax", speed)
-        self.jobs.append(taskId)
+        self.add_job(taskId)
         self.go()
         return self;
     
     def stand_zero(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("StandZero", speed))
         taskId = self.env.robotPosture.post.goToPosture("StandZero", speed)
-        self.jobs.append(taskId)
+        self.add_job(taskId)
         self.go()
         return self;
     
     def lying_belly(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("LyingBelly", speed))
         taskId = self.env.robotPosture.post.goToPosture("LyingBelly", speed)
-        self.jobs.append(taskId)
+        self.add_job(taskId)
         self.go()
         return self;
     
     def lying_back(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("LyingBack", speed))
         taskId = self.env.robotPosture.post.goToPosture("LyingBack", speed)
-        self.jobs.append(taskId)
+        self.add_job(taskId)
         self.go()
         return self;
     
     def stand(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("Stand", speed))
         self.env.robotPosture.goToPosture("Stand", speed)
         self.env.motion.waitUntilMoveIsFinished();
         return self;
     
     def crouch(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("Crouch", speed))
         taskId = self.env.robotPosture.post.goToPosture("Crouch", speed)
-        self.jobs.append(taskId)
+        self.add_job(taskId)
         self.go()
         return self;
     
     def sit(self, speed=.5):
+        self.forget_angles()
         self.log("goToPosture=%s|speed=%s" % ("Sit", speed))
         self.env.robotPosture.post.goToPosture("Sit", speed)
         self.env.motion.waitUntilMoveIsFinished();
@@ -154,11 +207,27 @@ class Nao(object):
         self.env.motion.stiffnessInterpolation(pNames, pStiffnessLists, pTimeLists)
         return self;
 
+    def stiffen(self, threshold=STIFF_THRESHOLD):
+        # like stiff() but only stiffens chains which are not already stiff
+        chains = chains_needing_stiffness(self, threshold=threshold)
+        if len(chains) == len(self.joints.Chains) - 1:
+            chains = self.joints.Chains.Body
+        if chains:
+            self.env.motion.stiffnessInterpolation(chains, 1.0, 1.0)
+        return self;
+
+    def get_body_joint_names(self):
+        if self.body_joint_names is None:
+            self.body_joint_names = self.env.motion.getJointNames("Body")
+        return self.body_joint_names
+
     def rest(self):
+        self.forget_angles()
         self.env.motion.rest()
         return self;
 
     def relax(self):
+        self.forget_angles()
         pNames = self.joints.Chains.Body
         pStiffnessLists = 0
         pTimeLists = 1.0
@@ -195,18 +264,25 @@ class Nao(object):
 
         duration = self.determine_duration(duration)  
 
-        # stiffen body
-        self.stiff()
-        self.whole_body_endable()
-
-        self.foot_state()
+        # stiffen body & enable wb unless a balance session is already running
+        self.balance_session.start()
+        self.balance_session.set_foot_states(self.joints.StateName.Fixed, self.joints.StateName.Fixed)
         self.constrain_motion()
 
         # Com go to LLeg
         supportLeg = leg
         self.env.motion.wbGoToBalance(supportLeg, duration)
 
-        self.whole_body_disable()
+        self.balance_session.end()
+
+    def balance_on(self):
+        # keep whole body balance enabled for the leg moves until balance_off()
+        self.balance_session.start()
+        return self;
+
+    def balance_off(self):
+        self.balance_session.end()
+        return self;
 
 
     ###################################
@@ -226,38 +302,232 @@ class Nao(object):
     # blocking
     ###################################
     
-    def go(self):
-        for taskId in self.jobs:
+    def set_buffered(self, buffered=True):
+        if not buffered:
+            self.flush()
+        self.buffered = buffered
+        return self;
 
-            self.log("taskId=%s|action=wait" % (taskId))
-            d1 = datetime.now()
-            self.env.motion.wait(taskId, 8000)   
-            d2 = datetime.now()
-            r = d2 - d1
-            self.log("taskId=%s|action=done|seconds=%s" % (taskId, r.total_seconds()))
+    def flush(self, chains=None):
+        if self.timeline is not None:
+            # the timeline drops moves which leave joints where they are
+            for (name, angles, times) in self.pending_moves:
+                self.timeline.add_move(name, angles, times)
+            self.pending_moves[:] = []
+            return self;
+
+        # send buffered moves of the chains (all if None) as a single interpolation of all the joints
+        if chains is None:
+            sending = self.pending_moves[:]
+        else:
+            sending = [m for m in self.pending_moves if self.chain_of(m[0]) in chains]
+        if not sending:
+            return self;
+        moved_chains = set(self.chain_of(m[0]) for m in sending)
+        first = set(d for c in moved_chains for d in self.dependencies.get(c, ()) if d in moved_chains and d != c)
+        if first and first != moved_chains:
+            # chains which others depend on are sent and finished first
+            self.join(*first)
+            return self.flush(chains)
+        self.pending_moves[:] = [m for m in self.pending_moves if m not in sending]
+        self.wait_for_dependencies(moved_chains)
+
+        (moves, hold) = optimise_moves(sending, self.sent_angles if self.drop_no_op_moves else {})
+        if hold:
+            until = time.time() + hold
+            for c in moved_chains:
+                self.hold_until[c] = max(until, self.hold_until.get(c, 0))
+        if moves:
+            update_last_angles(self.sent_angles, moves)
+            names = moves.keys()
+            angleLists = [angles for (angles, times) in moves.values()]
+            timeLists = [times for (angles, times) in moves.values()]
+
+            taskId = self.env.motion.post.angleInterpolation(names, angleLists, timeLists, True)
+            self.log("|taskId=%s|chain=%s|angleList=%s" % (taskId, names, angleLists))
+            self.add_job(taskId, chains=moved_chains)
+        return self;
+
+    def add_job(self, taskId, description='', chains=None, seconds=None):
+        # returns a TaskFuture which completes when the posted task finishes
+        self.jobs.append(taskId)
+        if chains is not None and None not in chains:
+            self.job_chains[taskId] = frozenset(chains)
+        if seconds:
+            self.job_seconds[taskId] = seconds
+        return self._track_job(taskId, description)
+
+    def _wait_timeout_ms(self, taskIds):
+        longest = max([self.job_seconds.get(taskId, 0) for taskId in taskIds] + [0])
+        return DEFAULT_TIMEOUT_MS + int(longest * 1000)
+
+    def _track_job(self, taskId, description=''):
+        if not self.tasks:
+            self.tasks = TaskTracker(self.env.motion)
+        future = self.tasks.track(taskId, description)
+        self.job_futures[taskId] = future
+        return future
+
+    def go(self):
+        self.flush()
+        if self.timeline is not None:
+            # moves after this one start once this keyframe is complete
+            self.timeline.end_segment()
+            return self
+
+        if self.jobs:
+            # jobs added to the list directly are timed from now
+            futures = [self.job_futures.get(taskId) or self._track_job(taskId) for taskId in list(self.jobs)]
+            self.log("taskIds=%s|action=wait" % (self.jobs))
+
+            # all tasks are waited for together rather than one after the other
+            self.tasks.wait_all(self._wait_timeout_ms(self.jobs))
+            for f in futures:
+                if f.done():
+                    self.log("taskId=%s|action=done|seconds=%s" % (f.task_id, f.duration()))
+                else:
+                    self.log("taskId=%s|action=timeout" % (f.task_id))
+        self.wait_for_holds()
 
         self.jobs[:] = []
+        self.job_futures.clear()
+        self.job_chains.clear()
+        self.job_seconds.clear()
         self.log("done")
         
         return self         
+
+    ###################################
+    # per chain barriers
+    ###################################
+
+    def chain_of(self, joint):
+        # None for names which aren't part of a single chain such as Body
+        return self.joint_chains.get(joint)
+
+    def join(self, *chains):
+        # like go() but only sends and waits for the moves of the named chains, other
+        # chains keep moving. With no chains this is the same as go()
+        if not chains or self.timeline is not None:
+            return self.go()
+
+        chains = set(chains)
+        self.flush(chains)
+        taskIds = [taskId for taskId in self.jobs
+                   if self.job_chains.get(taskId, chains) & chains]
+        if taskIds:
+            futures = [self.job_futures.get(taskId) or self._track_job(taskId) for taskId in taskIds]
+            self.log("taskIds=%s|chains=%s|action=wait" % (taskIds, sorted(chains)))
+            self.tasks.wait_for(futures, self._wait_timeout_ms(taskIds))
+            for taskId in taskIds:
+                self.jobs.remove(taskId)
+                self.job_futures.pop(taskId, None)
+                self.job_chains.pop(taskId, None)
+                self.job_seconds.pop(taskId, None)
+        self.wait_for_holds(chains)
+        return self
+
+    def wait_for_holds(self, chains=None):
+        # sleep until the chains (all if None) have been held still as long as the
+        # moves dropped by flush() would have taken
+        if chains is None:
+            chains = self.hold_until.keys()
+        until = max([self.hold_until.pop(c, 0) for c in chains] + [0])
+        remaining = until - time.time()
+        if remaining > 0:
+            self.log("chains=%s|action=hold|seconds=%s" % (sorted(chains), remaining))
+            time.sleep(remaining)
+
+    def depends(self, chain, *chains):
+        # moves of chain will not start until moves already made by chains have finished,
+        # with no chains the dependencies of chain are removed
+        if chains:
+            self.dependencies[chain] = set(chains)
+        else:
+            self.dependencies.pop(chain, None)
+        return self;
+
+    def wait_for_dependencies(self, moving_chains):
+        waiting_for = set()
+        for c in moving_chains:
+            waiting_for.update(self.dependencies.get(c, ()))
+        waiting_for.difference_update(moving_chains)
+        if waiting_for:
+            self.join(*waiting_for)
             
+    ###################################
+    # timelines
+    ###################################
+
+    def start_timeline(self):
+        # record moves into a Timeline instead of sending them
+        self.flush()
+        self.timeline = Timeline()
+        return self;
+
+    def end_timeline(self):
+        # stop recording and return the recorded timeline
+        self.flush()
+        timeline = self.timeline
+        self.timeline = None
+        if timeline:
+            timeline.end_segment()
+        return timeline
+
+    def play(self, timeline):
+        # play a whole timeline as one motion task
+        self.forget_angles()
+        leds = self.env.leds if timeline.led_lists() else None
+        taskId = timeline.play(self.env.motion, leds)
+        if taskId is not None:
+            self.log("|taskId=%s|timeline=%s joints|seconds=%s" % (taskId, len(timeline), timeline.duration()))
+            # go() waits for the whole timeline however long it is
+            self.add_job(taskId, seconds=timeline.duration())
+        return self;
+
     ###################################
     # movement
     ###################################
 
+    def forget_angles(self):
+        # joints are about to be moved by something other than move()
+        self.flush()
+        self.commanded_angles.clear()
+        self.sent_angles.clear()
+        return self;
+
     def move(self, chain, angleListInRadians, timeListInSeconds):
-        
+
+        if isinstance(chain, basestring) and angleListInRadians:
+            self.commanded_angles[chain] = angleListInRadians[-1]
+
+        if self.buffered or self.timeline is not None:
+            # wait for go(), a later move of the same joint replaces an earlier one
+            if not isinstance(timeListInSeconds, list):
+                timeListInSeconds = [timeListInSeconds] * len(angleListInRadians)
+            self.pending_moves.append((chain, list(angleListInRadians), timeListInSeconds))
+            return
+
+        if isinstance(chain, basestring) and angleListInRadians:
+            self.sent_angles[chain] = angleListInRadians[-1]
+        moved_chains = set([self.chain_of(chain)]) if isinstance(chain, basestring) else None
+        if moved_chains:
+            self.wait_for_dependencies(moved_chains)
+
         # motion w/ blocking call
         taskId = self.env.motion.post.angleInterpolation(chain, angleListInRadians, timeListInSeconds, True)    
 
         # log
         self.log("|taskId=%s|chain=%s|angleList=%s" % (taskId, chain, angleListInRadians))
-        self.jobs.append(taskId)
+        self.add_job(taskId, chains=moved_chains)
 
     def move_with_degrees_and_duration(self, jointName, angleInDegrees, durationInSeconds):
 
         # convert to radians
         angleInRadians = angleInDegrees * almath.TO_RAD
+        limits = self.get_joint_limits()
+        if limits:
+            angleInRadians = clamp_angle(limits, jointName, angleInRadians)
 
         # move
         self.move(jointName, [angleInRadians], durationInSeconds)
@@ -273,19 +543,31 @@ class Nao(object):
         # We prepare a collection of floats
         return [angle] * numBodies
 
+    def get_joint_limits(self):
+        # environments which can't supply a limits table return None
+        joint_limits = getattr(self.env, 'joint_limits', None)
+        if joint_limits:
+            return joint_limits()
+        return None
+
     def get_max_degrees_per_second(self, jointName):
-        limits = self.env.motion.getLimits(jointName);
-        minAngle = limits[0][0]
-        maxAngle = limits[0][1]
-        maxChange = limits[0][2]  # in rad.s-1
+        limits = self.get_joint_limits()
+        if limits and jointName in limits:
+            maxChange = limits[jointName].max_velocity  # in rad.s-1
+        else:
+            limits = self.env.motion.getLimits(jointName);
+            maxChange = limits[0][2]  # in rad.s-1
 
         #self.log("maxChange: " + str(maxChange) + " for " + jointName)
         return math.degrees(maxChange)
 
     def get_fraction_max_speed(self, jointName, desiredPositionInDegrees, executionTimeInSeconds):
-        # current position in degrees
-        useSensors = False;
-        currentPositionInDegrees = math.degrees(self.env.motion.getAngles(jointName, useSensors)[0]);
+        # current position in degrees, we only need to ask the robot if we've not moved the joint
+        if jointName in self.commanded_angles:
+            currentPositionInDegrees = math.degrees(self.commanded_angles[jointName])
+        else:
+            useSensors = False;
+            currentPositionInDegrees = math.degrees(self.env.motion.getAngles(jointName, useSensors)[0]);
         #self.log("pos in deg: " + str(currentPositionInDegrees))
 
         # distance
@@ -0,0 +1,144 @@
+'''
+Created on 18 Oct 2026
+
+Track the completion of tasks posted to NAOqi proxies. Rather than waiting for each
+task in turn, all outstanding tasks are polled together so that one long move does
+not delay noticing that the others have finished, and the time each task took is
+recorded as it completes.
+'''
+
+import logging
+import threading
+import time
+
+# how long go() waits for outstanding tasks, the same as the old per-task wait
+DEFAULT_TIMEOUT_MS = 8000
+
+DEFAULT_POLL_INTERVAL = 0.02
+
+
+class TaskFuture(object):
+    '''
+    The result of a posted task. Callbacks added with add_done_callback are called
+    with the future once the task has finished.
+    '''
+
+    def __init__(self, task_id, description='', clock=time.time):
+        super(TaskFuture, self).__init__()
+        self.task_id = task_id
+        self.description = description
+        self.clock = clock
+        self.started = clock()
+        self.finished = None
+        self.callbacks = []
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+
+    def done(self):
+        return self.event.is_set()
+
+    def duration(self):
+        '''
+        Return the number of seconds the task took or None if it has not finished
+        '''
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def wait(self, timeout=None):
+        '''
+        Block until the task has finished, return False if timeout expired first
+        '''
+        return self.event.wait(timeout)
+
+    def add_done_callback(self, callback):
+        with self.lock:
+            if not self.done():
+                self.callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_done(self):
+        with self.lock:
+            if self.done():
+                return
+            self.finished = self.clock()
+            self.event.set()
+            callbacks = self.callbacks
+            self.callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+
+class TaskTracker(object):
+    '''
+    Keeps a TaskFuture for each task posted to a proxy until it has finished
+    '''
+
+    def __init__(self, proxy, clock=time.time, poll_interval=DEFAULT_POLL_INTERVAL):
+        super(TaskTracker, self).__init__()
+        self.proxy = proxy
+        self.clock = clock
+        self.poll_interval = poll_interval
+        self.futures = []
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("fluentnao.tasks.TaskTracker")
+
+    def track(self, task_id, description=''):
+        future = TaskFuture(task_id, description, self.clock)
+        with self.lock:
+            self.futures.append(future)
+        return future
+
+    def pending(self):
+        with self.lock:
+            return [f for f in self.futures if not f.done()]
+
+    def poll(self):
+        '''
+        Check all outstanding tasks without blocking, completing those which have finished.
+        Returns the list of tasks still running.
+        '''
+        running = []
+        for future in self.pending():
+            if self.proxy.isRunning(future.task_id):
+                running.append(future)
+            else:
+                future.set_done()
+        with self.lock:
+            self.futures = [f for f in self.futures if not f.done()]
+        return running
+
+    def wait_all(self, timeout_ms=DEFAULT_TIMEOUT_MS):
+        '''
+        Wait until all outstanding tasks have finished or timeout_ms has elapsed.
+        Returns the futures for the tasks which finished.
+        '''
+        return self.wait_for(self.pending(), timeout_ms)
+
+    def wait_for(self, futures, timeout_ms=DEFAULT_TIMEOUT_MS):
+        '''
+        Wait until the given tasks have finished or timeout_ms has elapsed, other tasks
+        are left running. Returns the futures for the tasks which finished, those which
+        didn't finish in time are no longer tracked.
+        '''
+        waiting = set(futures)
+        deadline = self.clock() + timeout_ms / 1000.0
+        running = [f for f in self.poll() if f in waiting]
+        while len(running) > 1 and self.clock() < deadline:
+            time.sleep(self.poll_interval)
+            running = [f for f in self.poll() if f in waiting]
+
+        if len(running) == 1:
+            # only one left so we can block on it directly
+            remaining_ms = int(max(0.0, deadline - self.clock()) * 1000)
+            self.proxy.wait(running[0].task_id, remaining_ms)
+            self.poll()
+
+        abandoned = [f for f in futures if not f.done()]
+        if abandoned:
+            # so that later waits don't time out on them again
+            with self.lock:
+                self.futures = [f for f in self.futures if f not in abandoned]
+            self.logger.warning("Stopped waiting for tasks {}".format([f.task_id for f in abandoned]))
+        return [f for f in futures if f.done()]
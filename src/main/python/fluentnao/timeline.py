@@ -0,0 +1,264 @@
+'''
+Created on 18 Oct 2026
+
+A whole animation as per-joint lists of angles and times, so that it can be played with
+a single angleInterpolation call instead of one call and a wait for every keyframe.
+'''
+
+import collections
+import threading
+
+from fluentnao.motionplan import is_no_op
+from fluentnao.core.naoscript import compile_script, run_steps
+from naoutil.naoenv import PROXY_SHORT_NAMES
+
+# used for keyframes which don't say how long they should take
+DEFAULT_KEYFRAME_DURATION = 1.0
+
+# proxy methods which can be called while recording a timeline. These only read the
+# state of the robot or set up the LED groups that fades use
+RECORDABLE_CALLS = { 'ALMotion' : ['getAngles', 'getJointNames', 'getLimits', 'getStiffnesses'],
+                     'ALLeds' : ['listGroup', 'createGroup'] }
+
+
+class ImmediateCommand(Exception):
+    '''
+    Raised when a script being recorded as a timeline does something, such as speaking
+    or changing stiffness, which can't be put on the timeline
+    '''
+    pass
+
+
+class Timeline(object):
+    '''
+    Build up an animation one segment at a time. Moves added to a segment start at the same
+    time and the next segment starts when the longest move of the previous one has finished,
+    just as when each keyframe is followed by go(). Moves which leave a joint at the angle
+    it already has are dropped, so identical consecutive keyframes collapse into one.
+    Joints and LEDs hold still until the segment in which they next change starts.
+    '''
+
+    def __init__(self):
+        super(Timeline, self).__init__()
+        self.start_time = 0.0
+        self.segment = collections.OrderedDict()
+        self.keys = collections.OrderedDict()
+        # time of the first move of joints which don't move in the first segment, until
+        # then they hold the angle they have when the timeline is played
+        self.first_move_times = {}
+        # LED fades as (group, colour, duration) and per-group lists of colours and times
+        self.led_segment = []
+        self.led_keys = collections.OrderedDict()
+        # as first_move_times but for LED groups
+        self.led_start_times = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def duration(self):
+        return self.start_time
+
+    def add_move(self, joint_name, angles, times):
+        '''
+        Add a move of one joint to the current segment. angles is a list of angles in radians
+        and times a list of the same length with the time in seconds to reach each angle, measured
+        from the start of the segment. A later move of the same joint replaces an earlier one.
+        '''
+        if not isinstance(angles, list):
+            angles = [angles]
+        if not isinstance(times, list):
+            times = [times] * len(angles)
+        self.segment.pop(joint_name, None)
+        self.segment[joint_name] = (angles, times)
+
+    def add_led(self, group, colour, duration):
+        '''
+        Add a fade of an LED group to colour (as 0x00RRGGBB) to the current segment
+        '''
+        self.led_segment.append((group, colour, duration))
+
+    def end_segment(self):
+        '''
+        Finish the current segment, the next move will start after all its moves have finished
+        '''
+        longest = 0.0
+        for (name, (angles, times)) in self.segment.iteritems():
+            if name in self.keys:
+                (joint_angles, joint_times) = self.keys[name]
+                if is_no_op(angles, joint_angles[-1]):
+                    # the joint doesn't move but the segment still lasts as long as the move
+                    longest = max(longest, max(times))
+                    continue
+                self._hold(joint_angles, joint_times)
+            else:
+                if self.start_time > 0:
+                    self.first_move_times[name] = self.start_time
+                (joint_angles, joint_times) = self.keys.setdefault(name, ([], []))
+            for (a, t) in zip(angles, times):
+                joint_angles.append(a)
+                joint_times.append(self.start_time + t)
+            longest = max(longest, max(times))
+        for (group, colour, duration) in self.led_segment:
+            if group in self.led_keys:
+                (colours, times) = self.led_keys[group]
+                self._hold(colours, times)
+            else:
+                if self.start_time > 0:
+                    self.led_start_times[group] = self.start_time
+                (colours, times) = self.led_keys.setdefault(group, ([], []))
+            t = self.start_time + duration
+            # a fade which ends at the same time as the previous one replaces it
+            if times and times[-1] >= t:
+                colours[-1] = colour
+            else:
+                colours.append(colour)
+                times.append(t)
+            longest = max(longest, duration)
+        self.start_time = self.start_time + longest
+        self.segment.clear()
+        self.led_segment[:] = []
+
+    def _hold(self, values, times):
+        # keep the last value until this segment starts rather than moving slowly towards
+        # the next one from the time of the last key
+        if times[-1] < self.start_time:
+            values.append(values[-1])
+            times.append(self.start_time)
+
+    def add_keyframe(self, changes, duration=None):
+        '''
+        Add a keyframe as a segment which moves each joint in the changes dict to its angle
+        '''
+        if not duration:
+            duration = DEFAULT_KEYFRAME_DURATION
+        for (name, angle) in changes.iteritems():
+            self.add_move(name, [angle], [duration])
+        self.end_segment()
+
+    def to_lists(self, current_angles=None):
+        '''
+        Return a tuple (names, angleLists, timeLists) suitable for ALMotion.angleInterpolation.
+        Joints which first move after the start hold the angle given in current_angles
+        until then, without it they start moving at the start of the timeline.
+        '''
+        self.end_segment()
+        names = self.keys.keys()
+        angle_lists = []
+        time_lists = []
+        for n in names:
+            (angles, times) = self.keys[n]
+            if n in self.first_move_times and current_angles and n in current_angles:
+                angles = [current_angles[n]] + angles
+                times = [self.first_move_times[n]] + times
+            angle_lists.append(angles)
+            time_lists.append(times)
+        return (names, angle_lists, time_lists)
+
+    def led_lists(self):
+        '''
+        Return a list of (group, rgbList, timeList) suitable for ALLeds.fadeListRGB
+        '''
+        self.end_segment()
+        return [(g, colours, times) for (g, (colours, times)) in self.led_keys.iteritems()]
+
+    def play(self, motion, leds=None):
+        '''
+        Start playing the timeline and return the id of the posted motion task. LED fades
+        are posted to leds, if given, so they run alongside the motion.
+        '''
+        if leds is not None:
+            for (group, colours, times) in self.led_lists():
+                start = self.led_start_times.get(group)
+                if start:
+                    # the group's colour isn't known so its fades are posted when they start
+                    timer = threading.Timer(start, leds.post.fadeListRGB,
+                                            (group, colours, [t - start for t in times]))
+                    timer.daemon = True
+                    timer.start()
+                else:
+                    leds.post.fadeListRGB(group, colours, times)
+        self.end_segment()
+        current_angles = None
+        if self.first_move_times:
+            held = self.first_move_times.keys()
+            current_angles = dict(zip(held, motion.getAngles(held, True)))
+        (names, angle_lists, time_lists) = self.to_lists(current_angles)
+        if not names:
+            return None
+        return motion.post.angleInterpolation(names, angle_lists, time_lists, True)
+
+
+def timeline_from_data(command_data):
+    '''
+    Make a timeline from the keyframe data produced by parsing JSON or EDN code
+    '''
+    timeline = Timeline()
+    for cmd in command_data or []:
+        timeline.add_keyframe(cmd['changes'], cmd.get('duration'))
+    return timeline
+
+class _RecordingProxy(object):
+    '''
+    Passes on calls which can be made while recording and refuses all others before they reach the robot
+    '''
+
+    def __init__(self, env, name, allowed):
+        super(_RecordingProxy, self).__init__()
+        self.env = env
+        self.name = name
+        self.allowed = allowed
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        if method == 'post':
+            # posted calls are never recordable
+            return _RecordingProxy(self.env, self.name + ".post", [])
+        if method in self.allowed:
+            return getattr(getattr(self.env, self.name), method)
+        raise ImmediateCommand("{}.{} can't be recorded".format(self.name, method))
+
+
+class _RecordingEnvironment(object):
+    '''
+    Stands in for the environment while a timeline is recorded
+    '''
+
+    def __init__(self, env):
+        super(_RecordingEnvironment, self).__init__()
+        self.env = env
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        longName = PROXY_SHORT_NAMES.get(name, name)
+        if longName in PROXY_SHORT_NAMES.values():
+            return _RecordingProxy(self.env, name, RECORDABLE_CALLS.get(longName, []))
+        return getattr(self.env, name)
+
+
+def timeline_from_script(nao, script, split_str="\n"):
+    '''
+    Make a timeline by running a FluentNAO script with its moves recorded instead of sent.
+    Returns None if the script does anything other than move joints and fade LEDs, as those
+    things would happen before any of the moves, or has an error. Such scripts must be run
+    line by line. Nothing the script does reaches the robot while it's recorded.
+    '''
+    env = nao.env
+    depth = nao.balance_session.depth
+    nao.env = _RecordingEnvironment(env)
+    nao.start_timeline()
+    try:
+        for (line, steps) in compile_script(script, split_str):
+            run_steps(nao, steps)
+        timeline = nao.end_timeline()
+    except Exception as e:
+        # ImmediateCommand or an error in the script, which running it line by line reports
+        nao.log("timeline=none|reason=%s" % e)
+        nao.end_timeline()
+        # starting a balance session may have been refused part way through
+        nao.balance_session.depth = depth
+        timeline = None
+    finally:
+        nao.env = env
+    return timeline
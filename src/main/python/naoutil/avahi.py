@@ -7,14 +7,16 @@ Created on April 05, 2013
 Python module to access Avahi through DBus.
 '''
 
+import logging
 import os
+import threading
 import time
 import warnings
 
 try:
     import dbus
     import gobject
-    from dbus.mainloop.glib import DBusGMainLoop
+    from dbus.mainloop.glib import DBusGMainLoop, threads_init as dbus_threads_init
 except ImportError:
     warnings.warn('DBus/Avahi is unavailable (Windows?).', RuntimeWarning) 
 
@@ -60,6 +62,100 @@ def find_all_naos(ip_v6=False):
         }
         entry['favorite'] = os.environ.get('FAVORITE_NAO') in entry.values()
         return [entry]
+
+
+# how many seconds discovered NAOs are remembered before browsing again
+DISCOVERY_TTL = 60
+
+class NAODiscovery(object):
+    '''
+    Browses for NAOs in a background thread and keeps the results. Once a browse has
+    completed find_all_naos() answers immediately, if the results are older than ttl
+    seconds they are still returned but a new browse is started in the background.
+    '''
+
+    def __init__(self, ttl=DISCOVERY_TTL, finder=find_all_naos, clock=time.time):
+        super(NAODiscovery, self).__init__()
+        self.ttl = ttl
+        self.finder = finder
+        self.clock = clock
+        self.naos = None
+        self.updated = None
+        self.thread = None
+        self.browsed = threading.Event()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("naoutil.avahi.NAODiscovery")
+
+    def start(self):
+        '''
+        Start browsing unless a browse is already running
+        '''
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return self
+            self.thread = threading.Thread(target=self._browse, name='NAODiscovery')
+            self.thread.daemon = True
+            self.thread.start()
+        return self
+
+    def _browse(self):
+        try:
+            naos = self.finder()
+        except Exception as e:
+            self.logger.warning("Unable to browse for NAOs: {}".format(e))
+            naos = []
+        with self.lock:
+            self.naos = naos
+            self.updated = self.clock()
+        self.browsed.set()
+
+    def is_fresh(self):
+        with self.lock:
+            return self.updated is not None and self.clock() - self.updated < self.ttl
+
+    def find_all_naos(self, timeout=None):
+        '''
+        Return the NAOs found by the last browse, in the same form as the module level
+        find_all_naos(). Only waits, for up to timeout seconds, if no browse has completed yet.
+        '''
+        if not self.is_fresh():
+            self.start()
+        if not self.browsed.is_set():
+            self.browsed.wait(timeout)
+        with self.lock:
+            return list(self.naos or [])
+
+_discovery = None
+_discovery_lock = threading.Lock()
+
+def discovery():
+    '''
+    Return the NAODiscovery shared by the whole process
+    '''
+    global _discovery
+    with _discovery_lock:
+        if _discovery is None:
+            try:
+                # the browse runs its main loop outside the main thread
+                gobject.threads_init()
+                dbus_threads_init()
+            except NameError:
+                pass
+            _discovery = NAODiscovery()
+        return _discovery
+
+def start_discovery():
+    '''
+    Start looking for NAOs in the background so that they are known by the time they are needed
+    '''
+    return discovery().start()
+
+def find_cached_naos(timeout=None):
+    '''
+    Like find_all_naos() but answered from the shared NAODiscovery
+    '''
+    return discovery().find_all_naos(timeout)
+
     
 class _AvahiNAOFinder(object):
     '''
@@ -35,8 +35,11 @@ def _resolve_ip_port(nao_id=None, nao_port=None):
         nao_port = None
     else:
         nao_id = str(nao_id)
+        if _is_ip_address(nao_id):
+            # nothing to look up
+            return nao_id, int(nao_port) if nao_port is not None else 9559
         
-    all_naos = avahi.find_all_naos()
+    all_naos = avahi.find_cached_naos()
         
     if nao_port is None:
         if nao_id is not None:
@@ -48,6 +51,19 @@ def _resolve_ip_port(nao_id=None, nao_port=None):
         nao_ip, _ = _resolve_from_id(all_naos, nao_id)
         return nao_ip, int(nao_port) 
     
+def _is_ip_address(nao_id):
+    '''
+    True if nao_id is a literal IPv4 or IPv6 address
+    '''
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, nao_id)
+            return True
+        except (socket.error, ValueError, AttributeError):
+            # AttributeError as inet_pton is not available on all platforms
+            pass
+    return False
+
 def _resolve_from_id(all_naos, nao_id):
     '''
     Return a tuple (ip, port) corresponding to a robot 'ID'.
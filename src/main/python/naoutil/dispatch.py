@@ -0,0 +1,244 @@
+'''
+Created on 18 Oct 2026
+
+Run event callbacks on worker threads so that a slow callback doesn't hold up the
+NAOqi thread delivering events. Events for the same key always go to the same worker
+so they are handled in the order they arrived. Bursts of events from noisy sensors
+can be collapsed with a Coalescer before they are dispatched.
+'''
+
+import collections
+import logging
+import Queue
+import threading
+import time
+import zlib
+
+DEFAULT_WORKERS = 4
+
+# most events waiting for each worker
+DEFAULT_QUEUE_SIZE = 100
+
+# seconds to wait for space in a full queue before dropping the event
+DEFAULT_PUT_TIMEOUT = 0.5
+
+# snapshot of the dispatcher's counters, latencies are in seconds. Wait is the time an
+# event spent queued, run the time its callback took
+DispatchMetrics = collections.namedtuple('DispatchMetrics',
+                                         ['depths', 'max_depth', 'dispatched', 'dropped', 'errors',
+                                          'mean_wait', 'max_wait', 'mean_run', 'max_run'])
+
+_STOP = object()
+
+
+class EventDispatcher(object):
+    '''
+    Worker threads, each with a bounded queue, which run callbacks for events. The
+    worker for an event is chosen from its key.
+    '''
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 put_timeout=DEFAULT_PUT_TIMEOUT, clock=time.time):
+        super(EventDispatcher, self).__init__()
+        self.queues = [Queue.Queue(queue_size) for _ in range(workers)]
+        self.put_timeout = put_timeout
+        self.clock = clock
+        self.threads = []
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("naoutil.dispatch.EventDispatcher")
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.max_depth = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.errors = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.max_run = 0.0
+
+    def start(self):
+        '''
+        Start the worker threads unless they are already running
+        '''
+        with self.lock:
+            if self.threads:
+                return self
+            for i, q in enumerate(self.queues):
+                t = threading.Thread(target=self._work, args=(q,), name='EventDispatcher-{}'.format(i))
+                t.daemon = True
+                t.start()
+                self.threads.append(t)
+        return self
+
+    def stop(self, timeout=None):
+        '''
+        Stop the workers once they have handled the events already queued
+        '''
+        with self.lock:
+            threads = self.threads
+            self.threads = []
+        for q in self.queues[0:len(threads)]:
+            q.put(_STOP)
+        current = threading.current_thread()
+        for t in threads:
+            # a callback may stop the dispatcher, e.g. by disconnecting
+            if not t is current:
+                t.join(timeout)
+
+    def worker_index(self, key):
+        return zlib.crc32(str(key)) % len(self.queues)
+
+    def dispatch(self, key, callback, *args):
+        '''
+        Queue callback(*args) to run on the worker for key. Returns False if the
+        event was dropped because the worker's queue stayed full.
+        '''
+        self.start()
+        q = self.queues[self.worker_index(key)]
+        try:
+            q.put((self.clock(), key, callback, args), True, self.put_timeout)
+        except Queue.Full:
+            with self.lock:
+                self.dropped += 1
+            self.logger.warning("Dropped event {}, dispatch queue is full".format(key))
+            return False
+        depth = q.qsize()
+        with self.lock:
+            self.max_depth = max(self.max_depth, depth)
+        return True
+
+    def _work(self, q):
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            queued, key, callback, args = item
+            started = self.clock()
+            failed = False
+            try:
+                callback(*args)
+            except Exception:
+                failed = True
+                self.logger.exception("Error handling event {}".format(key))
+            finished = self.clock()
+            self._record(started - queued, finished - started, failed)
+
+    def _record(self, wait, run, failed):
+        with self.lock:
+            self.dispatched += 1
+            if failed:
+                self.errors += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.total_run += run
+            self.max_run = max(self.max_run, run)
+
+    def metrics(self, reset=False):
+        '''
+        Return DispatchMetrics for the events handled so far, optionally starting
+        the counts again
+        '''
+        with self.lock:
+            n = self.dispatched
+            result = DispatchMetrics(depths=[q.qsize() for q in self.queues],
+                                     max_depth=self.max_depth,
+                                     dispatched=n,
+                                     dropped=self.dropped,
+                                     errors=self.errors,
+                                     mean_wait=self.total_wait / n if n else 0.0,
+                                     max_wait=self.max_wait,
+                                     mean_run=self.total_run / n if n else 0.0,
+                                     max_run=self.max_run)
+            if reset:
+                self._reset_counters()
+        return result
+
+
+class _Window(object):
+    def __init__(self, last):
+        self.last = last
+        self.pending = None
+        self.timer = None
+
+
+class Coalescer(object):
+    '''
+    Collapses bursts of events for a key. The first event is forwarded at once, any more
+    which arrive within the key's window are replaced by the latest one, which is
+    forwarded when the window closes unless it's the same as the last forwarded. Keys
+    without a window are always forwarded.
+    '''
+
+    def __init__(self, forward, windows=None, timer=threading.Timer):
+        super(Coalescer, self).__init__()
+        self.forward = forward
+        self.windows = dict(windows or {})
+        self.timer = timer
+        self.open_windows = {}
+        self.coalesced = collections.Counter()
+        self.lock = threading.Lock()
+
+    def set_window(self, key, seconds):
+        '''
+        Set the window in seconds for key, None or 0 stops coalescing its events
+        '''
+        with self.lock:
+            if seconds:
+                self.windows[key] = seconds
+            else:
+                self.windows.pop(key, None)
+
+    def offer(self, key, *args):
+        with self.lock:
+            window = self.windows.get(key)
+            if window:
+                if key in self.open_windows:
+                    self.open_windows[key].pending = args
+                    self.coalesced[key] += 1
+                    return
+                self._open(key, args, window)
+        self.forward(key, *args)
+
+    def _open(self, key, args, window):
+        w = _Window(args)
+        w.timer = self.timer(window, self._close, (key, w))
+        w.timer.daemon = True
+        self.open_windows[key] = w
+        w.timer.start()
+
+    def _close(self, key, w):
+        with self.lock:
+            # the window may have been cancelled and another opened
+            if not self.open_windows.get(key) is w:
+                return
+            del self.open_windows[key]
+            if w.pending is None or w.pending == w.last:
+                return
+            # keep limiting the rate while the sensor is still chattering
+            window = self.windows.get(key)
+            if window:
+                self._open(key, w.pending, window)
+        self.forward(key, *w.pending)
+
+    def counts(self, reset=False):
+        '''
+        Return how many events have been coalesced for each key
+        '''
+        with self.lock:
+            result = dict(self.coalesced)
+            if reset:
+                self.coalesced.clear()
+        return result
+
+    def cancel(self, key=None):
+        '''
+        Discard the events held for key, or for all keys if None
+        '''
+        with self.lock:
+            keys = [key] if key is not None else self.open_windows.keys()
+            for k in keys:
+                w = self.open_windows.pop(k, None)
+                if w:
+                    w.timer.cancel()
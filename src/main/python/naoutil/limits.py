@@ -0,0 +1,44 @@
+'''
+Created on 18 Oct 2026
+
+Joint limits read from ALMotion once and kept in memory, so that angles can be
+clamped and speeds checked without asking the robot every time.
+'''
+
+import collections
+
+# angles in radians, velocity in radians per second, torque in Nm
+JointLimits = collections.namedtuple('JointLimits', ['min_angle', 'max_angle', 'max_velocity', 'max_torque'])
+
+
+def read_joint_limits(motion, chain="Body"):
+    '''
+    Return a dict of JointLimits keyed by joint name for all joints in chain
+    '''
+    names = motion.getJointNames(chain)
+    limits = motion.getLimits(chain)
+    # older versions of NAOqi do not report the maximum torque
+    return { n : JointLimits(*(list(l) + [None] * 4)[:4]) for (n, l) in zip(names, limits) }
+
+def clamp_angle(limits, joint_name, angle):
+    '''
+    Return angle (in radians) restricted to the joint's range. Angles of unknown joints are unchanged.
+    '''
+    try:
+        jl = limits[joint_name]
+    except KeyError:
+        return angle
+    return min(max(angle, jl.min_angle), jl.max_angle)
+
+def min_move_duration(limits, joint_name, distance):
+    '''
+    Return the shortest time in seconds in which the joint can move distance radians
+    at its maximum velocity or 0 if that is not known
+    '''
+    try:
+        max_velocity = limits[joint_name].max_velocity
+    except KeyError:
+        return 0.0
+    if not max_velocity:
+        return 0.0
+    return abs(distance) / max_velocity
@@ -11,29 +11,34 @@ events and micro events.
 from naoqi import ALProxy
 
 from naoutil.module import Module
-from naoutil.general import singleton
+from naoutil.dispatch import EventDispatcher, Coalescer
 
 
-@singleton
 class _SubscriberModule(Module):
     '''
     Singleton ALModule used to subscribe to events and micro-events.
     Not made to be used by a user.
     Prefer to call the module functions.
+    User callbacks are run by an EventDispatcher rather than on the thread
+    ALMemory calls us on.
     '''
-    def __init__(self):
+    def __init__(self, dispatcher=None):
         Module.__init__(self)
         self.memory = ALProxy('ALMemory')
+        self.dispatcher = dispatcher or EventDispatcher()
+        self.coalescer = Coalescer(self._dispatch_event)
         self.data_name_to_micro_event_cb = {}
         self.data_name_to_event_cb = {}
 
     # Event
-    def subscribe_to_event(self, data_name, callback):
+    def subscribe_to_event(self, data_name, callback, window=None):
         '''
         Relay the subscription to ALMemory.
         Keep trace of the (data_name, callback) association.
+        Events arriving within window seconds of each other are coalesced.
         '''
         self.data_name_to_event_cb[data_name] = callback
+        self.coalescer.set_window(data_name, window)
         self.memory.subscribeToEvent(data_name, self.module_name, 'event_cb')
 
     def unsubscribe_to_event(self, data_name):
@@ -44,6 +49,7 @@ class _SubscriberModule(Module):
         if data_name in self.data_name_to_event_cb:
             self.memory.unsubscribeToEvent(data_name, self.module_name)
             del self.data_name_to_event_cb[data_name]
+            self.coalescer.cancel(data_name)
 
     def event_cb(self, data_name, value, message):
         '''
@@ -51,7 +57,11 @@ class _SubscriberModule(Module):
         subscribed data_name.
         Relay to user callback.
         '''
-        self.data_name_to_event_cb[data_name](data_name, value, message)
+        self.coalescer.offer(data_name, value, message)
+
+    def _dispatch_event(self, data_name, value, message):
+        self.dispatcher.dispatch(data_name, self._call_event_cb,
+                                 self.data_name_to_event_cb, data_name, value, message)
 
     # Micro-event
     def subscribe_to_micro_event(self, data_name, callback, cb_message):
@@ -78,27 +88,83 @@ class _SubscriberModule(Module):
         subscribed data_name.
         Relay to user callback.
         '''
-        self.data_name_to_micro_event_cb[data_name](data_name, value, message)
+        self.dispatcher.dispatch(data_name, self._call_event_cb,
+                                 self.data_name_to_micro_event_cb, data_name, value, message)
+
+    def _call_event_cb(self, callbacks, data_name, value, message):
+        # look up the callback now as it may have been unsubscribed while queued
+        callback = callbacks.get(data_name)
+        if callback:
+            callback(data_name, value, message)
+
+    def stop_dispatch(self):
+        '''
+        Stop the workers running user callbacks once queued events are handled.
+        '''
+        self.coalescer.cancel()
+        self.dispatcher.stop()
+
+# the module is held here rather than by a weak reference so that it is not
+# collected and registered again while the broker it belongs to is still running
+_subscriber_module = None
+
+def subscriber_module():
+    '''
+    Return the module used to subscribe to events, creating it if necessary.
+    '''
+    global _subscriber_module
+    if _subscriber_module is None:
+        _subscriber_module = _SubscriberModule()
+    return _subscriber_module
+
+def set_subscriber_module(module):
+    '''
+    Use a module kept from an earlier connection to subscribe to events.
+    '''
+    global _subscriber_module
+    _subscriber_module = module
+
+def forget_subscriber_module(module=None):
+    '''
+    Stop using the module (or the current module if None), for example because
+    its broker is being shut down.
+    '''
+    global _subscriber_module
+    if module is None or module is _subscriber_module:
+        _subscriber_module = None
+
+def dispatch_metrics(reset=False):
+    '''
+    Return the DispatchMetrics for the events relayed so far.
+    '''
+    return subscriber_module().dispatcher.metrics(reset)
+
+def coalesced_counts(reset=False):
+    '''
+    Return how many events for each data name have been coalesced.
+    '''
+    return subscriber_module().coalescer.counts(reset)
 
-def subscribe_to_event(data_name, callback):
+def subscribe_to_event(data_name, callback, window=None):
     '''
-    Subscribe to an event.
+    Subscribe to an event. If window is given, bursts of events within
+    window seconds are collapsed to the latest value.
     '''
-    _SubscriberModule().subscribe_to_event(data_name, callback)
+    subscriber_module().subscribe_to_event(data_name, callback, window)
 subscribeToEvent = subscribe_to_event
 
 def unsubscribe_to_event(data_name):
     '''
     Unsubscribe to an event.
     '''
-    _SubscriberModule().unsubscribe_to_event(data_name)
+    subscriber_module().unsubscribe_to_event(data_name)
 unsubscribeToEvent = unsubscribe_to_event
 
 def subscribe_to_micro_event(data_name, callback, cb_message=''):
     '''
     Subscribe to a micro-event.
     '''
-    _SubscriberModule().subscribe_to_micro_event(data_name, callback,
+    subscriber_module().subscribe_to_micro_event(data_name, callback,
                                                  cb_message)
 subscribeToMicroEvent = subscribe_to_micro_event
 
@@ -106,5 +172,5 @@ def unsubscribe_to_micro_event(data_name):
     '''
     Unsubscribe to an event.
     '''
-    _SubscriberModule().unsubscribe_to_micro_event(data_name)
+    subscriber_module().unsubscribe_to_micro_event(data_name)
 unsubscribeToMicroEvent = unsubscribe_to_micro_event
@@ -7,13 +7,18 @@ Code used to abstract away some of the details of the NAOqi environment
 so that clients do not need to pass around proxies and objects holding
 loggers. Instead code just passes around NaoEnvironment instances
 '''
+import collections
 import inspect
 import os
 import logging
+import Queue
+import threading
+import time
 
 from naoqi import ALProxy
 
 import i18n
+from limits import read_joint_limits
 
 SOURCE_DIR = "src"
 RESOURCE_DIR = "resources"
@@ -52,6 +57,15 @@ PROXY_SHORT_NAMES = { 'audioDevice' : 'ALAudioDevice',
                       'videoRecorder' : 'ALVideoRecorder',
                       'visionRecognition' : 'ALVisionRecognition' }
 
+# proxies which prewarm() creates unless given others, by short name
+DEFAULT_PREWARM_PROXIES = ['motion', 'memory', 'tts', 'speechRecognition', 'robotPosture', 'alife']
+
+# most proxies which prewarm() will create at the same time
+PREWARM_THREADS = 6
+
+# result of creating a proxy in prewarm(), error is None if the proxy was created
+ProxyTiming = collections.namedtuple('ProxyTiming', ['name', 'seconds', 'error'])
+
 '''
 Hold information about the NAO environment and provide abstraction for logging
 '''
@@ -64,6 +78,9 @@ class NaoEnvironment(object):
         self.data_path = None
         self.proxyAddr = ipaddr
         self.proxyPort = port
+        self.joint_limits_table = None
+        self.prewarm_report = {}
+        self.proxy_lock = threading.Lock()
         self.logger = logging.getLogger("naoutil.naoenv.NaoEnvironment")
         # construct the set of proxies, ensuring that we use only valid long names
         self.proxies = { }
@@ -162,6 +179,13 @@ class NaoEnvironment(object):
         # property file was not found
         return defaultValue
 
+    # return a dict of JointLimits for all joints keyed by joint name. The limits are read
+    # from the robot the first time this is called and then kept
+    def joint_limits(self):
+        if self.joint_limits_table is None:
+            self.joint_limits_table = read_joint_limits(self.motion)
+        return self.joint_limits_table
+
     # simulate having properties for all proxies without having to manually create each one
     def __getattr__(self, name):
         if name in PROXY_SHORT_NAMES or name in PROXY_SHORT_NAMES.values():
@@ -180,7 +204,51 @@ class NaoEnvironment(object):
 
     # invoke ALProxy to store the proxy we need
     def add_proxy(self, longName):
-        self.proxies[longName] = self.create_proxy(longName)
+        proxy = self.create_proxy(longName)
+        with self.proxy_lock:
+            # keep the first if another thread got there before us
+            return self.proxies.setdefault(longName, proxy)
+
+    # create the named proxies (short or long names) on several threads at once so that they
+    # are ready before they are needed. Returns a dict of ProxyTiming keyed by long name
+    # which is also kept in prewarm_report
+    def prewarm(self, names=DEFAULT_PREWARM_PROXIES, max_threads=PREWARM_THREADS):
+        todo = Queue.Queue()
+        for n in names:
+            longName = PROXY_SHORT_NAMES.get(n, n)
+            if not longName in self.proxies:
+                todo.put(longName)
+        report = {}
+
+        def worker():
+            while True:
+                try:
+                    longName = todo.get_nowait()
+                except Queue.Empty:
+                    return
+                start = time.time()
+                error = None
+                try:
+                    self.add_proxy(longName)
+                except Exception as e:
+                    error = e
+                report[longName] = ProxyTiming(longName, time.time() - start, error)
+
+        threads = [threading.Thread(target=worker, name='prewarm-{}'.format(i))
+                   for i in range(min(max_threads, todo.qsize()))]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+
+        for timing in report.itervalues():
+            if timing.error:
+                self.logger.warning('Unable to create proxy {}: {}'.format(timing.name, timing.error))
+            else:
+                self.logger.debug('Created proxy {} in {:.3f}s'.format(timing.name, timing.seconds))
+        self.prewarm_report.update(report)
+        return report
 
     # invoke ALProxy to create the proxy we need
     def create_proxy(self, longName):
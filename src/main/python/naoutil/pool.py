@@ -0,0 +1,112 @@
+'''
+Created on 18 Oct 2026
+
+Keep the broker, proxies and event subscriber module for a robot after disconnecting,
+so that reconnecting to the same robot doesn't have to create them all again.
+'''
+
+import logging
+import threading
+
+from naoutil import broker
+from naoutil import memory
+import naoutil.naoenv as naoenv
+
+DEFAULT_BROKER_NAME = 'NaoRecorder'
+
+
+class Connection(object):
+    '''
+    A broker with the environment and event subscriber module which use it
+    '''
+
+    def __init__(self, key, broker_, env, subscriber):
+        super(Connection, self).__init__()
+        self.key = key
+        self.broker = broker_
+        self.env = env
+        # strong reference so the module stays registered for as long as the broker
+        self.subscriber = subscriber
+
+    def is_healthy(self):
+        '''
+        True if the robot still answers through this connection
+        '''
+        try:
+            self.env.memory.ping()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        memory.forget_subscriber_module(self.subscriber)
+        self.subscriber.stop_dispatch()
+        try:
+            self.broker.shutdown()
+        except Exception:
+            pass
+
+
+def make_connection(host, port, broker_name=DEFAULT_BROKER_NAME):
+    '''
+    Create a new broker connected to the robot at host and port and the objects that use it
+    '''
+    broker_ = broker.Broker(broker_name, nao_id=host, nao_port=port)
+    env = naoenv.make_environment(None)
+    # create the proxies we use now rather than on first use
+    env.prewarm()
+    return Connection((host, port), broker_, env, memory.subscriber_module())
+
+
+class ConnectionPool(object):
+    '''
+    Holds released connections keyed by (host, port). Only one connection can be in use at
+    a time as NAOqi finds the subscriber module by name, so acquiring a connection to one
+    robot closes those kept for others.
+    '''
+
+    def __init__(self, factory=make_connection):
+        super(ConnectionPool, self).__init__()
+        self.factory = factory
+        self.idle = {}
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger("naoutil.pool.ConnectionPool")
+
+    def acquire(self, host, port):
+        '''
+        Return a connection to the robot, reusing the one released for the same host and
+        port if it is still healthy
+        '''
+        key = (host, port)
+        with self.lock:
+            connection = self.idle.pop(key, None)
+            others = self.idle.values()
+            self.idle.clear()
+        for c in others:
+            c.close()
+
+        if connection:
+            if connection.is_healthy():
+                self.logger.debug("Reusing connection to {}:{}".format(host, port))
+                memory.set_subscriber_module(connection.subscriber)
+                return connection
+            self.logger.info("Connection to {}:{} no longer works, reconnecting".format(host, port))
+            connection.close()
+        return self.factory(host, port)
+
+    def release(self, connection):
+        '''
+        Keep a connection which is no longer in use so that it can be acquired again
+        '''
+        with self.lock:
+            previous = self.idle.get(connection.key)
+            self.idle[connection.key] = connection
+        if previous and previous is not connection:
+            previous.close()
+
+    def close_all(self):
+        with self.lock:
+            connections = self.idle.values()
+            self.idle.clear()
+        for c in connections:
+            c.close()
@@ -0,0 +1,152 @@
+'''
+Created on 18 Oct 2026
+
+Continuous motion capture. A JointSampler polls the joint angles at a fixed rate
+and stores them in a JointSampleBuffer so that an animation can be recorded by
+moving the relaxed robot rather than by adding keyframes one at a time.
+'''
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+MIN_CAPTURE_RATE = 10
+MAX_CAPTURE_RATE = 100
+DEFAULT_CAPTURE_RATE = 50
+
+# how much motion we keep before the oldest samples are overwritten
+DEFAULT_CAPTURE_SECONDS = 120
+
+capture_logger = logging.getLogger("recorder.capture")
+
+
+class JointSampleBuffer(object):
+    '''
+    Fixed size ring buffer of timestamped joint angle samples. All storage is
+    allocated up front so that adding a sample never allocates memory. When the
+    buffer is full the oldest samples are overwritten.
+    '''
+
+    def __init__(self, num_joints, capacity):
+        super(JointSampleBuffer, self).__init__()
+        if capacity < 1:
+            raise ValueError("Capacity must be at least 1, got {}".format(capacity))
+        self.num_joints = num_joints
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.angles = np.zeros((capacity, num_joints), dtype=np.float64)
+        self.next_index = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def is_full(self):
+        return self.count == self.capacity
+
+    def append(self, timestamp, angles):
+        with self.lock:
+            i = self.next_index
+            self.timestamps[i] = timestamp
+            self.angles[i] = angles
+            self.next_index = (i + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count = self.count + 1
+
+    def clear(self):
+        with self.lock:
+            self.next_index = 0
+            self.count = 0
+
+    def latest(self):
+        '''
+        Return a tuple (timestamp, angles) for the most recent sample or None if empty
+        '''
+        with self.lock:
+            if not self.count:
+                return None
+            i = (self.next_index - 1) % self.capacity
+            return (self.timestamps[i], self.angles[i].copy())
+
+    def samples(self):
+        '''
+        Return a tuple (timestamps, angles) containing copies of the buffered samples
+        in the order in which they were captured. angles has one row per sample and
+        one column per joint.
+        '''
+        with self.lock:
+            if self.count < self.capacity:
+                return (self.timestamps[:self.count].copy(),
+                        self.angles[:self.count].copy())
+            # buffer has wrapped, oldest sample is the one we'll overwrite next
+            order = np.roll(np.arange(self.capacity), -self.next_index)
+            return (self.timestamps[order], self.angles[order])
+
+
+class JointSampler(object):
+    '''
+    Background thread which calls read_angles at a fixed rate and appends the
+    result to a JointSampleBuffer.
+    '''
+
+    def __init__(self, read_angles, sample_buffer, rate=DEFAULT_CAPTURE_RATE, clock=time.time):
+        super(JointSampler, self).__init__()
+        if rate < MIN_CAPTURE_RATE or rate > MAX_CAPTURE_RATE:
+            raise ValueError("Capture rate must be between {} and {} Hz, got {}"
+                             .format(MIN_CAPTURE_RATE, MAX_CAPTURE_RATE, rate))
+        self.read_angles = read_angles
+        self.buffer = sample_buffer
+        self.rate = rate
+        self.clock = clock
+        self.overruns = 0
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    def start(self):
+        if self.is_running():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="JointSampler")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def sample(self):
+        '''
+        Take a single sample. The timestamp is the midpoint of the read so that
+        the latency of the call to the robot is split evenly.
+        '''
+        t0 = self.clock()
+        angles = self.read_angles()
+        t1 = self.clock()
+        self.buffer.append((t0 + t1) / 2.0, angles)
+
+    def _run(self):
+        period = 1.0 / self.rate
+        next_time = self.clock()
+        while not self.stop_event.is_set():
+            try:
+                self.sample()
+            except RuntimeError as e:
+                capture_logger.error("Stopping capture, failed to read joint angles: {}".format(e))
+                return
+
+            next_time = next_time + period
+            delay = next_time - self.clock()
+            if delay > 0:
+                self.stop_event.wait(delay)
+            else:
+                # we've fallen behind, carry on from now rather than sampling in a burst
+                self.overruns = self.overruns + 1
+                next_time = self.clock()
@@ -10,15 +10,27 @@ import locale
 import os
 import inspect
 
-import naoutil.naoenv as naoenv
+import numpy as np
+
 from naoutil.general import find_class
-from naoutil import broker
+from naoutil import pool
 from naoutil import memory
 from naoutil import i18n
 import fluentnao.nao as nao
-
-from mathutil import FLOAT_CMP_ACCURACY, feq
+from fluentnao.timeline import timeline_from_data, timeline_from_script
+from fluentnao.core.naoscript import ScriptError
+from translators.ir import KeyframeIR, render_all
+from naoutil.limits import min_move_duration
+
+from mathutil import FLOAT_CMP_ACCURACY, feq, round_half_away
+from topology import JOINT_NAMES, JOINT_INDICES, JOINT_CHAINS, JOINT_SUB_CHAINS, \
+    JOINT_CHAIN_BODY, JOINT_CHAIN_HEAD, JOINT_CHAIN_LEFT_ARM, JOINT_CHAIN_LEFT_LEG, \
+    JOINT_CHAIN_RIGHT_ARM, JOINT_CHAIN_RIGHT_LEG, JOINT_BITS, CHAIN_MASKS, ALL_JOINTS_MASK, \
+    joint_mask, joint_names, mask_from_bools, masks_to_bools
 from debounce import Debounce
+from capture import JointSampleBuffer, JointSampler, DEFAULT_CAPTURE_RATE, DEFAULT_CAPTURE_SECONDS
+from keyframes import extract_keyframes, DEFAULT_KEYFRAME_TOLERANCE
+from document import Keyframe
 
 WORD_RECOGNITION_MIN_CONFIDENCE = 0.55
 
@@ -30,53 +42,20 @@ TRANSLATORS = { 'FluentNAO' : "translators.fluentnao.core.FluentNaoTranslator",
 DEFAULT_TRANSLATOR_NAME = 'FluentNAO'
 translator_instances = {}
 
-# joint names in same order as returned by ALMotion.getAngles('Body')
-JOINT_NAMES = ['HeadYaw', 'HeadPitch',
-               'LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll',
-               'LWristYaw', 'LHand',
-               'LHipYawPitch', 'LHipRoll', 'LHipPitch',
-               'LKneePitch', 'LAnklePitch', 'LAnkleRoll',
-               'RHipYawPitch', 'RHipRoll', 'RHipPitch',
-               'RKneePitch', 'RAnklePitch', 'RAnkleRoll',
-               'RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll',
-               'RWristYaw', 'RHand']
-
-JOINT_CHAIN_BODY = JOINT_NAMES
-
-JOINT_CHAIN_HEAD = ['HeadYaw', 'HeadPitch']
-
-JOINT_CHAIN_LEFT_ARM = ['LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll',
-               'LWristYaw', 'LHand']
-
-JOINT_CHAIN_LEFT_LEG = ['LHipYawPitch', 'LHipRoll', 'LHipPitch',
-               'LKneePitch', 'LAnklePitch', 'LAnkleRoll']
-
-JOINT_CHAIN_RIGHT_ARM = ['RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll',
-               'RWristYaw', 'RHand']
-
-JOINT_CHAIN_RIGHT_LEG = ['RHipYawPitch', 'RHipRoll', 'RHipPitch',
-               'RKneePitch', 'RAnklePitch', 'RAnkleRoll']
-
-JOINT_CHAINS = {'Head': JOINT_CHAIN_HEAD,
-                'Body': JOINT_CHAIN_BODY,
-                'LeftArm': JOINT_CHAIN_LEFT_ARM,
-                'RightArm': JOINT_CHAIN_RIGHT_ARM,
-                'LeftLeg': JOINT_CHAIN_LEFT_LEG,
-                'RightLeg': JOINT_CHAIN_RIGHT_LEG}
-
-JOINT_SUB_CHAINS = {'Head': [],
-                    'Body': ['Head', 'LeftArm', 'RightArm', 'LeftLeg', 'RightLeg'],
-                    'LeftArm': [],
-                    'RightArm': [],
-                    'LeftLeg': [],
-                    'RightLeg': []
-                    }
-
 SPEECH_RECOGNITION_KEY = "WordRecognized"
 
 TOUCH_SENSOR_KEYS = [ "HandLeftBackTouched", "HandRightBackTouched", "LeftBumperPressed",
                       "RightBumperPressed", "FrontTactilTouched", "RearTactilTouched" ]
 
+# seconds within which repeated events from a sensor are collapsed to the latest value
+# so that chattering sensors don't cause a stiffness change or keyframe for every event
+EVENT_COALESCE_WINDOWS = { "HandLeftBackTouched" : 0.1,
+                           "HandRightBackTouched" : 0.1,
+                           "LeftBumperPressed" : 0.1,
+                           "RightBumperPressed" : 0.1,
+                           "FrontTactilTouched" : 0.15,
+                           "RearTactilTouched" : 0.15 }
+
 JOINT_MOVE_AMOUNT = math.pi / 180.0
 
 core_logger = logging.getLogger("recorder.core")
@@ -166,7 +145,88 @@ def get_joints_for_chain(name):
         else:
             return None
 
+class JointVector(object):
+    '''
+    Angles for all joints held in a float64 array in JOINT_NAMES order. Supports the
+    read-only parts of the dict interface so it can be used anywhere a dict of joint
+    angles keyed by name is expected.
+    '''
+
+    def __init__(self, values=None):
+        super(JointVector, self).__init__()
+        if values is None:
+            self.array = np.zeros(len(JOINT_NAMES), dtype=np.float64)
+        else:
+            self.array = np.array(values, dtype=np.float64)
+            if self.array.shape != (len(JOINT_NAMES),):
+                raise ValueError("Expected {} joint values, got shape {}"
+                                 .format(len(JOINT_NAMES), self.array.shape))
+
+    @classmethod
+    def from_dict(cls, joints):
+        return cls([joints[n] for n in JOINT_NAMES])
+
+    def __getitem__(self, name):
+        return float(self.array[JOINT_INDICES[name]])
+
+    def __setitem__(self, name, value):
+        self.array[JOINT_INDICES[name]] = value
+
+    def __contains__(self, name):
+        return name in JOINT_INDICES
+
+    def __iter__(self):
+        return iter(JOINT_NAMES)
+
+    def __len__(self):
+        return len(JOINT_NAMES)
+
+    def __repr__(self):
+        return "JointVector({})".format(self.array.tolist())
+
+    def get(self, name, default=None):
+        if name in JOINT_INDICES:
+            return self[name]
+        return default
+
+    def keys(self):
+        return list(JOINT_NAMES)
+
+    def values(self):
+        return self.array.tolist()
+
+    def items(self):
+        return zip(JOINT_NAMES, self.array.tolist())
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def copy(self):
+        return JointVector(self.array)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def degrees(self, round_values=True):
+        '''
+        Return a new array containing the angles converted to degrees
+        '''
+        degrees = np.degrees(self.array)
+        if round_values:
+            return round_half_away(degrees)
+        return degrees
+
+    def changed(self, other, threshold=FLOAT_CMP_ACCURACY):
+        '''
+        Return a boolean array which is True for joints differing from other by at least threshold
+        '''
+        return ~(np.abs(self.array - other.array) < threshold)
+
+
 def joints_to_degrees(joints, round_values=True):
+    if isinstance(joints, JointVector):
+        return dict(zip(JOINT_NAMES, joints.degrees(round_values).tolist()))
+
     djoints = {}
     if round_values:
         for j, v in joints.iteritems():
@@ -177,21 +237,48 @@ def joints_to_degrees(joints, round_values=True):
     return djoints
 
 
+def joints_to_degree_list(joints, round_values=True):
+    '''
+    Return a list of the angles in degrees in JOINT_NAMES order. Joints missing from
+    a dict are given a value of NaN.
+    '''
+    if isinstance(joints, JointVector):
+        return joints.degrees(round_values).tolist()
+
+    nan = float('nan')
+    if round_values:
+        return [round(math.degrees(joints[n])) if n in joints else nan for n in JOINT_NAMES]
+    else:
+        return [math.degrees(joints[n]) if n in joints else nan for n in JOINT_NAMES]
+
+
 def joint_changes(oldangles, newangles, threshold=FLOAT_CMP_ACCURACY):
     """
     Return a set containing the names of joints that have changed.
     """
     changed_joints = set()
     if oldangles:
-        for k in newangles.keys():
-            j1 = oldangles[k]
-            j2 = newangles[k]
-            if not feq(j1, j2, threshold):
-                changed_joints.add(k)
+        if isinstance(oldangles, JointVector) and isinstance(newangles, JointVector):
+            changed = newangles.changed(oldangles, threshold)
+            changed_joints.update(JOINT_NAMES[i] for i in np.flatnonzero(changed))
+        else:
+            for k in newangles.keys():
+                j1 = oldangles[k]
+                j2 = newangles[k]
+                if not feq(j1, j2, threshold):
+                    changed_joints.add(k)
     else:
         changed_joints.update(newangles.keys())
     return changed_joints
 
+def joint_changes_mask(oldangles, newangles, threshold=FLOAT_CMP_ACCURACY):
+    """
+    Return the mask of the joints that have changed.
+    """
+    if oldangles and isinstance(oldangles, JointVector) and isinstance(newangles, JointVector):
+        return mask_from_bools(newangles.changed(oldangles, threshold))
+    return joint_mask(joint_changes(oldangles, newangles, threshold))
+
 
 class Robot(object):
     def __init__(self, status_display=None, code_display=None, on_disconnect=None, on_stiffness=None):
@@ -201,18 +288,24 @@ class Robot(object):
         self.on_disconnect = on_disconnect
         self.on_stiffness = on_stiffness
         self.broker = None
+        self.connection = None
+        # connections are kept after disconnecting so reconnecting is quick
+        self.connections = pool.ConnectionPool()
         self.nao = None
+        self.joint_limits = {}
         self._motors_on = False
         self.logger = logging.getLogger("recorder.core.Robot")
         self.last_keyframe_joints = None
         self.keyframe_duration = 1.0
+        self.capture_rate = DEFAULT_CAPTURE_RATE
+        self.capture_tolerance = DEFAULT_KEYFRAME_TOLERANCE
+        self.capture_buffer = None
+        self.sampler = None
         self.is_speech_recognition_enabled = True
         self.is_touch_sensors_enabled = True
         self.translator = get_translator(DEFAULT_TRANSLATOR_NAME)
 
-        self.joints = { }
-        for j in JOINT_NAMES:
-            self.joints[j] = 0
+        self.joints = JointVector()
 
         # using "now" instead of "nao" for better recognition
         self.vocabulary = {localized_text("cmd_left_arm_stiff"): self.left_arm_stiff,
@@ -257,15 +350,18 @@ class Robot(object):
         if self.is_speech_recognition_enabled:
             self.event_handlers.update(self._speech_handler_dict())
 
-        self.enabled_joints = set(JOINT_NAMES)
+        self.enabled_mask = ALL_JOINTS_MASK
         self.left_arm_debounce = Debounce(self.left_arm_relax, self.left_arm_stiff)
         self.right_arm_debounce = Debounce(self.right_arm_relax, self.right_arm_stiff)
 
     def connect(self, hostname, portnumber):
         try:
-            self.broker = broker.Broker('NaoRecorder', nao_id=hostname, nao_port=portnumber)
+            if self.is_connected():
+                self._release_connection()
+            self.connection = self.connections.acquire(hostname, portnumber)
+            self.broker = self.connection.broker
             if self.broker:
-                self.env = naoenv.make_environment(None)
+                self.env = self.connection.env
                 self.saved_alife_state = None
                 try:
                     self.saved_alife_state = self.env.alife.getState()
@@ -275,6 +371,12 @@ class Robot(object):
                     pass
 
                 self.nao = nao.Nao(self.env, None)
+                try:
+                    # read once now so that speed checks don't need to ask the robot
+                    self.joint_limits = self.env.joint_limits()
+                except RuntimeError as e:
+                    core_logger.warning("Unable to read joint limits: {}".format(e))
+                    self.joint_limits = {}
                 try:
                     if self.event_handlers and self.vocabulary:
                         self.env.speechRecognition.setVocabulary(self.vocabulary.keys(), False)
@@ -291,24 +393,42 @@ class Robot(object):
 
     def disconnect(self):
         if self.is_connected():
-            self.do_unsubscribe()
-            self.broker.shutdown()
+            self._release_connection()
             if self.on_disconnect:
                 self.on_disconnect()
-            if self.saved_alife_state:
-                try:
-                    self.env.alife.setState(self.saved_alife_state)
-                except RuntimeError:
-                    pass
+
+    def _release_connection(self):
+        self.stop_capture()
+        self.do_unsubscribe()
+        self.logger.debug("Event dispatch: {}, coalesced: {}".format(memory.dispatch_metrics(reset=True),
+                                                                    memory.coalesced_counts(reset=True)))
+        if self.saved_alife_state:
+            try:
+                self.env.alife.setState(self.saved_alife_state)
+            except RuntimeError:
+                pass
+        self.connections.release(self.connection)
+        self.connection = None
+        self.broker = None
+
+    def shutdown(self):
+        '''
+        Disconnect and close all the connections kept for reconnecting
+        '''
+        self.disconnect()
+        self.connections.close_all()
 
     def do_subscribe(self):
         if self.event_handlers:
             for (key, value) in self.event_handlers.iteritems():
                 if key == SPEECH_RECOGNITION_KEY:
                     if self.is_speech_recognition_enabled:
-                        memory.subscribe_to_event(key, value)
+                        self._subscribe(key, value)
                 else:
-                    memory.subscribe_to_event(key, value)
+                    self._subscribe(key, value)
+
+    def _subscribe(self, key, handler):
+        memory.subscribe_to_event(key, handler, EVENT_COALESCE_WINDOWS.get(key))
 
     def do_unsubscribe(self):
         if self.event_handlers:
@@ -318,7 +438,7 @@ class Robot(object):
     def _enable_handlers(self, handlers):
         for key, handler in handlers.iteritems():
             try:
-                memory.subscribe_to_event(key, handler)
+                self._subscribe(key, handler)
             except RuntimeError as e:
                 print localized_text('error_set_callback').format(e)
         self.event_handlers.update(handlers)
@@ -422,9 +542,7 @@ class Robot(object):
             self.safe_say(localized_text('status_motors_disabled'))
 
     def get_joint_angles(self, use_radians=True):
-        angles = self.env.motion.getAngles("Body", True)
-        for n, v in zip(JOINT_NAMES, angles):
-            self.joints[n] = v
+        self.joints.array[:] = self.env.motion.getAngles("Body", True)
 
         if use_radians:
             return self.joints
@@ -466,14 +584,36 @@ class Robot(object):
     def is_code_runnable(self):
         return self.translator.is_runnable
 
-    def change_translator(self, dest_name, existing_code):
+    def is_code_playable(self):
+        '''
+        True if the code can be played as one continuous animation
+        '''
+        return self.translator.is_runnable or self.translator.is_reversible
+
+    def change_translator(self, dest_name, existing_code, keyframes=None):
+        '''
+        Switch to a new translator and return existing_code converted to the new language.
+        If keyframes is given it must be the keyframes from which existing_code was generated
+        and the code is regenerated from them instead of parsing existing_code. If existing_code
+        can't be parsed the translator is not changed and existing_code is returned.
+        '''
         print "change translator = {}".format(dest_name)
 
         new_translator = get_translator(dest_name)
 
         converted_code = ''
-        if self.can_convert_code():
-            command_data = self.translator.parse(existing_code)
+        if keyframes is not None:
+            converted_code = new_translator.append('', new_translator.join(
+                self.render_keyframes(keyframes, new_translator)))
+        elif self.can_convert_code():
+            try:
+                command_data = self.translator.parse(existing_code)
+            except (ScriptError, ValueError) as e:
+                # keep the current translator and code so that the user can fix it
+                if self.status_display:
+                    self.status_display.add_status(localized_text('error_convert_code').format(
+                        src=self.translator.name, dest=dest_name, error=e))
+                return existing_code
             converted_code = self.translate_data_to_code(new_translator, command_data)
             print "Changed existing code:\n{}\n to\n{}".format(existing_code, converted_code)
 
@@ -502,29 +642,172 @@ class Robot(object):
         return self.joints[name]
 
     def keyframe(self):
+        keyframe = self.make_keyframe()
+        if keyframe:
+            return self.render_keyframes([keyframe])[0]
+        elif self.is_connected():
+            return ''
+        else:
+            return None
+
+    def make_keyframe(self):
+        '''
+        Read the current joint angles and return a Keyframe recording the joints which have
+        changed since the last keyframe or None if nothing has changed
+        '''
         if self.is_connected():
             # get angles
-            angles = self.get_joint_angles()
+            angles = self.get_joint_angles().copy()
             # print angles
 
-            changed_joints = joint_changes(self.last_keyframe_joints, angles, JOINT_MOVE_AMOUNT)
-            # print "changed joints = {}".format(changed_joints)
-            # print "enabled joints = {}".format(self.enabled_joints)
-            changed_enabled_joints = self.enabled_joints & changed_joints
-            print "enabled changed joints = {}".format(changed_enabled_joints)
-
-            # translating
-            command_str = self.translator.generate(angles, changed_enabled_joints, self.enabled_joints,
-                                                   is_blocking=True, fluentnao="nao.",
-                                                   keyframe_duration=self.keyframe_duration,
-                                                   keyframe_comment=localized_text('keyframe_comment'))
-            self.last_keyframe_joints = angles.copy()
-            return command_str
-        else:
-            return None
+            changed_joints = joint_changes_mask(self.last_keyframe_joints, angles, JOINT_MOVE_AMOUNT)
+            changed_enabled_joints = self.enabled_mask & changed_joints
+            print "enabled changed joints = {}".format(joint_names(changed_enabled_joints))
 
-    def append_command(self, code, new_command):
-        return self.translator.append(code, new_command)
+            if changed_enabled_joints and self.last_keyframe_joints is not None:
+                self.check_keyframe_speed(self.last_keyframe_joints, angles, changed_enabled_joints,
+                                          self.keyframe_duration)
+            self.last_keyframe_joints = angles
+            if changed_enabled_joints:
+                return Keyframe(angles, changed_enabled_joints, self.enabled_mask,
+                                True, self.keyframe_duration)
+        return None
+
+    def min_keyframe_duration(self, old_joints, new_joints, joints_mask):
+        '''
+        Return a tuple (seconds, joint name) giving the shortest time in which the joints in
+        joints_mask can move from old_joints to new_joints and the joint which takes longest
+        '''
+        result = (0.0, None)
+        for n in joint_names(joints_mask):
+            duration = min_move_duration(self.joint_limits, n, new_joints[n] - old_joints[n])
+            if duration > result[0]:
+                result = (duration, n)
+        return result
+
+    def check_keyframe_speed(self, old_joints, new_joints, joints_mask, duration):
+        '''
+        Warn if a keyframe asks joints to move faster than they can
+        '''
+        (min_duration, joint) = self.min_keyframe_duration(old_joints, new_joints, joints_mask)
+        if duration < min_duration:
+            msg = localized_text('status_keyframe_too_fast').format(duration=duration, joint=joint,
+                                                                    min_duration=min_duration)
+            core_logger.warning(msg)
+            if self.status_display:
+                self.status_display.add_status(msg)
+            return False
+        return True
+
+    def render_keyframes(self, keyframes, translator=None):
+        '''
+        Return the code generated for each of keyframes by translator, or by the current
+        translator if none is given
+        '''
+        if translator is None:
+            translator = self.translator
+        if not keyframes:
+            return []
+        kwargs = { 'fluentnao' : "nao.",
+                   'keyframe_comment' : localized_text('keyframe_comment') }
+        blocking = set(kf.is_blocking for kf in keyframes)
+        if hasattr(translator, 'generate_many') and len(blocking) == 1:
+            frames = np.array([kf.joints.array for kf in keyframes])
+            changed_masks = masks_to_bools([joint_mask(kf.changed) for kf in keyframes])
+            enabled_masks = masks_to_bools([joint_mask(kf.enabled) for kf in keyframes])
+            return translator.generate_many(frames, changed_masks, enabled_masks,
+                                            keyframe_durations=[kf.duration for kf in keyframes],
+                                            is_blocking=blocking.pop(), **kwargs)
+        return [translator.generate(kf.joints, kf.changed, kf.enabled, is_blocking=kf.is_blocking,
+                                    keyframe_duration=kf.duration, **kwargs)
+                for kf in keyframes]
+
+    def start_capture(self, rate=None):
+        '''
+        Start continuously sampling the joint angles in the background
+        '''
+        if self.is_connected() and not self.is_capturing():
+            if not rate:
+                rate = self.capture_rate
+            self.capture_buffer = JointSampleBuffer(len(JOINT_NAMES), int(rate * DEFAULT_CAPTURE_SECONDS))
+            self.sampler = JointSampler(self._read_body_angles, self.capture_buffer, rate)
+            self.sampler.start()
+            return True
+        return False
+
+    def stop_capture(self):
+        '''
+        Stop sampling and return a tuple (timestamps, angles) holding the captured samples
+        '''
+        if self.sampler:
+            self.sampler.stop()
+            self.sampler = None
+        if self.capture_buffer:
+            return self.capture_buffer.samples()
+        return None
+
+    def captured_keyframes(self, samples, tolerance=None):
+        '''
+        Reduce captured samples to the smallest set of keyframes that reproduces the motion
+        within tolerance and return the list of commands generated for those keyframes.
+        '''
+        return [c for c in self.render_keyframes(self.make_captured_keyframes(samples, tolerance)) if c]
+
+    def make_captured_keyframes(self, samples, tolerance=None):
+        '''
+        Reduce captured samples to the smallest set of keyframes that reproduces the motion
+        within tolerance and return them as a list of Keyframe.
+        The duration of each keyframe is the time that elapsed between it and the previous one.
+        '''
+        keyframes = []
+        if not samples:
+            return keyframes
+        (timestamps, angles) = samples
+        if not len(timestamps):
+            return keyframes
+        if tolerance is None:
+            tolerance = self.capture_tolerance
+
+        enabled_joints = self.enabled_mask
+        indices = extract_keyframes(timestamps, angles, tolerance)
+        previous_time = timestamps[indices[0]]
+        for i in indices:
+            joints = JointVector(angles[i])
+            changed_joints = joint_changes_mask(self.last_keyframe_joints, joints, JOINT_MOVE_AMOUNT)
+            changed_enabled_joints = enabled_joints & changed_joints
+            if not changed_enabled_joints:
+                continue
+
+            if self.last_keyframe_joints is None or i == indices[0]:
+                # time taken to get to the start of the captured motion is not known
+                duration = self.keyframe_duration
+            else:
+                duration = round(timestamps[i] - previous_time, 2)
+
+            keyframes.append(Keyframe(joints, changed_enabled_joints, enabled_joints, True, duration))
+            self.last_keyframe_joints = joints
+            previous_time = timestamps[i]
+        return keyframes
+
+    def render_keyframes_in(self, keyframes, translators):
+        '''
+        Return a dict keyed by translator name of the code generated for each of keyframes by
+        each of translators. Each keyframe is only analysed once however many translators there are.
+        '''
+        result = { t.name : [] for t in translators }
+        for kf in keyframes:
+            ir = KeyframeIR(kf.joints, kf.changed, kf.enabled,
+                            is_blocking=kf.is_blocking, keyframe_duration=kf.duration,
+                            fluentnao="nao.", keyframe_comment=localized_text('keyframe_comment'))
+            for (name, code) in render_all(ir, translators).iteritems():
+                result[name].append(code)
+        return result
+
+    def is_capturing(self):
+        return self.sampler is not None and self.sampler.is_running()
+
+    def _read_body_angles(self):
+        return self.env.motion.getAngles("Body", True)
 
     def update_joints(self):
         '''
@@ -540,12 +823,47 @@ class Robot(object):
             # of the hand sensors (which can get triggered by the motors)
             self.do_unsubscribe()
             try:
-                self.nao.naoscript.run_script(code, '\n')
+                self._run_script(code)
             finally:
                 self.do_subscribe()
 
+    def _run_script(self, code):
+        # joints may have been moved by hand since the last script
+        self.nao.forget_angles()
+        # each keyframe of the script is sent as one move, direct commands such
+        # as opening a hand are not buffered as nothing calls go() after them
+        self.nao.set_buffered(True)
+        try:
+            self.nao.naoscript.run_script(code, '\n')
+        finally:
+            self.nao.set_buffered(False)
+
+    def play_code(self, code):
+        '''
+        Play all the keyframes in code as a single motion, so there are no pauses between keyframes
+        '''
+        if self.is_connected():
+            self.do_unsubscribe()
+            try:
+                self.nao.forget_angles()
+                if self.translator.is_runnable:
+                    timeline = timeline_from_script(self.nao, code)
+                else:
+                    timeline = timeline_from_data(self.translator.parse(code))
+                if timeline is None:
+                    # the script does more than move so it's run in order
+                    self._run_script(code)
+                else:
+                    self.nao.play(timeline).go()
+            finally:
+                self.do_subscribe()
+
+    @property
+    def enabled_joints(self):
+        return set(joint_names(self.enabled_mask))
+
     def set_enabled_joints(self, enabled_joints):
-        self.enabled_joints = set(enabled_joints.copy())
+        self.enabled_mask = joint_mask(enabled_joints)
         print "Enabled joints are now {}".format(self.enabled_joints)
 
     def set_chains_with_motors_on(self, stiff_chain_names):
@@ -646,9 +964,9 @@ class Robot(object):
             self._add_keyframe()
 
     def _add_keyframe(self):
-        code = self.keyframe()
-        if code:
-            self.code_display.append_code(code)
+        keyframe = self.make_keyframe()
+        if keyframe:
+            self.code_display.append_keyframes([keyframe])
 
     def _nao_exit(self):
         self.safe_say(localized_text('goodbye'))
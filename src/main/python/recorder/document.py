@@ -0,0 +1,77 @@
+'''
+Created on 18 Oct 2026
+
+The code being recorded. Keyframes are only ever added to the end of the program so
+the document keeps them as a list of generated fragments and only builds the full
+text when it is needed, rather than rebuilding the whole program for every keyframe.
+
+Alongside the text the document keeps the keyframes themselves, so that when the whole
+program was recorded it can be regenerated in any language without parsing the text.
+'''
+
+import collections
+
+# joints is a JointVector of angles in radians, changed and enabled are joint masks
+Keyframe = collections.namedtuple('Keyframe', ['joints', 'changed', 'enabled', 'is_blocking', 'duration'])
+
+
+class KeyframeDocument(object):
+    '''
+    Append-only document made up of base_code, the code which existed before
+    recording started, followed by the code generated for each keyframe.
+    '''
+
+    def __init__(self, translator, base_code=''):
+        super(KeyframeDocument, self).__init__()
+        self.reset(translator, base_code)
+
+    def reset(self, translator, base_code='', keyframes=None):
+        '''
+        Start again from base_code, discarding all appended fragments. If base_code was
+        generated from a list of keyframes passing them allows it to be regenerated later.
+        '''
+        self.translator = translator
+        self.base_code = base_code
+        self.fragments = []
+        self.cached_text = base_code
+        if keyframes is not None:
+            self.keyframes = list(keyframes)
+        elif base_code.strip():
+            # we don't know where the existing code came from
+            self.keyframes = None
+        else:
+            self.keyframes = []
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def append(self, fragment, keyframe=None):
+        '''
+        Add the code for a keyframe. If keyframe is not given the document can no longer
+        be regenerated from its keyframes.
+        '''
+        if keyframe is None:
+            if fragment:
+                self.keyframes = None
+        elif self.keyframes is not None:
+            # keep keyframes which produced no code, they might in another language
+            self.keyframes.append(keyframe)
+        if fragment:
+            self.fragments.append(fragment)
+            self.cached_text = None
+
+    def has_keyframes(self):
+        '''
+        Return True if the whole document was generated from keyframes we still have
+        '''
+        return self.keyframes is not None
+
+    def text(self):
+        '''
+        Return the full text of the program, rendering it if anything has been appended since
+        the last call
+        '''
+        if self.cached_text is None:
+            self.cached_text = self.translator.append(self.base_code,
+                                                      self.translator.join(self.fragments))
+        return self.cached_text
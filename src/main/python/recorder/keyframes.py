@@ -0,0 +1,61 @@
+'''
+Created on 18 Oct 2026
+
+Reduce a densely sampled joint trajectory to the keyframes needed to reproduce it.
+'''
+
+import math
+
+import numpy as np
+
+# maximum angular error allowed between the captured motion and the motion produced
+# by interpolating between the extracted keyframes
+DEFAULT_KEYFRAME_TOLERANCE = math.radians(2.0)
+
+
+def extract_keyframes(timestamps, angles, tolerance=DEFAULT_KEYFRAME_TOLERANCE):
+    '''
+    Return the indices of the samples to use as keyframes.
+
+    Uses Ramer-Douglas-Peucker over the full joint vector. A segment is split at the
+    sample which deviates most from the linear interpolation (in time) between the
+    segment's end points, until every joint of every sample lies within tolerance
+    of the interpolated motion. tolerance can be a single value in radians or one
+    value per joint. The first and last samples are always keyframes.
+    '''
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    num_samples = len(timestamps)
+    if num_samples < 3:
+        return range(num_samples)
+
+    # dividing by the tolerance means a scaled error above 1 is out of tolerance for any joint
+    inverse_tolerance = 1.0 / np.broadcast_to(np.asarray(tolerance, dtype=np.float64),
+                                              (angles.shape[1],))
+
+    keep = np.zeros(num_samples, dtype=bool)
+    keep[0] = keep[-1] = True
+    segments = [(0, num_samples - 1)]
+    while segments:
+        (first, last) = segments.pop()
+        if last - first < 2:
+            continue
+
+        duration = timestamps[last] - timestamps[first]
+        if duration > 0:
+            fraction = (timestamps[first + 1:last] - timestamps[first]) / duration
+        else:
+            # no usable time information, fall back on sample position
+            fraction = np.arange(1, last - first, dtype=np.float64) / (last - first)
+
+        interpolated = angles[first] + np.outer(fraction, angles[last] - angles[first])
+        error = np.abs(angles[first + 1:last] - interpolated) * inverse_tolerance
+        worst_per_sample = error.max(axis=1)
+        worst = worst_per_sample.argmax()
+        if worst_per_sample[worst] > 1.0:
+            split = first + 1 + worst
+            keep[split] = True
+            segments.append((split, last))
+            segments.append((first, split))
+
+    return np.flatnonzero(keep).tolist()
@@ -21,6 +21,7 @@ from kivy.uix.popup import Popup
 from kivy.properties import ObjectProperty
 from kivy.properties import ListProperty
 from kivy.core.window import Window
+from kivy.clock import Clock
 from kivy.lang import Builder
 
 from pygments import lexers
@@ -28,6 +29,8 @@ from pygame import font as fonts
 import codecs, os
 import logging
 
+from document import KeyframeDocument
+from naoutil import avahi
 from core import Robot, localized_text, get_joints_for_chain, is_joint, get_sub_chains, is_joint_chain, get_joint_chain_names, get_translator_names
 
 WORD_RECOGNITION_MIN_CONFIDENCE = 0.6
@@ -210,6 +213,8 @@ class NaoRecorderApp(App):
         self.robot = Robot(status_display=self, code_display=self,
                            on_disconnect=self._on_disconnect,
                            on_stiffness=self._on_chain_stiffness_from_robot)
+        self.document = KeyframeDocument(self.robot.translator)
+        self.is_code_refresh_pending = False
 
         # building Kivy Interface
         b = BoxLayout(orientation='vertical')
@@ -254,6 +259,11 @@ class NaoRecorderApp(App):
         btn_run_script.bind(on_press=self._on_run_script)
         self.btn_run_script = btn_run_script
 
+        # play recorded keyframes as one motion
+        btn_play = Button(text=localized_text('play_animation'))
+        btn_play.bind(on_press=self._on_play)
+        self.btn_play = btn_play
+
         # root actions menu
         robot_actions = Spinner(
             text=localized_text('action_menu_title'),
@@ -266,6 +276,7 @@ class NaoRecorderApp(App):
         menu.add_widget(btn_touch_sensors)
         menu.add_widget(btn_motors)
         menu.add_widget(btn_run_script)
+        menu.add_widget(btn_play)
         menu.add_widget(robot_actions)
         b.add_widget(menu)
 
@@ -278,6 +289,11 @@ class NaoRecorderApp(App):
         btn_add_keyframe.bind(on_press=self._on_add_keyframe)
         controls.add_widget(btn_add_keyframe)
 
+        # continuously record joint angles while the robot is moved by hand
+        btn_capture = ToggleButton(text=localized_text('capture_motion'), state='normal')
+        btn_capture.bind(on_press=self._on_capture)
+        controls.add_widget(btn_capture)
+
         # set read joint angles to enable animation to start from known position
         btn_update_joints = Button(text=localized_text('read_joints'))
         btn_update_joints.bind(on_press=self._on_read_joints)
@@ -310,6 +326,7 @@ class NaoRecorderApp(App):
             font_name='data/fonts/DroidSansMono.ttf', font_size=12,
             text="nao.say('hi')")
         code_status.add_widget(self.codeinput)
+        self.document.reset(self.robot.translator, self.codeinput.text)
 
         # status window
         self.status = TextInput(text="", readonly=True, multiline=True, size_hint=(1.0, 0.25))
@@ -327,20 +344,35 @@ class NaoRecorderApp(App):
         return b
 
     def on_start(self):
+        # look for robots while the user is entering where to connect
+        avahi.start_discovery()
         self.show_connection_dialog(None)
 
     def on_stop(self):
-        self.robot.disconnect()
+        self.robot.shutdown()
 
     def get_code(self):
+        if self.is_code_refresh_pending:
+            self._refresh_code()
         return self.codeinput.text
 
     def get_selected_code(self):
         return self.codeinput.selection_text
 
-    def set_code(self, code):
+    def set_code(self, code, keyframes=None):
+        self.is_code_refresh_pending = False
+        self.document.reset(self.robot.translator, code, keyframes)
         self.codeinput.text = code
 
+    def get_code_keyframes(self):
+        '''
+        Return the keyframes the code was generated from or None if the code contains
+        anything other than recorded keyframes
+        '''
+        if self.document.has_keyframes() and self.get_code() == self.document.text():
+            return self.document.keyframes
+        return None
+
     def set_lexer(self, new_lexer):
         # code = self.get_code()
         # self.codeinput = CodeInput(
@@ -350,8 +382,25 @@ class NaoRecorderApp(App):
         # self.codeinput.lexer = lexer
         pass
 
-    def append_code(self, code):
-        self.set_code(self.robot.append_command(self.get_code(), code))
+    def append_keyframes(self, keyframes):
+        for (code, keyframe) in zip(self.robot.render_keyframes(keyframes), keyframes):
+            self.append_code(code, keyframe)
+
+    def append_code(self, code, keyframe=None):
+        if self.document.translator is not self.robot.translator or \
+                (not self.is_code_refresh_pending and self.codeinput.text != self.document.text()):
+            # code has been edited since we last displayed it so carry on from the edited code
+            self.document.reset(self.robot.translator, self.get_code())
+        self.document.append(code, keyframe)
+        # many keyframes can be added before the next frame, only display the result once
+        if not self.is_code_refresh_pending:
+            self.is_code_refresh_pending = True
+            Clock.schedule_once(self._refresh_code)
+
+    def _refresh_code(self, dt=None):
+        if self.is_code_refresh_pending:
+            self.is_code_refresh_pending = False
+            self.codeinput.text = self.document.text()
 
     def add_status(self, text):
         self.status.text = self.status.text + "\n" + text
@@ -395,23 +444,23 @@ class NaoRecorderApp(App):
         elif value == localized_text('file_save_as'):
             if not hasattr(self, 'saveas_dialog'):
                 self.saveas_dialog = SaveDialog()
-            self.saveas_dialog.text = self.codeinput.text
+            self.saveas_dialog.text = self.get_code()
             self.saveas_dialog.open()
         elif value == localized_text('file_save'):
             if self.files[0]:
                 _file = codecs.open(self.files[0], 'w', encoding='utf8')
-                _file.write(self.codeinput.text)
+                _file.write(self.get_code())
                 _file.close()
         elif value == localized_text('file_close'):
             if self.files[0]:
-                self.codeinput.text = ''
+                self.set_code('')
                 Window.title = 'untitled'
 
     def on_files(self, instance, values):
         if not values[0]:
             return
         _file = codecs.open(values[0], 'r', encoding='utf8')
-        self.codeinput.text = _file.read()
+        self.set_code(_file.read())
         _file.close()
 
     def _on_disconnect(self):
@@ -428,7 +477,7 @@ class NaoRecorderApp(App):
             self.is_translator_cancel = False
         else:
             if self.get_code().strip():
-                if self.robot.can_convert_code():
+                if self.robot.can_convert_code() or self.get_code_keyframes() is not None:
                     msg = localized_text('translator_change_warning').format(src=self.robot.get_translator_name(), dest=translator_name)
                 else:
                     msg = localized_text('translator_change_no_convert').format(src=self.robot.get_translator_name(), dest=translator_name)
@@ -447,7 +496,13 @@ class NaoRecorderApp(App):
     def _on_translator_confirm_dismissed(self, popup):
         if popup.is_ok:
             self.is_translator_cancel = False
-            self.set_code(self.robot.change_translator(popup.translator_name, self.get_code()))
+            keyframes = self.get_code_keyframes()
+            self.set_code(self.robot.change_translator(popup.translator_name, self.get_code(), keyframes),
+                          keyframes)
+            if self.robot.get_translator_name() != popup.translator_name:
+                # the code couldn't be converted so the translator wasn't changed
+                self.is_translator_cancel = True
+                self.active_translator.text = self.robot.get_translator_name()
             self._update_run_button()
             self.set_lexer(self.robot.translator.lexer)
         else:
@@ -458,6 +513,7 @@ class NaoRecorderApp(App):
     def _update_run_button(self):
         # this won't have any effect on versions of kivy before 1.8.0
         self.btn_run_script.disabled = not self.robot.is_code_runnable()
+        self.btn_play.disabled = not self.robot.is_code_playable()
 
     def _on_motors(self, motor_button):
         if motor_button.state == 'down':
@@ -477,10 +533,28 @@ class NaoRecorderApp(App):
             if self.get_selected_code():
                 self.codeinput.select_text(0, 0)
 
+    def _on_play(self, instance):
+        if self.robot.is_connected() and self.robot.is_code_playable():
+            self.robot.play_code(self.get_code())
+
     def _on_add_keyframe(self, dummy1=None, dummy2=None, dummy=None):
-        code = self.robot.keyframe()
-        if code:
-            self.append_code(code)
+        keyframe = self.robot.make_keyframe()
+        if keyframe:
+            self.append_keyframes([keyframe])
+
+    def _on_capture(self, capture_button):
+        if capture_button.state == 'down':
+            if self.robot.start_capture():
+                self.add_status(localized_text('status_capture_started').format(self.robot.capture_rate))
+            else:
+                capture_button.state = 'normal'
+        else:
+            samples = self.robot.stop_capture()
+            if samples:
+                (timestamps, _) = samples
+                keyframes = self.robot.make_captured_keyframes(samples)
+                self.add_status(localized_text('status_capture_stopped').format(len(timestamps), len(keyframes)))
+                self.append_keyframes(keyframes)
 
     def _on_read_joints(self, instance):
         self.robot.update_joints()
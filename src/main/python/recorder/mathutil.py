@@ -6,6 +6,8 @@ Created on Jan 19, 2013
 
 import math
 
+import numpy as np
+
 FLOAT_CMP_ACCURACY = 0.00000001
 
 def feq(a, b, epsilon=FLOAT_CMP_ACCURACY):
@@ -13,3 +15,10 @@ def feq(a, b, epsilon=FLOAT_CMP_ACCURACY):
 
 def is_zero(a, epsilon=FLOAT_CMP_ACCURACY):
     return abs(a) < epsilon
+
+def round_half_away(values):
+    '''
+    Vectorised equivalent of the builtin round() which rounds halves away from zero,
+    unlike numpy.round() which rounds them to the nearest even value
+    '''
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
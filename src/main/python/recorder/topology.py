@@ -0,0 +1,119 @@
+'''
+Created on 18 Oct 2026
+
+Names of NAO's joints and the chains they belong to. Sets of joints are represented
+as integer bit masks, with bit i set if JOINT_NAMES[i] is in the set, so that the
+set operations needed for every keyframe are single integer operations.
+'''
+
+import numpy as np
+
+# joint names in same order as returned by ALMotion.getAngles('Body')
+JOINT_NAMES = ['HeadYaw', 'HeadPitch',
+               'LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll',
+               'LWristYaw', 'LHand',
+               'LHipYawPitch', 'LHipRoll', 'LHipPitch',
+               'LKneePitch', 'LAnklePitch', 'LAnkleRoll',
+               'RHipYawPitch', 'RHipRoll', 'RHipPitch',
+               'RKneePitch', 'RAnklePitch', 'RAnkleRoll',
+               'RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll',
+               'RWristYaw', 'RHand']
+
+JOINT_INDICES = { n : i for i, n in enumerate(JOINT_NAMES) }
+
+JOINT_CHAIN_BODY = JOINT_NAMES
+
+JOINT_CHAIN_HEAD = ['HeadYaw', 'HeadPitch']
+
+JOINT_CHAIN_LEFT_ARM = ['LShoulderPitch', 'LShoulderRoll', 'LElbowYaw', 'LElbowRoll',
+               'LWristYaw', 'LHand']
+
+JOINT_CHAIN_LEFT_LEG = ['LHipYawPitch', 'LHipRoll', 'LHipPitch',
+               'LKneePitch', 'LAnklePitch', 'LAnkleRoll']
+
+JOINT_CHAIN_RIGHT_ARM = ['RShoulderPitch', 'RShoulderRoll', 'RElbowYaw', 'RElbowRoll',
+               'RWristYaw', 'RHand']
+
+JOINT_CHAIN_RIGHT_LEG = ['RHipYawPitch', 'RHipRoll', 'RHipPitch',
+               'RKneePitch', 'RAnklePitch', 'RAnkleRoll']
+
+JOINT_CHAINS = {'Head': JOINT_CHAIN_HEAD,
+                'Body': JOINT_CHAIN_BODY,
+                'LeftArm': JOINT_CHAIN_LEFT_ARM,
+                'RightArm': JOINT_CHAIN_RIGHT_ARM,
+                'LeftLeg': JOINT_CHAIN_LEFT_LEG,
+                'RightLeg': JOINT_CHAIN_RIGHT_LEG}
+
+JOINT_SUB_CHAINS = {'Head': [],
+                    'Body': ['Head', 'LeftArm', 'RightArm', 'LeftLeg', 'RightLeg'],
+                    'LeftArm': [],
+                    'RightArm': [],
+                    'LeftLeg': [],
+                    'RightLeg': []
+                    }
+
+JOINT_BITS = { n : 1 << i for i, n in enumerate(JOINT_NAMES) }
+
+ALL_JOINTS_MASK = (1 << len(JOINT_NAMES)) - 1
+
+NO_JOINTS_MASK = 0
+
+
+def joint_mask(joints):
+    '''
+    Return the mask for joints, which can be a collection of joint names or already a mask
+    '''
+    if isinstance(joints, (int, long)):
+        return joints
+    mask = 0
+    for n in joints:
+        mask |= JOINT_BITS[n]
+    return mask
+
+def joint_names(mask):
+    '''
+    Return the names of the joints in mask in JOINT_NAMES order
+    '''
+    return [n for n in JOINT_NAMES if mask & JOINT_BITS[n]]
+
+def joint_count(mask):
+    return bin(mask).count('1')
+
+def mask_union(*masks):
+    result = 0
+    for m in masks:
+        result |= m
+    return result
+
+def mask_intersection(*masks):
+    result = ALL_JOINTS_MASK
+    for m in masks:
+        result &= m
+    return result
+
+def is_subset(mask, other_mask):
+    '''
+    Return True if every joint in mask is also in other_mask
+    '''
+    return mask & other_mask == mask
+
+def mask_from_bools(flags):
+    '''
+    Return the mask for a sequence of booleans in JOINT_NAMES order
+    '''
+    mask = 0
+    for i in np.flatnonzero(flags):
+        mask |= 1 << int(i)
+    return mask
+
+def masks_to_bools(masks):
+    '''
+    Convert a mask or a sequence of masks to a boolean array with one column per joint.
+    Anything else is assumed to already be booleans in JOINT_NAMES order.
+    '''
+    masks = np.asarray(masks)
+    if masks.dtype.kind in 'iu' and masks.ndim <= 1:
+        return (masks[..., np.newaxis] >> np.arange(len(JOINT_NAMES))) & 1 == 1
+    return masks.astype(bool)
+
+CHAIN_MASKS = { name : joint_mask(joints) for (name, joints) in JOINT_CHAINS.iteritems() }
@@ -6,9 +6,13 @@ Created on 6 Jul 2013
 
 import collections
 
+import numpy as np
 from pygments import lexers
 
-from recorder.core import joints_to_degrees
+from recorder.core import joints_to_degree_list, JOINT_INDICES
+from recorder.topology import JOINT_NAMES, joint_mask, masks_to_bools
+from recorder.mathutil import round_half_away
+from translators.ir import KeyframeIR
 
 DEFAULT_FRAME_TIME = 0
 
@@ -703,21 +707,265 @@ COMMANDS = [
            ]
 
 
+def index_commands_by_joint(commands):
+    '''
+    Map each joint name to the positions in commands of the CommandSpecs that use it.
+    Positions are in ascending order so that command priority is preserved.
+    '''
+    index = collections.defaultdict(list)
+    for i, cs in enumerate(commands):
+        for j in cs.joints:
+            index[j].append(i)
+    return dict(index)
+
+COMMANDS_BY_JOINT = index_commands_by_joint(COMMANDS)
+
+# positions in COMMANDS of the specs using each joint, indexed by the joint's bit
+COMMANDS_BY_JOINT_BIT = [COMMANDS_BY_JOINT.get(n, []) for n in JOINT_NAMES]
+
+
+def candidate_positions(changed_joint_names):
+    '''
+    Return the positions in COMMANDS of the specs that use at least one of the changed joints,
+    which can be given as joint names or a joint mask
+    '''
+    mask = joint_mask(changed_joint_names)
+    positions = set()
+    bit = 0
+    while mask:
+        if mask & 1:
+            positions.update(COMMANDS_BY_JOINT_BIT[bit])
+        mask >>= 1
+        bit += 1
+    return sorted(positions)
+
+def candidate_commands(changed_joint_names):
+    '''
+    Return the CommandSpecs that use at least one of the changed joints, in priority order
+    '''
+    return [COMMANDS[i] for i in candidate_positions(changed_joint_names)]
+
+
+# kinds of compiled constraint
+CONSTRAINT_IN_RANGE = 0
+CONSTRAINT_AT_MOST = 1
+CONSTRAINT_ABOVE = 2
+CONSTRAINT_MAX_DIFFERENCE = 3
+
+# number of values a plan can refer to which are not joint angles
+MAX_PLAN_OUTPUTS = 8
+
+class CommandPlan(object):
+    '''
+    A CommandSpec compiled into a flat form that can be evaluated without copying
+    the joint data.
+
+    Plans work on a list of values in which the first len(JOINT_INDICES) entries are
+    the joint angles in degrees in JOINT_NAMES order, followed by slots for the
+    outputs of the transforms. All names are resolved to positions in this list when
+    the plan is compiled. Each transform is a tuple (input slot, output slot, scale,
+    offset), with an input slot of None for constants. Each constraint is a tuple
+    (kind, limit, reference slot, slots).
+    '''
+
+    def __init__(self, spec):
+        super(CommandPlan, self).__init__()
+        self.spec = spec
+        slots = dict(JOINT_INDICES)
+
+        def slot_for(name):
+            try:
+                return slots[name]
+            except KeyError:
+                raise ValueError("Command {}.{} refers to unknown value {}".format(spec.prefix, spec.command, name))
+
+        self.transforms = []
+        for t in spec.transforms:
+            if t.operator is linear:
+                transform = [slot_for(t.inval), None, t.parameters[0], t.parameters[1]]
+            elif t.operator is constant:
+                transform = [None, None, None, t.parameters[0]]
+            else:
+                raise ValueError("Command {}.{} has unsupported transform {}"
+                                 .format(spec.prefix, spec.command, t.operator.__name__))
+            # a later reference to this name refers to the output of the transform
+            if not t.outval in slots or slots[t.outval] < len(JOINT_INDICES):
+                slots[t.outval] = len(JOINT_INDICES) + len(self.transforms)
+            transform[1] = slots[t.outval]
+            self.transforms.append(tuple(transform))
+
+        if len(self.transforms) > MAX_PLAN_OUTPUTS:
+            raise ValueError("Command {}.{} has more than {} transforms"
+                             .format(spec.prefix, spec.command, MAX_PLAN_OUTPUTS))
+
+        self.constraints = []
+        for c in spec.constraints:
+            if c.predicate is in_range:
+                constraint = (CONSTRAINT_IN_RANGE, (c.parameters[0], c.parameters[1]), None,
+                              [slot_for(n) for n in c.parameters[2:]])
+            elif c.predicate is less_than:
+                constraint = (CONSTRAINT_AT_MOST, c.parameters[0], None,
+                              [slot_for(n) for n in c.parameters[1:]])
+            elif c.predicate is greater_than:
+                constraint = (CONSTRAINT_ABOVE, c.parameters[0], None,
+                              [slot_for(n) for n in c.parameters[1:]])
+            elif c.predicate is max_difference:
+                constraint = (CONSTRAINT_MAX_DIFFERENCE, c.parameters[0], slot_for(c.parameters[1]),
+                              [slot_for(n) for n in c.parameters[2:]])
+            else:
+                raise ValueError("Command {}.{} has unsupported constraint {}"
+                                 .format(spec.prefix, spec.command, c.predicate.__name__))
+            self.constraints.append(constraint)
+
+        self.parameters = [slot_for(p) for p in spec.parameters]
+        self.joint_positions = sorted(JOINT_INDICES[j] for j in spec.joints)
+        self.joint_mask = joint_mask(spec.joints)
+
+        # joints whose angles the plan reads, it can't be evaluated if any are missing
+        read_slots = [t[0] for t in self.transforms] + self.parameters
+        for (kind, limit, ref_slot, slots) in self.constraints:
+            read_slots.extend(slots + [ref_slot])
+        self.required_positions = sorted(set(s for s in read_slots
+                                             if s is not None and s < len(JOINT_INDICES)))
+        self.required_mask = joint_mask(JOINT_NAMES[p] for p in self.required_positions)
+
+    def evaluate(self, values):
+        '''
+        Apply the transforms, writing their outputs into values, and return whether
+        all the constraints pass
+        '''
+        for (in_slot, out_slot, scale, offset) in self.transforms:
+            if in_slot is None:
+                values[out_slot] = offset
+            else:
+                values[out_slot] = round(values[in_slot] * scale + offset)
+
+        for (kind, limit, ref_slot, slots) in self.constraints:
+            if kind == CONSTRAINT_IN_RANGE:
+                (minval, maxval) = limit
+                for s in slots:
+                    v = values[s]
+                    if (v < minval) or (v > maxval):
+                        return False
+            elif kind == CONSTRAINT_AT_MOST:
+                for s in slots:
+                    if values[s] > limit:
+                        return False
+            elif kind == CONSTRAINT_ABOVE:
+                for s in slots:
+                    if values[s] <= limit:
+                        return False
+            else:
+                first = values[ref_slot]
+                for s in slots:
+                    if abs(values[s] - first) > limit:
+                        return False
+        return True
+
+    def parameter_values(self, values):
+        return [values[s] for s in self.parameters]
+
+    def evaluate_many(self, degrees):
+        '''
+        Vectorised form of evaluate for an array of joint angles in degrees with one
+        row per frame. Returns a tuple (passes, parameters) where passes is a boolean
+        array with one entry per frame and parameters is a list with one list of
+        per-frame values for each of the spec's parameters.
+        '''
+        num_frames = degrees.shape[0]
+        outputs = {}
+
+        def column(slot):
+            if slot < len(JOINT_INDICES):
+                return degrees[:, slot]
+            return outputs[slot]
+
+        for (in_slot, out_slot, scale, offset) in self.transforms:
+            if in_slot is None:
+                outputs[out_slot] = offset
+            else:
+                outputs[out_slot] = round_half_away(column(in_slot) * scale + offset)
+
+        # a constraint fails under exactly the same conditions as in evaluate
+        passes = np.ones(num_frames, dtype=bool)
+        for (kind, limit, ref_slot, slots) in self.constraints:
+            for s in slots:
+                v = column(s)
+                if kind == CONSTRAINT_IN_RANGE:
+                    (minval, maxval) = limit
+                    passes &= ~((v < minval) | (v > maxval))
+                elif kind == CONSTRAINT_AT_MOST:
+                    passes &= ~(v > limit)
+                elif kind == CONSTRAINT_ABOVE:
+                    passes &= ~(v <= limit)
+                else:
+                    passes &= ~(np.abs(v - column(ref_slot)) > limit)
+
+        parameters = []
+        for s in self.parameters:
+            v = column(s)
+            if isinstance(v, np.ndarray):
+                parameters.append(v.tolist())
+            else:
+                parameters.append([v] * num_frames)
+        return (passes, parameters)
+
+COMMAND_PLANS = [CommandPlan(cs) for cs in COMMANDS]
+
+# key under which the detected commands are stored in a KeyframeIR
+FLUENTNAO_COMMANDS_KEY = 'fluentnao.commands'
+
+
 class FluentNaoTranslator(object):
     def __init__(self):
         super(FluentNaoTranslator, self).__init__()
         self.name = 'FluentNAO'
-        self.is_reversible = False
+        self.is_reversible = True
         self.is_runnable = True
         self.lexer = lexers.PythonLexer()
 
+    def parse(self, code):
+        '''
+        Convert code to keyframes by running it against a dry run robot
+        '''
+        # imported here so that code can be generated without the NAOqi python modules
+        from fluentnao.dryrun import script_keyframes
+        return script_keyframes(code)
+
     def generate(self, joint_dict, changed_joint_names, enabled_joint_names, **kwargs):
-        commands = self.detect_command(joint_dict, changed_joint_names, enabled_joint_names)
-        command_str = self.commands_to_text(commands, is_blocking=kwargs['is_blocking'],
-                                            fluentnao=kwargs['fluentnao'],
-                                            keyframe_duration=kwargs['keyframe_duration'],
-                                            keyframe_comment=kwargs['keyframe_comment'])
-        return command_str
+        return self.render(KeyframeIR(joint_dict, changed_joint_names, enabled_joint_names, **kwargs))
+
+    def render(self, ir):
+        return self.commands_to_text(self.commands(ir), is_blocking=ir.is_blocking,
+                                     fluentnao=ir.fluentnao,
+                                     keyframe_duration=ir.duration,
+                                     keyframe_comment=ir.comment)
+
+    def commands(self, ir):
+        '''
+        Return the commands for a KeyframeIR, detecting them only if no translator has already done so
+        '''
+        return ir.memo(FLUENTNAO_COMMANDS_KEY,
+                       lambda: self.detect_command(ir.joints, ir.changed_mask, ir.enabled_mask))
+
+    def generate_many(self, frames, changed_masks, enabled_masks, keyframe_durations=None, **kwargs):
+        '''
+        Generate the code for many keyframes at once. frames is an array of joint
+        angles in radians with one row per keyframe and one column per joint in
+        JOINT_NAMES order. changed_masks and enabled_masks are boolean arrays of the
+        same shape or sequences of joint masks, enabled_masks can also be a single row
+        or joint mask used for every frame.
+        keyframe_durations optionally gives the duration of each keyframe, otherwise
+        keyframe_duration applies to all. Returns a list with the code for each frame.
+        '''
+        all_commands = self.detect_command_many(frames, changed_masks, enabled_masks)
+        if keyframe_durations is None:
+            keyframe_durations = [kwargs['keyframe_duration']] * len(all_commands)
+        return [self.commands_to_text(commands, is_blocking=kwargs['is_blocking'],
+                                      fluentnao=kwargs['fluentnao'],
+                                      keyframe_duration=duration,
+                                      keyframe_comment=kwargs['keyframe_comment'])
+                for (commands, duration) in zip(all_commands, keyframe_durations)]
 
     def commands_to_text(self, commands, is_blocking=False, fluentnao=None,
                          keyframe_duration=None, keyframe_comment=None):
@@ -772,50 +1020,86 @@ class FluentNaoTranslator(object):
         return combined_output
 
     def detect_command(self, joint_dict, changed_joint_names, enabled_joint_names):
-        joints_degrees = joints_to_degrees(joint_dict, True)
+        # joint angles followed by scratch space for the outputs of the plans
+        values = joints_to_degree_list(joint_dict, True) + [None] * MAX_PLAN_OUTPUTS
+        # joints missing from a partial keyframe are NaN, plans which read them are skipped
+        present_mask = joint_mask(JOINT_NAMES[i] for i in range(len(JOINT_INDICES)) if values[i] == values[i])
 
+        enabled_mask = joint_mask(enabled_joint_names)
         commands = []
-        joints_done = set()
+        joints_done = 0
         cur_prefix = None
 
-        for cs in COMMANDS:
-            # check whether any of the joints used by this command have changed
-            # we take the intersection of the command joints and the changed joints
-            if changed_joint_names & cs.joints:
-                # we can only produce commands that only depend on enabled joints
-                # ignore all other commands using joints marked as done
-                if cs.joints.issubset(enabled_joint_names) and not cs.joints.issubset(joints_done):
-                    cdata = joints_degrees.copy()
-                    self.do_transforms(cs, cdata)
-                    if self.constraints_pass(cs, cdata):
-                        joints_done = joints_done.union(cs.joints)
-                        commands.append(self.generate_command(cs, cur_prefix, cdata))
-                        cur_prefix = cs.prefix
+        # only commands using at least one of the changed joints are considered
+        for i in candidate_positions(changed_joint_names):
+            plan = COMMAND_PLANS[i]
+            cs = plan.spec
+            mask = plan.joint_mask
+            # we can only produce commands that only depend on enabled joints
+            # ignore all other commands using joints marked as done
+            if mask & enabled_mask == mask and mask & joints_done != mask \
+                    and plan.required_mask & present_mask == plan.required_mask:
+                if plan.evaluate(values):
+                    joints_done |= mask
+                    commands.append(self.generate_command(cs, cur_prefix, plan.parameter_values(values)))
+                    cur_prefix = cs.prefix
         return commands
 
-    def do_transforms(self, cs, cdata):
-        for t in cs.transforms:
-            if t.inval:
-                cdata[t.outval] = round(t.operator(cdata[t.inval], t.parameters))
-            else:
-                cdata[t.outval] = t.operator(t.parameters)
-
-    def constraints_pass(self, cs, cdata):
-        for c in cs.constraints:
-            if not c.predicate(cdata, c.parameters):
-                return False
-        return True
-
-    def generate_command(self, cs, cur_prefix, cdata):
+    def detect_command_many(self, frames, changed_masks, enabled_masks):
+        '''
+        Return the list of commands for each of many frames, see generate_many.
+        All transforms and constraints are evaluated for all frames at once, only the
+        choice of commands for each frame is done frame by frame.
+        '''
+        frames = np.asarray(frames, dtype=np.float64).reshape(-1, len(JOINT_INDICES))
+        num_frames = frames.shape[0]
+        degrees = round_half_away(np.degrees(frames))
+        changed = masks_to_bools(changed_masks).reshape(num_frames, len(JOINT_INDICES))
+        enabled = np.broadcast_to(masks_to_bools(enabled_masks), changed.shape)
+        present = ~np.isnan(degrees)
+
+        # eligible[i, f] is True if plan i applies to frame f
+        eligible = np.zeros((len(COMMAND_PLANS), num_frames), dtype=bool)
+        plan_parameters = [None] * len(COMMAND_PLANS)
+        for (i, plan) in enumerate(COMMAND_PLANS):
+            positions = plan.joint_positions
+            candidate = changed[:, positions].any(axis=1) & enabled[:, positions].all(axis=1) \
+                & present[:, plan.required_positions].all(axis=1)
+            if candidate.any():
+                (passes, plan_parameters[i]) = plan.evaluate_many(degrees)
+                eligible[i] = candidate & passes
+
+        all_commands = []
+        for f in range(num_frames):
+            commands = []
+            joints_done = 0
+            cur_prefix = None
+            for i in np.flatnonzero(eligible[:, f]):
+                plan = COMMAND_PLANS[i]
+                cs = plan.spec
+                if plan.joint_mask & joints_done != plan.joint_mask:
+                    joints_done |= plan.joint_mask
+                    parameter_values = [p[f] for p in plan_parameters[i]]
+                    commands.append(self.generate_command(cs, cur_prefix, parameter_values))
+                    cur_prefix = cs.prefix
+            all_commands.append(commands)
+        return all_commands
+
+    def generate_command(self, cs, cur_prefix, parameter_values):
         command_parameters = [DEFAULT_FRAME_TIME]
-        for p in cs.parameters:
-            command_parameters.append(cdata[p])
+        command_parameters.extend(parameter_values)
 
         if cur_prefix == cs.prefix:
             return (cs.command, command_parameters)
         else:
             return ("{}.{}".format(cs.prefix, cs.command), command_parameters)
 
+    def join(self, commands):
+        '''
+        Join several commands into one block of code that can be passed to append
+        '''
+        return "\r\n\r\n".join(c for c in commands if c)
+
     def append(self, code, new_command):
         if new_command:
             if code:
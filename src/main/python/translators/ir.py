@@ -0,0 +1,68 @@
+'''
+Created on 18 Oct 2026
+
+Intermediate representation of a keyframe shared by the translators. Work which more
+than one translator needs, such as deciding which FluentNAO commands describe the
+keyframe, is done the first time it is asked for and reused by the others, so that a
+keyframe can be rendered in several languages without repeating it.
+'''
+
+from recorder.topology import joint_mask, joint_names
+
+
+class KeyframeIR(object):
+    '''
+    A keyframe as passed to a translator's generate method together with the results
+    computed from it so far. The changed and enabled joints can be given as collections
+    of joint names or as joint masks.
+    '''
+
+    def __init__(self, joint_dict, changed_joint_names, enabled_joint_names,
+                 is_blocking=False, keyframe_duration=None, **kwargs):
+        super(KeyframeIR, self).__init__()
+        self.joints = joint_dict
+        self.changed_mask = joint_mask(changed_joint_names)
+        self.enabled_mask = joint_mask(enabled_joint_names)
+        self.is_blocking = is_blocking
+        self.duration = keyframe_duration
+        self.fluentnao = kwargs.get('fluentnao')
+        self.comment = kwargs.get('keyframe_comment')
+        self.results = {}
+
+    def memo(self, key, factory):
+        '''
+        Return the value stored under key, calling factory to compute it the first time
+        '''
+        try:
+            return self.results[key]
+        except KeyError:
+            value = factory()
+            self.results[key] = value
+            return value
+
+    @property
+    def changed(self):
+        return self.memo('changed', lambda: joint_names(self.changed_mask))
+
+    @property
+    def enabled(self):
+        return self.memo('enabled', lambda: joint_names(self.enabled_mask))
+
+    def changes(self):
+        '''
+        Return a dict of the angles of the changed joints
+        '''
+        return self.memo('changes', lambda: { j : self.joints[j] for j in self.changed })
+
+    def state(self):
+        '''
+        Return a dict of the angles of the enabled joints
+        '''
+        return self.memo('state', lambda: { j : self.joints[j] for j in self.enabled })
+
+
+def render_all(ir, translators):
+    '''
+    Render the keyframe with each translator and return a dict of the code keyed by translator name
+    '''
+    return { t.name : t.render(ir) for t in translators }
@@ -8,6 +8,8 @@ import json
 
 from pygments import lexers
 
+from translators.ir import KeyframeIR
+
 class JsonTranslator(object):
     def __init__(self):
         super(JsonTranslator, self).__init__()
@@ -18,27 +20,28 @@ class JsonTranslator(object):
 
     def generate(self, joint_dict, changed_joint_names, enabled_joint_names,
                  is_blocking=False, keyframe_duration=None, **kwargs):
+        return self.render(KeyframeIR(joint_dict, changed_joint_names, enabled_joint_names,
+                                      is_blocking=is_blocking, keyframe_duration=keyframe_duration))
 
-        if changed_joint_names:
-            changed_joints = {}
-            for j in changed_joint_names:
-                changed_joints[j] = joint_dict[j]
-
-            state = {}
-            for j in enabled_joint_names:
-                state[j] = joint_dict[j]
+    def render(self, ir):
+        if ir.changed_mask:
+            json_map = { "is_blocking" : ir.is_blocking,
+                         "state" : ir.state(),
+                         "changes" : ir.changes() }
 
-            json_map = { "is_blocking" : is_blocking,
-                         "state" : state,
-                         "changes" : changed_joints }
-
-            if keyframe_duration:
-                json_map["duration"] = keyframe_duration
+            if ir.duration:
+                json_map["duration"] = ir.duration
 
             return json.dumps(json_map)
         else:
             return ''
 
+    def join(self, commands):
+        '''
+        Join several commands into one block of code that can be passed to append
+        '''
+        return ",\r\n".join(c for c in commands if c)
+
     def append(self, code, new_command):
         if code.strip():
             if new_command:
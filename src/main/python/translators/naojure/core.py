@@ -7,6 +7,7 @@ Created on 9 Feb 2014
 from pygments import lexers
 
 from translators.fluentnao.core import FluentNaoTranslator
+from translators.ir import KeyframeIR
 
 COMMAND_TO_KEYWORD = {'forward' : ':forward',
                       'right' : ':right',
@@ -73,13 +74,24 @@ class NaojureTranslator(object):
         self.lexer = lexers.ClojureLexer()
 
     def generate(self, joint_dict, changed_joint_names, enabled_joint_names, **kwargs):
+        return self.render(KeyframeIR(joint_dict, changed_joint_names, enabled_joint_names, **kwargs))
+
+    def render(self, ir):
         # reuse FluentNAO code to decide on commands
-        commands = self.fluentnao.detect_command(joint_dict, changed_joint_names, enabled_joint_names)
+        commands = self.fluentnao.commands(ir)
 
         # generate commands in naojure format
-        command_str = self.commands_to_text(commands,
-                                            keyframe_duration=kwargs['keyframe_duration'])
-        return command_str
+        return self.commands_to_text(commands, keyframe_duration=ir.duration)
+
+    def generate_many(self, frames, changed_masks, enabled_masks, keyframe_durations=None, **kwargs):
+        '''
+        Generate the code for many keyframes at once, see FluentNaoTranslator.generate_many
+        '''
+        all_commands = self.fluentnao.detect_command_many(frames, changed_masks, enabled_masks)
+        if keyframe_durations is None:
+            keyframe_durations = [kwargs['keyframe_duration']] * len(all_commands)
+        return [self.commands_to_text(commands, keyframe_duration=duration)
+                for (commands, duration) in zip(all_commands, keyframe_durations)]
 
     def commands_to_text(self, commands, keyframe_duration=None):
         """
@@ -119,6 +131,12 @@ class NaojureTranslator(object):
 
         return output
 
+    def join(self, commands):
+        '''
+        Join several commands into one block of code that can be passed to append
+        '''
+        return "\r\n".join(c for c in commands if c)
+
     def append(self, code, new_command):
         if new_command:
             if code:
@@ -0,0 +1,54 @@
+'''
+Created on 18 Oct 2026
+
+Measure the per-keyframe cost of FluentNaoTranslator.detect_command when only one
+joint has changed compared to when all joints have changed, and the cost when many
+keyframes are translated at once with detect_command_many.
+
+Run with: python -m recorder_tests.benchmark_detect_command [iterations]
+'''
+
+import sys
+import timeit
+
+import numpy as np
+
+from recorder.core import JOINT_NAMES
+from translators.fluentnao.core import FluentNaoTranslator, COMMANDS, candidate_commands
+from testutil import make_joint_dict, POSITION_ARMS_UP, POSITION_ARMS_DOWN
+
+DEFAULT_ITERATIONS = 10000
+BATCH_SIZE = 1000
+
+def time_per_keyframe(translator, joint_dict, changed_joints, enabled_joints, iterations):
+    timer = timeit.Timer(lambda: translator.detect_command(joint_dict, changed_joints, enabled_joints))
+    return min(timer.repeat(repeat=3, number=iterations)) / iterations
+
+def main(iterations):
+    translator = FluentNaoTranslator()
+    joint_dict = make_joint_dict(POSITION_ARMS_UP)
+    enabled_joints = set(JOINT_NAMES)
+    cases = [('one joint (HeadYaw)', set(['HeadYaw'])),
+             ('one joint (LShoulderPitch)', set(['LShoulderPitch'])),
+             ('all joints', set(JOINT_NAMES))]
+
+    print "{} command specs, {} iterations per case".format(len(COMMANDS), iterations)
+    for (name, changed_joints) in cases:
+        seconds = time_per_keyframe(translator, joint_dict, changed_joints, enabled_joints, iterations)
+        print "{name:28} {candidates:3} candidates {usec:8.1f} usec/keyframe".format(
+            name=name, candidates=len(candidate_commands(changed_joints)), usec=seconds * 1e6)
+
+    frames = np.array([POSITION_ARMS_UP, POSITION_ARMS_DOWN] * (BATCH_SIZE / 2))
+    masks = np.ones(frames.shape, dtype=bool)
+    timer = timeit.Timer(lambda: translator.detect_command_many(frames, masks, True))
+    seconds = min(timer.repeat(repeat=3, number=max(1, iterations / BATCH_SIZE))) / max(1, iterations / BATCH_SIZE)
+    print "{name:28} {candidates:3} candidates {usec:8.1f} usec/keyframe".format(
+        name="all joints, batch of {}".format(BATCH_SIZE), candidates=len(COMMANDS),
+        usec=seconds * 1e6 / BATCH_SIZE)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main(DEFAULT_ITERATIONS)
@@ -0,0 +1,65 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from naoutil.avahi import NAODiscovery
+from naoutil import broker
+
+NAO = { 'robot_name' : 'bobot', 'host_name' : 'bobot.local', 'ip_address' : '10.0.0.5',
+        'naoqi_port' : 9559, 'local' : False, 'favorite' : False }
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingFinder(object):
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return [NAO]
+
+
+class TestNAODiscovery(unittest.TestCase):
+    def test_results_cached(self):
+        clock = FakeClock()
+        finder = CountingFinder()
+        discovery = NAODiscovery(ttl=60, finder=finder, clock=clock)
+        self.assertEqual([NAO], discovery.find_all_naos(5))
+        self.assertEqual([NAO], discovery.find_all_naos(5))
+        self.assertEqual(1, finder.count, "Fresh results should not browse again")
+
+        clock.now = 61
+        self.assertEqual([NAO], discovery.find_all_naos(5), "Expired results should be returned while browsing")
+        discovery.thread.join(5)
+        self.assertEqual(2, finder.count)
+        self.assertTrue(discovery.is_fresh())
+
+    def test_failed_browse(self):
+        def finder():
+            raise RuntimeError("no dbus")
+        discovery = NAODiscovery(finder=finder)
+        self.assertEqual([], discovery.find_all_naos(5))
+
+
+class TestResolve(unittest.TestCase):
+    def test_literal_ip(self):
+        self.assertTrue(broker._is_ip_address('192.168.1.10'))
+        self.assertTrue(broker._is_ip_address('::1'))
+        self.assertFalse(broker._is_ip_address('bobot.local'))
+        self.assertEqual(('192.168.1.10', 9559), broker._resolve_ip_port('192.168.1.10'))
+        self.assertEqual(('192.168.1.10', 9600), broker._resolve_ip_port('192.168.1.10', '9600'))
+
+    def test_resolve_name(self):
+        self.assertEqual(('10.0.0.5', 9559), broker._resolve_from_id([NAO], 'bobot'))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,84 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from fluentnao.nao import Nao
+from test_nao import FakeMotion
+
+BODY_JOINT_NAMES = ["HeadYaw", "HeadPitch",
+                    "LShoulderPitch", "LShoulderRoll", "LElbowYaw", "LElbowRoll", "LWristYaw", "LHand",
+                    "LHipYawPitch", "LHipRoll", "LHipPitch", "LKneePitch", "LAnklePitch", "LAnkleRoll",
+                    "RHipYawPitch", "RHipRoll", "RHipPitch", "RKneePitch", "RAnklePitch", "RAnkleRoll",
+                    "RShoulderPitch", "RShoulderRoll", "RElbowYaw", "RElbowRoll", "RWristYaw", "RHand"]
+
+class BalanceMotion(FakeMotion):
+    '''
+    Records whole body calls, the arms start relaxed and everything else stiff
+    '''
+    def __init__(self):
+        super(BalanceMotion, self).__init__()
+        self.wb_calls = []
+
+    def getJointNames(self, chain):
+        return BODY_JOINT_NAMES
+
+    def getStiffnesses(self, chain):
+        self.wb_calls.append(('getStiffnesses', chain))
+        return [0.0 if n[1:].startswith('Shoulder') or n[1:].startswith('Elbow') or n[1:] in ['WristYaw', 'Hand']
+                else 1.0 for n in BODY_JOINT_NAMES]
+
+    def stiffnessInterpolation(self, names, stiffnesses, times):
+        self.wb_calls.append(('stiffnessInterpolation', names))
+
+    def wbEnable(self, is_enabled):
+        self.wb_calls.append(('wbEnable', is_enabled))
+
+    def wbFootState(self, state, leg):
+        self.wb_calls.append(('wbFootState', state, leg))
+
+
+class FakeEnv(object):
+    def __init__(self):
+        self.motion = BalanceMotion()
+
+
+class TestBalanceSession(unittest.TestCase):
+    def test_single_move_sets_up_and_tears_down(self):
+        env = FakeEnv()
+        nao = Nao(env)
+        nao.legs.left_out(1.0)
+        self.assertEqual([('getStiffnesses', 'Body'),
+                          ('stiffnessInterpolation', ['LArm', 'RArm']),
+                          ('wbEnable', True),
+                          ('wbFootState', 'Fixed', 'RLeg'),
+                          ('wbFootState', 'Plane', 'LLeg'),
+                          ('wbFootState', 'Free', 'Legs'),
+                          ('wbEnable', False)], env.motion.wb_calls,
+                         "Only the chains which are not stiff should be stiffened")
+
+    def test_session_shared_by_leg_moves(self):
+        env = FakeEnv()
+        nao = Nao(env)
+        with nao.balance_session:
+            nao.legs.left_out(1.0)
+            nao.legs.left_forward(1.0)
+            self.assertEqual(5, len(env.motion.wb_calls), "Same foot states should not be set again")
+            nao.legs.right_out(1.0)
+        self.assertEqual(1, len([c for c in env.motion.wb_calls if c[0] == 'getStiffnesses']))
+        self.assertEqual([('wbEnable', True), ('wbEnable', False)], [c for c in env.motion.wb_calls if c[0] == 'wbEnable'])
+        self.assertEqual(('wbFootState', 'Plane', 'RLeg'), env.motion.wb_calls[5])
+        self.assertFalse(nao.balance_session.is_active())
+
+    def test_close_ends_nested_session(self):
+        env = FakeEnv()
+        nao = Nao(env)
+        nao.balance_on().balance_on()
+        nao.balance_session.close()
+        self.assertEqual(('wbEnable', False), env.motion.wb_calls[-1])
+        self.assertFalse(nao.balance_session.is_active())
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,76 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from recorder.capture import JointSampleBuffer, JointSampler
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now = self.now + 0.01
+        return self.now
+
+
+class TestJointSampleBuffer(unittest.TestCase):
+    def test_empty(self):
+        buf = JointSampleBuffer(3, 4)
+        (timestamps, angles) = buf.samples()
+        self.assertEqual(0, len(buf), "New buffer should be empty")
+        self.assertEqual(0, len(timestamps), "New buffer should have no timestamps")
+        self.assertEqual((0, 3), angles.shape, "New buffer should have no angles")
+        self.assertIsNone(buf.latest(), "New buffer should have no latest sample")
+
+    def test_samples_in_order(self):
+        buf = JointSampleBuffer(2, 4)
+        buf.append(1.0, [0.1, 0.2])
+        buf.append(2.0, [0.3, 0.4])
+        (timestamps, angles) = buf.samples()
+        self.assertEqual([1.0, 2.0], list(timestamps))
+        self.assertEqual([0.3, 0.4], list(angles[1]))
+        self.assertEqual(2.0, buf.latest()[0], "Latest sample should be the last appended")
+
+    def test_wraps_when_full(self):
+        buf = JointSampleBuffer(1, 3)
+        for i in range(5):
+            buf.append(float(i), [i * 10.0])
+        (timestamps, angles) = buf.samples()
+        self.assertTrue(buf.is_full(), "Buffer should be full")
+        self.assertEqual([2.0, 3.0, 4.0], list(timestamps),
+                         "Oldest samples should have been overwritten")
+        self.assertEqual([20.0, 30.0, 40.0], list(angles[:, 0]))
+
+    def test_samples_are_copies(self):
+        buf = JointSampleBuffer(1, 2)
+        buf.append(1.0, [1.0])
+        (_, angles) = buf.samples()
+        angles[0, 0] = 99.0
+        self.assertEqual(1.0, buf.samples()[1][0, 0], "Modifying samples must not change the buffer")
+
+    def test_clear(self):
+        buf = JointSampleBuffer(1, 2)
+        buf.append(1.0, [1.0])
+        buf.clear()
+        self.assertEqual(0, len(buf), "Cleared buffer should be empty")
+
+
+class TestJointSampler(unittest.TestCase):
+    def test_rate_out_of_range(self):
+        buf = JointSampleBuffer(1, 2)
+        self.assertRaises(ValueError, JointSampler, lambda: [0.0], buf, 5)
+        self.assertRaises(ValueError, JointSampler, lambda: [0.0], buf, 500)
+
+    def test_sample_uses_midpoint_timestamp(self):
+        buf = JointSampleBuffer(1, 2)
+        sampler = JointSampler(lambda: [0.5], buf, 50, clock=FakeClock())
+        sampler.sample()
+        (timestamp, angles) = buf.latest()
+        self.assertAlmostEqual(0.015, timestamp)
+        self.assertEqual(0.5, angles[0])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -4,11 +4,20 @@ Created on 15 Jul 2013
 @author: davesnowdon
 '''
 
+import json
+import math
 import random
 import unittest
 
-from recorder.core import joint_changes
-from testutil import POSITION_ZERO, make_random_joints, make_joint_dict
+import numpy as np
+
+from recorder.core import joint_changes, joints_to_degrees, Robot, JointVector, JOINT_NAMES
+from recorder.document import Keyframe
+from naoutil import avahi
+from fluentnao.dryrun import script_keyframes
+from naoutil.pool import Connection, ConnectionPool
+from test_nao import FakeMotion
+from testutil import POSITION_ZERO, POSITION_ARMS_UP, make_random_joints, make_joint_dict
 
 class TestJointChanges(unittest.TestCase):
 
@@ -69,6 +78,171 @@ class TestJointChanges(unittest.TestCase):
         self.assertEqual(len(changed_joints), 2,
                          "Only LShoulderPitch and RHipRoll should have changed")
 
+    def test_joint_vector_changes_match_dict(self):
+        j1 = make_random_joints()
+        j2 = dict(j1)
+        j2['HeadYaw'] = j2['HeadYaw'] + 0.5
+        j2['RHand'] = j2['RHand'] + 0.5
+        changed_joints = joint_changes(JointVector.from_dict(j1), JointVector.from_dict(j2))
+        self.assertEqual(joint_changes(j1, j2), changed_joints,
+                         "JointVector and dict should detect the same changes")
+        self.assertEqual(set(['HeadYaw', 'RHand']), changed_joints)
+
+    def test_joint_vector_no_old_angles(self):
+        changed_joints = joint_changes(None, JointVector(POSITION_ZERO))
+        self.assertEqual(set(JOINT_NAMES), changed_joints, "All joint angles should be marked changed")
+
+
+class TestJointVector(unittest.TestCase):
+    def test_wrong_length(self):
+        self.assertRaises(ValueError, JointVector, [0.0, 1.0])
+
+    def test_dict_interface(self):
+        joints = JointVector(POSITION_ZERO)
+        self.assertEqual(POSITION_ZERO[0], joints['HeadYaw'])
+        self.assertEqual(make_joint_dict(POSITION_ZERO), joints.to_dict())
+        self.assertEqual(JOINT_NAMES, joints.keys())
+        self.assertTrue('RHand' in joints)
+        self.assertFalse('Tail' in joints)
+
+    def test_copy_is_independent(self):
+        joints = JointVector(POSITION_ZERO)
+        copied = joints.copy()
+        copied['HeadYaw'] = 1.0
+        self.assertEqual(POSITION_ZERO[0], joints['HeadYaw'], "Modifying copy should not change original")
+
+    def test_degrees_match_dict(self):
+        joint_dict = make_random_joints()
+        for round_values in [True, False]:
+            self.assertEqual(joints_to_degrees(joint_dict, round_values),
+                             joints_to_degrees(JointVector.from_dict(joint_dict), round_values),
+                             "JointVector and dict should produce the same degrees")
+
+    def test_degrees_round_half_away_from_zero(self):
+        joints = JointVector()
+        joints['HeadYaw'] = math.radians(2.5)
+        joints['HeadPitch'] = math.radians(-2.5)
+        degrees = joints_to_degrees(joints)
+        self.assertEqual(round(math.degrees(math.radians(2.5))), degrees['HeadYaw'])
+        self.assertEqual(round(math.degrees(math.radians(-2.5))), degrees['HeadPitch'])
+
+
+class TestCapturedKeyframes(unittest.TestCase):
+    def make_samples(self):
+        # head turns left then back again over 2 seconds
+        timestamps = np.arange(101) * 0.02
+        angles = np.tile(np.array(POSITION_ZERO), (101, 1))
+        yaw = JOINT_NAMES.index('HeadYaw')
+        angles[:, yaw] = [math.radians(60) * (1.0 - abs(t - 1.0)) for t in timestamps]
+        return (timestamps, angles)
+
+    def test_no_samples(self):
+        self.assertEqual([], Robot().captured_keyframes(None))
+
+    def test_keyframes_use_elapsed_time(self):
+        robot = Robot()
+        robot.last_keyframe_joints = make_joint_dict(POSITION_ZERO)
+        commands = robot.captured_keyframes(self.make_samples())
+        self.assertEqual(2, len(commands), "Should generate keyframes for the turn and the return")
+        self.assertTrue("set_duration(1.0).head.left(" in commands[0],
+                        "First keyframe should last one second: {}".format(commands[0]))
+        self.assertTrue("set_duration(1.0).head.forward(" in commands[1],
+                        "Second keyframe should last one second: {}".format(commands[1]))
+
+
+class TestChangeTranslator(unittest.TestCase):
+    def make_keyframes(self):
+        enabled = frozenset(JOINT_NAMES)
+        return [Keyframe(JointVector(POSITION_ZERO), enabled, enabled, True, 1.0),
+                Keyframe(JointVector(POSITION_ARMS_UP), frozenset(['LShoulderPitch', 'RShoulderPitch']),
+                         enabled, True, 2.0)]
+
+    def test_from_keyframes(self):
+        robot = Robot()
+        robot.change_translator('FluentNAO', '')
+        keyframes = self.make_keyframes()
+        code = robot.change_translator('JSON', 'not parsed', keyframes)
+        data = json.loads(code)
+        self.assertEqual(2, len(data), "Should have one JSON object per keyframe")
+        self.assertEqual(2.0, data[1]['duration'])
+        self.assertEqual(set(['LShoulderPitch', 'RShoulderPitch']), set(data[1]['changes'].keys()))
+
+        code = robot.change_translator('FluentNAO', code, keyframes)
+        self.assertEqual(robot.translator.join(robot.render_keyframes(keyframes)), code,
+                         "Converting back should give the code generated for the keyframes")
+        self.assertTrue("nao.set_duration(2.0).arms.up(" in code, code)
+
+    def test_round_trip(self):
+        robot = Robot()
+        robot.change_translator('FluentNAO', '')
+        code = "nao.set_duration(1.0).arms.forward(0,0).go()\n" \
+               "nao.set_duration(2.0).arms.up(0,0).go()\n" \
+               "nao.set_duration(1.5).arms.forward(0,0).go()"
+        keyframes = script_keyframes(code)
+        converted = robot.change_translator('FluentNAO', robot.change_translator('JSON', code))
+        self.assertEqual(3, len(script_keyframes(converted)), converted)
+        for (expected, actual) in zip(keyframes, script_keyframes(converted)):
+            self.assertEqual(expected['duration'], actual['duration'])
+            self.assertEqual(set(expected['changes'].keys()), set(actual['changes'].keys()))
+            for (name, angle) in expected['changes'].iteritems():
+                self.assertAlmostEqual(angle, actual['changes'][name], delta=math.radians(1))
+
+    def test_invalid_code_not_converted(self):
+        for invalid in ["nao.arms.up(", "x = 1"]:
+            status = FakeStatusDisplay()
+            robot = Robot(status_display=status)
+            robot.change_translator('FluentNAO', '')
+            code = robot.change_translator('JSON', invalid)
+            self.assertEqual(invalid, code, "Code which can't be parsed should be left alone")
+            self.assertEqual('FluentNAO', robot.get_translator_name())
+            self.assertEqual(1, len(status.messages), "Error should be reported")
+
+
+class FakeALife(object):
+    def getState(self):
+        raise RuntimeError("no autonomous life")
+
+
+class FakeTTS(object):
+    def say(self, text):
+        pass
+
+
+class RobotEnv(object):
+    def __init__(self):
+        self.motion = FakeMotion()
+        self.alife = FakeALife()
+        self.tts = FakeTTS()
+
+    def joint_limits(self):
+        return {}
+
+
+class FakeStatusDisplay(object):
+    def __init__(self):
+        self.messages = []
+
+    def add_status(self, msg):
+        self.messages.append(msg)
+
+
+class TestRobotCommands(unittest.TestCase):
+    def test_creating_robot_does_not_browse(self):
+        avahi._discovery = None
+        Robot()
+        self.assertEqual(None, avahi._discovery, "Discovery should not be started by the constructor")
+
+    def test_hand_command_moves_hand(self):
+        env = RobotEnv()
+        robot = Robot(status_display=FakeStatusDisplay())
+        robot.connections = ConnectionPool(lambda host, port: Connection((host, port), object(), env, None))
+        robot.event_handlers = {}
+        robot.is_speech_recognition_enabled = False
+        self.assertTrue(robot.connect('nao.local', 9559))
+        robot._left_hand_open()
+        self.assertEqual(1, len(env.motion.calls), "Hand command should be sent to ALMotion")
+        self.assertEqual('LHand', env.motion.calls[0][0])
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,145 @@
+'''
+Created on 18 Oct 2026
+'''
+import threading
+import unittest
+
+from naoutil.dispatch import EventDispatcher, Coalescer
+from naoutil import memory
+
+class TestEventDispatcher(unittest.TestCase):
+    def test_order_kept_per_key(self):
+        dispatcher = EventDispatcher(workers=3)
+        seen = { 'a' : [], 'b' : [] }
+        for i in range(50):
+            for key in seen.keys():
+                dispatcher.dispatch(key, seen[key].append, i)
+        dispatcher.stop(5)
+        self.assertEqual(range(50), seen['a'])
+        self.assertEqual(range(50), seen['b'])
+        metrics = dispatcher.metrics()
+        self.assertEqual(100, metrics.dispatched)
+        self.assertEqual([0, 0, 0], metrics.depths)
+
+    def test_slow_key_does_not_block_others(self):
+        dispatcher = EventDispatcher(workers=2)
+        slow = 'slow'
+        fast = [k for k in ['a', 'b', 'c', 'd'] if dispatcher.worker_index(k) != dispatcher.worker_index(slow)][0]
+        release = threading.Event()
+        handled = threading.Event()
+        dispatcher.dispatch(slow, release.wait, 5)
+        dispatcher.dispatch(fast, handled.set)
+        self.assertTrue(handled.wait(5), "Event should be handled while another worker is busy")
+        release.set()
+        dispatcher.stop(5)
+
+    def test_full_queue_drops_events(self):
+        dispatcher = EventDispatcher(workers=1, queue_size=1, put_timeout=0.01)
+        release = threading.Event()
+        started = threading.Event()
+        def block():
+            started.set()
+            release.wait(5)
+        dispatcher.dispatch('k', block)
+        started.wait(5)
+        self.assertTrue(dispatcher.dispatch('k', lambda: None))
+        self.assertFalse(dispatcher.dispatch('k', lambda: None))
+        release.set()
+        dispatcher.stop(5)
+        metrics = dispatcher.metrics(reset=True)
+        self.assertEqual(1, metrics.dropped)
+        self.assertEqual(1, metrics.max_depth)
+        self.assertEqual(0, dispatcher.metrics().dropped)
+
+    def test_errors_counted(self):
+        dispatcher = EventDispatcher(workers=1)
+        def fail():
+            raise RuntimeError("broken handler")
+        dispatcher.dispatch('k', fail)
+        dispatcher.stop(5)
+        self.assertEqual(1, dispatcher.metrics().errors)
+
+
+class ManualTimer(object):
+    '''
+    Timer which only fires when the test calls fire()
+    '''
+    made = []
+
+    def __init__(self, interval, function, args):
+        self.interval = interval
+        self.function = function
+        self.args = args
+        self.is_cancelled = False
+        ManualTimer.made.append(self)
+
+    def start(self):
+        pass
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def fire(self):
+        if not self.is_cancelled:
+            self.function(*self.args)
+
+
+class TestCoalescer(unittest.TestCase):
+    def setUp(self):
+        ManualTimer.made = []
+        self.forwarded = []
+        self.coalescer = Coalescer(lambda *args: self.forwarded.append(args),
+                                   { 'bumper' : 0.1 }, ManualTimer)
+
+    def test_burst_forwards_first_and_latest(self):
+        for value in [1, 0, 1, 0]:
+            self.coalescer.offer('bumper', value, '')
+        self.assertEqual([('bumper', 1, '')], self.forwarded)
+        ManualTimer.made[0].fire()
+        self.assertEqual([('bumper', 1, ''), ('bumper', 0, '')], self.forwarded)
+        self.assertEqual({ 'bumper' : 3 }, self.coalescer.counts())
+
+        # the latest value starts another window
+        self.coalescer.offer('bumper', 1, '')
+        ManualTimer.made[1].fire()
+        self.assertEqual(3, len(self.forwarded))
+
+    def test_latest_same_as_first_not_forwarded(self):
+        for value in [1, 0, 1]:
+            self.coalescer.offer('bumper', value, '')
+        ManualTimer.made[0].fire()
+        self.assertEqual([('bumper', 1, '')], self.forwarded)
+        self.assertEqual(1, len(ManualTimer.made))
+
+    def test_keys_without_window_forwarded(self):
+        for value in [1, 0, 1]:
+            self.coalescer.offer('word', value, '')
+        self.assertEqual(3, len(self.forwarded))
+        self.assertEqual([], ManualTimer.made)
+
+    def test_cancel(self):
+        self.coalescer.offer('bumper', 1, '')
+        self.coalescer.offer('bumper', 0, '')
+        self.coalescer.cancel('bumper')
+        ManualTimer.made[0].fire()
+        self.assertEqual([('bumper', 1, '')], self.forwarded)
+        self.coalescer.offer('bumper', 0, '')
+        self.assertEqual([('bumper', 1, ''), ('bumper', 0, '')], self.forwarded)
+
+
+class TestSubscriberModule(unittest.TestCase):
+    def test_unsubscribed_while_queued(self):
+        module = memory._SubscriberModule()
+        seen = []
+        module.data_name_to_event_cb['gone'] = lambda *args: seen.append(args)
+        module.data_name_to_event_cb['kept'] = lambda *args: seen.append(args)
+        module.event_cb('kept', 1, '')
+        del module.data_name_to_event_cb['gone']
+        module.event_cb('gone', 2, '')
+        module.stop_dispatch()
+        self.assertEqual([('kept', 1, '')], seen)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,73 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from recorder.document import KeyframeDocument, Keyframe
+from translators.fluentnao.core import FluentNaoTranslator
+from translators.json.core import JsonTranslator
+from translators.naojure.core import NaojureTranslator
+
+COMMANDS = ['nao.arms.up()', '', 'nao.head.left(30)', 'nao.hands.open()']
+JSON_COMMANDS = ['{"changes": {"HeadYaw": 0.5}}', '{"changes": {"HeadPitch": 0.1}}', '']
+
+def append_each(translator, code, commands):
+    for c in commands:
+        code = translator.append(code, c)
+    return code
+
+class TestKeyframeDocument(unittest.TestCase):
+    def test_empty(self):
+        doc = KeyframeDocument(FluentNaoTranslator(), "nao.say('hi')")
+        self.assertEqual(0, len(doc))
+        self.assertEqual("nao.say('hi')", doc.text(), "Empty document should just be base code")
+
+    def test_empty_fragments_ignored(self):
+        doc = KeyframeDocument(FluentNaoTranslator())
+        doc.append('')
+        doc.append(None)
+        self.assertEqual(0, len(doc), "Empty fragments should not be added")
+
+    def test_same_as_append(self):
+        for (translator, base_code, commands) in [(FluentNaoTranslator(), '', COMMANDS),
+                                                  (FluentNaoTranslator(), "nao.say('hi')", COMMANDS),
+                                                  (NaojureTranslator(), '(say "hi")', COMMANDS),
+                                                  (JsonTranslator(), '', JSON_COMMANDS),
+                                                  (JsonTranslator(), '[\r\n{"changes": {}}\r\n]', JSON_COMMANDS)]:
+            doc = KeyframeDocument(translator, base_code)
+            for c in commands:
+                doc.append(c)
+                self.assertEqual(append_each(translator, base_code, commands[:commands.index(c) + 1]), doc.text(),
+                                 "{} document should match code built by append".format(translator.name))
+
+    def test_reset(self):
+        doc = KeyframeDocument(FluentNaoTranslator())
+        doc.append('nao.arms.up()')
+        doc.reset(JsonTranslator(), '')
+        self.assertEqual(0, len(doc), "Reset should discard fragments")
+        doc.append('{}')
+        self.assertEqual('[\r\n{}\r\n]', doc.text())
+
+    def test_keyframes(self):
+        keyframe = Keyframe(None, set(['HeadYaw']), set(['HeadYaw']), True, 1.0)
+        doc = KeyframeDocument(FluentNaoTranslator())
+        doc.append('nao.head.left(30)', keyframe)
+        doc.append('', keyframe)
+        self.assertTrue(doc.has_keyframes(), "Document made from keyframes should have keyframes")
+        self.assertEqual([keyframe, keyframe], doc.keyframes,
+                         "Keyframes which produced no code should be kept")
+        doc.append('nao.say("hi")')
+        self.assertFalse(doc.has_keyframes(), "Code not from a keyframe should discard keyframes")
+
+    def test_reset_keyframes(self):
+        doc = KeyframeDocument(FluentNaoTranslator(), "nao.say('hi')")
+        self.assertFalse(doc.has_keyframes(), "Unknown base code should not have keyframes")
+        doc.reset(JsonTranslator(), '  ')
+        self.assertTrue(doc.has_keyframes(), "Empty document should have keyframes")
+        doc.reset(JsonTranslator(), '[\r\n{}\r\n]', ['keyframe'])
+        self.assertEqual(['keyframe'], doc.keyframes)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
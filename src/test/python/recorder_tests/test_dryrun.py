@@ -0,0 +1,51 @@
+'''
+Created on 18 Oct 2026
+'''
+import math
+import unittest
+
+from fluentnao.core.naoscript import ScriptError
+from fluentnao.dryrun import dry_run, script_keyframes
+from translators.fluentnao.core import FluentNaoTranslator
+from testutil import make_joint_dict, POSITION_ARMS_UP
+
+class TestDryRun(unittest.TestCase):
+    def test_keyframe_per_go(self):
+        script = "nao.set_duration(2.0).head.left(0,0).go()\nnao.set_duration(1.0).head.right(0,0)\nnao.hands.open(0).go()"
+        keyframes = script_keyframes(script)
+        self.assertEqual(2, len(keyframes))
+        self.assertAlmostEqual(math.radians(90), keyframes[0]['changes']['HeadYaw'])
+        self.assertEqual(2.0, keyframes[0]['duration'])
+        self.assertEqual(set(['HeadYaw', 'LHand', 'RHand']), set(keyframes[1]['changes'].keys()))
+
+    def test_duration_and_other_calls(self):
+        env = dry_run("nao.say('hello')\nnao.set_duration(2.0).head.left(0,0).go()\nnao.set_duration(0.5).head.right(0,0).go()")
+        self.assertEqual(2.5, env.motion.duration())
+        self.assertTrue(('tts', 'say', ('hello',)) in env.calls)
+
+    def test_moves_to_current_angle_recorded(self):
+        keyframes = script_keyframes("nao.set_duration(1.0).arms.forward(0,0).go()")
+        self.assertEqual(1, len(keyframes), "Move to the starting angles should still be a keyframe")
+        self.assertEqual(set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll']),
+                         set(keyframes[0]['changes'].keys()))
+
+    def test_error_line(self):
+        with self.assertRaises(ScriptError) as cm:
+            dry_run("nao.head.left(0,0)\nnao.head.nod()")
+        self.assertEqual(2, cm.exception.line)
+
+    def test_parse_generated_code(self):
+        translator = FluentNaoTranslator()
+        joints = make_joint_dict(POSITION_ARMS_UP)
+        changed = set(['LShoulderPitch', 'LShoulderRoll', 'RShoulderPitch', 'RShoulderRoll'])
+        code = translator.generate(joints, changed, changed, is_blocking=True, fluentnao="nao.",
+                                   keyframe_duration=1.0, keyframe_comment='keyframe')
+        keyframes = translator.parse(code)
+        self.assertEqual(1, len(keyframes))
+        for name in ['LShoulderPitch', 'RShoulderPitch']:
+            self.assertAlmostEqual(joints[name], keyframes[0]['changes'][name], delta=math.radians(1))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -3,9 +3,14 @@ Created on 6 Jul 2013
 
 @author: dns
 '''
+import random
 import unittest
 
-from translators.fluentnao.core import FluentNaoTranslator
+import numpy as np
+
+from recorder.core import JOINT_NAMES
+from recorder.topology import joint_mask
+from translators.fluentnao.core import FluentNaoTranslator, CommandPlan, CommandSpec, Constraint, Transform, linear, in_range, COMMANDS, COMMAND_PLANS
 from testutil import make_joint_dict, POSITION_ZERO, POSITION_ARMS_UP, POSITION_ARMS_OUT, POSITION_ARMS_DOWN, POSITION_ARMS_BACK, POSITION_ARMS_RIGHT_UP_LEFT_OUT, POSITION_ARMS_LEFT_UP_RIGHT_OUT, POSITION_ARMS_LEFT_FORWARD_RIGHT_DOWN, POSITION_ARMS_RIGHT_FORWARD_LEFT_DOWN, POSITION_ARMS_RIGHT_DOWN_LEFT_BACK, POSITION_ARMS_LEFT_DOWN_RIGHT_BACK, POSITION_HANDS_CLOSE, POSITION_HANDS_OPEN, POSITION_HANDS_RIGHT_OPEN_LEFT_CLOSE, POSITION_HANDS_LEFT_OPEN_RIGHT_CLOSE, POSITION_ELBOWS_STRAIGHT_TURN_IN, POSITION_ELBOWS_BENT_TURN_UP, POSITION_ELBOWS_STRAIGHT_TURN_DOWN, POSITION_WRISTS_CENTER, POSITION_WRISTS_TURN_IN, POSITION_WRISTS_TURN_OUT, POSITION_WRISTS_RIGHT_CENTER_LEFT_TURN_OUT, POSITION_WRISTS_RIGHT_TURN_IN_LEFT_CENTER, POSITION_HEAD_DOWN_HEAD_FORWARD, POSITION_HEAD_UP_HEAD_RIGHT, POSITION_HEAD_CENTER_HEAD_LEFT, POSITION_FEET_POINT_TOES, POSITION_FEET_RAISE_TOES, POSITION_FEET_TURN_OUT, POSITION_FEET_TURN_IN, POSITION_FEET_CENTER, POSITION_LEGS_LEFT_FORWARD_RIGHT_IN, POSITION_LEGS_RIGHT_FORWARD_LEFT_IN, POSITION_LEGS_LEFT_OUT_RIGHT_IN, POSITION_LEGS_RIGHT_OUT_LEFT_IN, POSITION_LEGS_LEFT_BACK_RIGHT_IN,POSITION_LEGS_RIGHT_BACK_LEFT_IN
 
 def get_translator():
@@ -743,6 +748,87 @@ class TestDetectArms(unittest.TestCase):
             self.fail("expected legs.right_back().left_in() or legs.left_in().right_back(); instead got: {0}".format(result))
 
 
+class TestCommandPlan(unittest.TestCase):
+    def testEveryCommandHasPlan(self):
+        self.assertEqual([cs for cs in COMMANDS], [plan.spec for plan in COMMAND_PLANS],
+                         "There should be one plan per command in the same order")
+
+    def testUnknownNameRejected(self):
+        cs = CommandSpec('forward', 'head', set(['HeadYaw']),
+                         [Transform(linear, 'HeadYaw', 'headYaw', [1, 0])],
+                         [Constraint(in_range, [-45, 45, 'headPitch'])],
+                         ['headYaw'])
+        self.assertRaises(ValueError, CommandPlan, cs)
+
+    def testUnsupportedPredicateRejected(self):
+        cs = CommandSpec('forward', 'head', set(['HeadYaw']), [],
+                         [Constraint(lambda joints, params: True, [])], [])
+        self.assertRaises(ValueError, CommandPlan, cs)
+
+    def testEvaluate(self):
+        cs = CommandSpec('right', 'head', set(['HeadYaw']),
+                         [Transform(linear, 'HeadYaw', 'headYaw', [-1, -90])],
+                         [Constraint(in_range, [-90, -46, 'HeadYaw'])],
+                         ['headYaw'])
+        plan = CommandPlan(cs)
+        values = [0.0] * len(POSITION_ZERO) + [None]
+        values[0] = -60.0
+        self.assertTrue(plan.evaluate(values), "HeadYaw of -60 should be head.right")
+        self.assertEqual([-30.0], plan.parameter_values(values))
+        values[0] = 10.0
+        self.assertFalse(plan.evaluate(values), "HeadYaw of 10 should not be head.right")
+
+    def testMissingJointsSkipped(self):
+        translator = get_translator()
+        joints = { 'HeadPitch' : 0.0 }
+        self.assertEqual([], translator.detect_command(joints, ['HeadYaw'], JOINT_NAMES),
+                         "Commands which need the missing HeadYaw should not be produced")
+        frame = np.zeros(len(JOINT_NAMES))
+        frame[JOINT_NAMES.index('HeadYaw')] = np.nan
+        self.assertEqual([[]], translator.detect_command_many(np.array([frame]), joint_mask(['HeadYaw']),
+                                                              joint_mask(JOINT_NAMES)))
+
+
+class TestGenerateMany(unittest.TestCase):
+    def generate_args(self):
+        return { 'is_blocking' : True, 'fluentnao' : "nao.",
+                 'keyframe_duration' : 1.0, 'keyframe_comment' : "keyframe" }
+
+    def testSameAsGenerate(self):
+        random.seed(1)
+        frames = [POSITION_ZERO, POSITION_ARMS_UP, POSITION_HANDS_OPEN, POSITION_HEAD_UP_HEAD_RIGHT,
+                  POSITION_FEET_TURN_IN, POSITION_LEGS_RIGHT_OUT_LEFT_IN, POSITION_ELBOWS_BENT_TURN_UP]
+        changed = [set(JOINT_NAMES), SHOULDER_JOINTS, HAND_JOINTS, HEAD_JOINTS,
+                   FEET_JOINTS, LEG_JOINTS | KNEE_JOINTS, set(random.sample(JOINT_NAMES, 5))]
+        enabled = set(JOINT_NAMES) - set(['LHand'])
+        translator = get_translator()
+        expected = [translator.generate(make_joint_dict(f), c & enabled, enabled, **self.generate_args())
+                    for (f, c) in zip(frames, changed)]
+        result = translator.generate_many(np.array(frames),
+                                          [[n in c for n in JOINT_NAMES] for c in changed],
+                                          [n in enabled for n in JOINT_NAMES],
+                                          **self.generate_args())
+        self.assertEqual(expected, result, "Batch generation should match generating frames one at a time")
+
+    def testPerFrameDurations(self):
+        mask = [True] * len(JOINT_NAMES)
+        result = get_translator().generate_many(np.array([POSITION_ARMS_UP, POSITION_ARMS_DOWN]), [mask, mask], mask,
+                                                keyframe_durations=[0.5, 2.0], **self.generate_args())
+        self.assertTrue("nao.set_duration(0.5)." in result[0], result[0])
+        self.assertTrue("nao.set_duration(2.0)." in result[1], result[1])
+
+    def testJointMasks(self):
+        mask = [True] * len(JOINT_NAMES)
+        frames = np.array([POSITION_ARMS_UP, POSITION_ARMS_DOWN])
+        expected = get_translator().generate_many(frames, [mask, mask], mask, **self.generate_args())
+        self.assertEqual(expected, get_translator().generate_many(frames, [joint_mask(JOINT_NAMES)] * 2,
+                                                                  joint_mask(JOINT_NAMES), **self.generate_args()),
+                         "Joint masks should give the same result as boolean arrays")
+
+    def testNoFrames(self):
+        self.assertEqual([], get_translator().generate_many(np.zeros((0, len(JOINT_NAMES))), [], True,
+                                                            **self.generate_args()))
+
 
 if __name__ == "__main__":
     # import sys;sys.argv = ['', 'Test.testName']
@@ -0,0 +1,52 @@
+'''
+Created on 18 Oct 2026
+'''
+import json
+import unittest
+
+from recorder.core import JOINT_NAMES
+from translators.ir import KeyframeIR, render_all
+from translators.fluentnao.core import FluentNaoTranslator, FLUENTNAO_COMMANDS_KEY
+from translators.json.core import JsonTranslator
+from translators.naojure.core import NaojureTranslator
+from testutil import make_joint_dict, POSITION_ARMS_UP
+
+def make_ir():
+    return KeyframeIR(make_joint_dict(POSITION_ARMS_UP), set(['LShoulderPitch', 'RShoulderPitch']), set(JOINT_NAMES),
+                      is_blocking=True, keyframe_duration=1.5, fluentnao="nao.", keyframe_comment="keyframe")
+
+class TestKeyframeIR(unittest.TestCase):
+    def test_memo_computed_once(self):
+        ir = make_ir()
+        calls = []
+        factory = lambda: calls.append(1) or len(calls)
+        self.assertEqual(1, ir.memo('x', factory))
+        self.assertEqual(1, ir.memo('x', factory), "Memoised value should be reused")
+        self.assertEqual(1, len(calls))
+
+    def test_changes_and_state(self):
+        ir = make_ir()
+        self.assertEqual(set(['LShoulderPitch', 'RShoulderPitch']), set(ir.changes().keys()))
+        self.assertEqual(len(JOINT_NAMES), len(ir.state()))
+
+    def test_naojure_reuses_fluentnao_commands(self):
+        ir = make_ir()
+        ir.results[FLUENTNAO_COMMANDS_KEY] = [('head.left', [0, 30])]
+        self.assertTrue("30" in NaojureTranslator().render(ir),
+                        "Naojure should render the commands already detected for FluentNAO")
+
+    def test_render_all_same_as_generate(self):
+        translators = [FluentNaoTranslator(), NaojureTranslator(), JsonTranslator()]
+        ir = make_ir()
+        result = render_all(ir, translators)
+        for t in translators:
+            self.assertEqual(t.generate(ir.joints, ir.changed, ir.enabled, is_blocking=True,
+                                        keyframe_duration=1.5, fluentnao="nao.", keyframe_comment="keyframe"),
+                             result[t.name], "{} rendering should match generate".format(t.name))
+        self.assertEqual(1.5, json.loads(result['JSON'])['duration'])
+        self.assertTrue(FLUENTNAO_COMMANDS_KEY in ir.results, "FluentNAO commands should be memoised")
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,52 @@
+'''
+Created on 18 Oct 2026
+'''
+import math
+import unittest
+
+import numpy as np
+
+from recorder.keyframes import extract_keyframes
+
+def make_trajectory(num_samples, *joint_functions):
+    timestamps = np.arange(num_samples) * 0.02
+    angles = np.array([[f(t) for f in joint_functions] for t in timestamps])
+    return (timestamps, angles)
+
+class TestExtractKeyframes(unittest.TestCase):
+    def test_too_few_samples(self):
+        self.assertEqual([], list(extract_keyframes([], np.zeros((0, 2)))))
+        self.assertEqual([0, 1], list(extract_keyframes([0.0, 0.1], np.zeros((2, 2)))))
+
+    def test_linear_motion_needs_only_end_points(self):
+        (timestamps, angles) = make_trajectory(100, lambda t: t, lambda t: -0.5 * t)
+        self.assertEqual([0, 99], extract_keyframes(timestamps, angles),
+                         "Linear motion should be reproduced by first and last sample")
+
+    def test_corner_is_kept(self):
+        # one joint moves up then down again
+        (timestamps, angles) = make_trajectory(101, lambda t: 1.0 - abs(t - 1.0), lambda t: 0.0)
+        self.assertEqual([0, 50, 100], extract_keyframes(timestamps, angles),
+                         "Turning point should be a keyframe")
+
+    def test_result_within_tolerance(self):
+        tolerance = math.radians(2.0)
+        (timestamps, angles) = make_trajectory(500, math.sin, lambda t: math.cos(3 * t))
+        indices = extract_keyframes(timestamps, angles, tolerance)
+        self.assertTrue(len(indices) < 100, "Smooth motion should need few keyframes")
+        for j in range(angles.shape[1]):
+            reconstructed = np.interp(timestamps, timestamps[indices], angles[indices, j])
+            self.assertTrue(np.all(np.abs(reconstructed - angles[:, j]) <= tolerance),
+                            "Interpolated keyframes should be within tolerance of joint {}".format(j))
+
+    def test_per_joint_tolerance(self):
+        (timestamps, angles) = make_trajectory(101, lambda t: 0.0, lambda t: 0.1 - abs(t - 1.0) * 0.1)
+        self.assertEqual([0, 100], extract_keyframes(timestamps, angles, [0.01, 0.2]),
+                         "Deviation below the joint's tolerance should be ignored")
+        self.assertEqual([0, 50, 100], extract_keyframes(timestamps, angles, [0.2, 0.01]),
+                         "Deviation above the joint's tolerance should produce a keyframe")
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,53 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from naoutil.limits import JointLimits, read_joint_limits, clamp_angle, min_move_duration
+from recorder.core import Robot, JointVector, JOINT_BITS
+from testutil import POSITION_ZERO
+
+class FakeMotion(object):
+    def __init__(self):
+        self.calls = 0
+
+    def getJointNames(self, chain):
+        self.calls += 1
+        return ['HeadYaw', 'HeadPitch']
+
+    def getLimits(self, chain):
+        self.calls += 1
+        return [[-2.0, 2.0, 8.0, 1.5], [-0.6, 0.5, 7.0]]
+
+
+LIMITS = read_joint_limits(FakeMotion())
+
+class TestJointLimits(unittest.TestCase):
+    def test_read(self):
+        self.assertEqual(JointLimits(-2.0, 2.0, 8.0, 1.5), LIMITS['HeadYaw'])
+        self.assertIsNone(LIMITS['HeadPitch'].max_torque, "Missing torque should be None")
+
+    def test_clamp(self):
+        self.assertEqual(0.5, clamp_angle(LIMITS, 'HeadPitch', 1.0))
+        self.assertEqual(-0.6, clamp_angle(LIMITS, 'HeadPitch', -1.0))
+        self.assertEqual(0.1, clamp_angle(LIMITS, 'HeadPitch', 0.1))
+        self.assertEqual(5.0, clamp_angle(LIMITS, 'LHand', 5.0), "Unknown joints should not be clamped")
+
+    def test_min_move_duration(self):
+        self.assertEqual(0.5, min_move_duration(LIMITS, 'HeadYaw', -4.0))
+        self.assertEqual(0.0, min_move_duration(LIMITS, 'LHand', 1.0))
+
+    def test_keyframe_too_fast(self):
+        robot = Robot()
+        robot.joint_limits = LIMITS
+        old = JointVector(POSITION_ZERO)
+        new = old.copy()
+        new['HeadYaw'] = new['HeadYaw'] + 4.0
+        self.assertEqual((0.5, 'HeadYaw'), robot.min_keyframe_duration(old, new, JOINT_BITS['HeadYaw']))
+        self.assertFalse(robot.check_keyframe_speed(old, new, JOINT_BITS['HeadYaw'], 0.25))
+        self.assertTrue(robot.check_keyframe_speed(old, new, JOINT_BITS['HeadYaw'], 1.0))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,215 @@
+'''
+Created on 18 Oct 2026
+'''
+import math
+import time
+import unittest
+
+from fluentnao.nao import Nao
+from fluentnao.tasks import TaskTracker, TaskFuture
+
+class FakeMotion(object):
+    def __init__(self):
+        self.calls = []
+        self.post = self
+
+    def angleInterpolation(self, names, angles, times, is_absolute):
+        self.calls.append((names, angles, times))
+        return len(self.calls)
+
+    def getAngles(self, names, use_sensors):
+        return [0.0] * len(names)
+
+    def wait(self, task_id, timeout):
+        pass
+
+    def isRunning(self, task_id):
+        return False
+
+
+class FakeEnv(object):
+    def __init__(self):
+        self.motion = FakeMotion()
+
+
+class TestBufferedMoves(unittest.TestCase):
+    def test_unbuffered_moves_sent_per_joint(self):
+        env = FakeEnv()
+        nao = Nao(env)
+        nao.head.left(1.0)
+        nao.arms.up(1.0)
+        nao.go()
+        self.assertTrue(len(env.motion.calls) > 2, "Each joint should be moved separately")
+
+    def test_buffered_moves_sent_on_go(self):
+        env = FakeEnv()
+        nao = Nao(env, buffered=True)
+        nao.head.left(1.0)
+        nao.arms.up(2.0)
+        self.assertEqual([], env.motion.calls, "Buffered moves should wait for go()")
+        nao.go()
+        self.assertEqual(1, len(env.motion.calls), "All joints should be moved by one call")
+        (names, angles, times) = env.motion.calls[0]
+        self.assertEqual('HeadYaw', names[0])
+        self.assertAlmostEqual(math.radians(90), angles[0][0])
+        self.assertEqual([1.0], times[0])
+        self.assertEqual([[2.0]] * (len(names) - 1), times[1:])
+        self.assertEqual([], nao.jobs, "go() should wait for the move")
+
+    def test_last_move_of_joint_wins(self):
+        env = FakeEnv()
+        nao = Nao(env, buffered=True)
+        nao.head.left(1.0).right(2.0)
+        nao.go()
+        self.assertEqual([(['HeadYaw'], [[math.radians(-90)]], [[2.0]])], env.motion.calls)
+
+    def test_moves_to_current_angle_dropped(self):
+        env = FakeEnv()
+        nao = Nao(env, buffered=True)
+        nao.head.left(0.1).go()
+        nao.head.left(0.1).go()
+        self.assertEqual(1, len(env.motion.calls), "Joint already at the angle should not be moved again")
+        nao.head.left(0.1).right(0.1).left(0.1).go()
+        self.assertEqual(1, len(env.motion.calls), "Moves which end where they started should be dropped")
+        nao.forget_angles()
+        nao.head.left(0.1).go()
+        self.assertEqual(2, len(env.motion.calls), "Angles should not be trusted after forget_angles()")
+
+    def test_moves_to_current_angle_hold(self):
+        env = FakeEnv()
+        nao = Nao(env, buffered=True)
+        nao.head.left(0.1).go()
+        start = time.time()
+        nao.head.left(0.3).go()
+        self.assertEqual(1, len(env.motion.calls))
+        self.assertTrue(time.time() - start >= 0.3, "go() should wait as long as the dropped move")
+        start = time.time()
+        nao.head.left(0.3)
+        nao.arms.up(0.1)
+        nao.join(nao.chains.Head)
+        self.assertEqual(1, len(env.motion.calls), "Arms should not be sent by joining the head")
+        self.assertTrue(time.time() - start >= 0.3, "join() should wait for the held chain")
+
+    def test_unbuffer_sends_pending_moves(self):
+        env = FakeEnv()
+        nao = Nao(env, buffered=True)
+        nao.head.left(1.0)
+        nao.set_buffered(False)
+        self.assertEqual(1, len(env.motion.calls), "Turning off buffering should send pending moves")
+
+
+class RunningMotion(FakeMotion):
+    '''
+    Tasks run until they are waited for or have been polled a few times
+    '''
+    def __init__(self):
+        super(RunningMotion, self).__init__()
+        self.finished = set()
+        self.polls = {}
+
+    def wait(self, task_id, timeout):
+        self.finished.add(task_id)
+
+    def isRunning(self, task_id):
+        self.polls[task_id] = self.polls.get(task_id, 0) + 1
+        return task_id not in self.finished and self.polls[task_id] < 3
+
+
+class TestChainBarriers(unittest.TestCase):
+    def test_join_waits_for_chain_only(self):
+        env = FakeEnv()
+        env.motion = RunningMotion()
+        nao = Nao(env)
+        nao.arms.up(2.0)
+        nao.head.left(1.0).join()
+        self.assertEqual(set([len(env.motion.calls)]), env.motion.finished, "Only the head move should be waited for")
+        self.assertTrue(nao.jobs, "Arm moves should still be running")
+        nao.go()
+        self.assertEqual([], nao.jobs)
+
+    def test_buffered_join_sends_chain_only(self):
+        env = FakeEnv()
+        nao = Nao(env, buffered=True)
+        nao.arms.up(2.0)
+        nao.head.left(1.0).join()
+        self.assertEqual([(['HeadYaw'], [[math.radians(90)]], [[1.0]])], env.motion.calls)
+        nao.arms.join()
+        self.assertEqual(2, len(env.motion.calls), "Arm moves should be sent when the arms join")
+
+    def test_dependency_sends_chain_first(self):
+        env = FakeEnv()
+        env.motion = RunningMotion()
+        nao = Nao(env, buffered=True)
+        nao.depends('LArm', 'Head')
+        nao.arms.left_up(1.0)
+        nao.head.left(1.0)
+        nao.go()
+        self.assertEqual(2, len(env.motion.calls), "Head should be moved before the left arm")
+        self.assertEqual(['HeadYaw'], env.motion.calls[0][0])
+        self.assertTrue(1 in env.motion.finished, "Head should finish before the left arm starts")
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProxy(object):
+    '''
+    Tasks finish at the times given in end_times
+    '''
+    def __init__(self, clock, end_times):
+        self.clock = clock
+        self.end_times = end_times
+        self.waited = []
+
+    def isRunning(self, task_id):
+        self.clock.now += 0.1
+        return self.clock.now < self.end_times[task_id]
+
+    def wait(self, task_id, timeout):
+        self.waited.append(task_id)
+        self.clock.now = max(self.clock.now, self.end_times[task_id])
+
+
+class TestTaskTracker(unittest.TestCase):
+    def test_wait_all(self):
+        clock = FakeClock()
+        proxy = FakeProxy(clock, { 1 : 0.5, 2 : 3.0, 3 : 0.2 })
+        tracker = TaskTracker(proxy, clock=clock, poll_interval=0)
+        futures = [tracker.track(i) for i in [1, 2, 3]]
+        finished = []
+        futures[0].add_done_callback(finished.append)
+
+        done = tracker.wait_all()
+        self.assertEqual(futures, done, "All tasks should have finished")
+        self.assertEqual([futures[0]], finished, "Callback should have been called")
+        self.assertEqual([2], proxy.waited, "Only the longest task should be waited on")
+        self.assertTrue(futures[2].duration() < futures[0].duration() < futures[1].duration(),
+                        "Durations should reflect when each task finished")
+        self.assertEqual([], tracker.pending())
+
+    def test_timed_out_tasks_dropped(self):
+        clock = FakeClock()
+        proxy = FakeProxy(clock, { 1 : 0.5, 2 : 30.0, 3 : 20.0 })
+        proxy.wait = lambda task_id, timeout: None
+        tracker = TaskTracker(proxy, clock=clock, poll_interval=0)
+        futures = [tracker.track(i) for i in [1, 2, 3]]
+        self.assertEqual([futures[0]], tracker.wait_all(1000))
+        self.assertEqual([], tracker.pending(), "Tasks which timed out should no longer be tracked")
+
+    def test_callback_after_done(self):
+        future = TaskFuture(1)
+        future.set_done()
+        finished = []
+        future.add_done_callback(finished.append)
+        self.assertEqual([future], finished, "Callback on finished task should be called immediately")
+        self.assertTrue(future.wait(0))
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,43 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from naoutil.naoenv import NaoEnvironment, DEFAULT_PREWARM_PROXIES
+
+class RecordingEnvironment(NaoEnvironment):
+    '''
+    Records the proxies created, ALTextToSpeech can't be created
+    '''
+    def __init__(self):
+        super(RecordingEnvironment, self).__init__(None)
+        self.created = []
+
+    def create_proxy(self, longName):
+        self.created.append(longName)
+        if longName == 'ALTextToSpeech':
+            raise RuntimeError("no tts")
+        return longName
+
+
+class TestPrewarm(unittest.TestCase):
+    def test_prewarm_reports_each_proxy(self):
+        env = RecordingEnvironment()
+        report = env.prewarm()
+        self.assertEqual(len(DEFAULT_PREWARM_PROXIES), len(report))
+        self.assertEqual('no tts', str(report['ALTextToSpeech'].error))
+        self.assertEqual(None, report['ALMotion'].error)
+        self.assertTrue(report['ALMotion'].seconds >= 0)
+        self.assertEqual('ALMotion', env.motion)
+        self.assertEqual(report, env.prewarm_report)
+
+    def test_existing_proxies_not_created_again(self):
+        env = RecordingEnvironment()
+        env.prewarm(['motion'])
+        self.assertEqual({}, env.prewarm(['motion', 'ALMotion']))
+        self.assertEqual(['ALMotion'], env.created)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
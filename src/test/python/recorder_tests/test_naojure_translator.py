@@ -0,0 +1,52 @@
+'''
+Created on 18 Oct 2026
+'''
+import random
+import unittest
+
+import numpy as np
+
+from recorder.core import JOINT_NAMES
+from translators.naojure.core import NaojureTranslator
+from testutil import make_joint_dict, POSITION_ZERO, POSITION_ARMS_UP, POSITION_HANDS_OPEN, POSITION_HEAD_UP_HEAD_RIGHT, POSITION_FEET_TURN_IN, POSITION_ELBOWS_BENT_TURN_UP
+from test_fluentnao_translator import SHOULDER_JOINTS, HAND_JOINTS, HEAD_JOINTS, FEET_JOINTS, LEG_JOINTS, KNEE_JOINTS
+
+class TestGenerateMany(unittest.TestCase):
+    def generate_args(self):
+        return { 'is_blocking' : True, 'fluentnao' : "nao.",
+                 'keyframe_duration' : 1.0, 'keyframe_comment' : "keyframe" }
+
+    def testSameAsGenerate(self):
+        random.seed(1)
+        frames = [POSITION_ZERO, POSITION_ARMS_UP, POSITION_HANDS_OPEN, POSITION_HEAD_UP_HEAD_RIGHT,
+                  POSITION_FEET_TURN_IN, POSITION_ELBOWS_BENT_TURN_UP]
+        changed = [set(JOINT_NAMES), SHOULDER_JOINTS, HAND_JOINTS, HEAD_JOINTS,
+                   FEET_JOINTS, set(random.sample(JOINT_NAMES, 5))]
+        # Naojure has no keywords for the leg and knee commands
+        enabled = set(JOINT_NAMES) - set(['LHand']) - LEG_JOINTS - KNEE_JOINTS
+        translator = NaojureTranslator()
+        expected = [translator.generate(make_joint_dict(f), c & enabled, enabled, **self.generate_args())
+                    for (f, c) in zip(frames, changed)]
+        result = translator.generate_many(np.array(frames),
+                                          [[n in c for n in JOINT_NAMES] for c in changed],
+                                          [n in enabled for n in JOINT_NAMES],
+                                          **self.generate_args())
+        self.assertEqual(expected, result, "Batch generation should match generating frames one at a time")
+        self.assertTrue(any(result), "Some frames should produce code")
+
+    def testPerFrameDurations(self):
+        mask = [n in SHOULDER_JOINTS for n in JOINT_NAMES]
+        translator = NaojureTranslator()
+        frames = [POSITION_ARMS_UP, POSITION_ZERO]
+        result = translator.generate_many(np.array(frames), [mask, mask], mask,
+                                          keyframe_durations=[0.5, 2.0], **self.generate_args())
+        expected = [translator.generate(make_joint_dict(f), SHOULDER_JOINTS, SHOULDER_JOINTS,
+                                        keyframe_duration=d, is_blocking=True)
+                    for (f, d) in zip(frames, [0.5, 2.0])]
+        self.assertEqual(expected, result)
+        self.assertNotEqual(result[0], result[1])
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
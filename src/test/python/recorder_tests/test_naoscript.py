@@ -0,0 +1,122 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from fluentnao.core.naoscript import NaoScript, ScriptError, compile_script, parse_script, run_steps, \
+    STEP_ATTRIBUTE, STEP_CALL, STEP_COPY_CALL, STEP_ERROR
+
+class FakePart(object):
+    def __init__(self, calls, name):
+        self.calls = calls
+        self.name = name
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        def call(*args, **kwargs):
+            self.calls.append((self.name + "." + method, args, kwargs))
+            return self
+        return call
+
+
+class FakeBalanceSession(object):
+    def close(self):
+        pass
+
+
+class FakeNao(object):
+    def __init__(self):
+        self.calls = []
+        self.arms = FakePart(self.calls, 'arms')
+        self.head = FakePart(self.calls, 'head')
+        self.balance_session = FakeBalanceSession()
+
+    def log(self, msg):
+        pass
+
+    def set_duration(self, duration):
+        self.calls.append(('set_duration', (duration,), {}))
+        return self
+
+    def say(self, text):
+        self.calls.append(('say', (text,), {}))
+
+    def go(self):
+        self.calls.append(('go', (), {}))
+        return self
+
+    def flush(self):
+        pass
+
+
+class TestParseScript(unittest.TestCase):
+    def test_chain(self):
+        plan = parse_script("nao.arms.up(0,-1.5).go()", "\n")
+        self.assertEqual([(1, [(STEP_ATTRIBUTE, 'arms'), (STEP_ATTRIBUTE, 'up'), (STEP_CALL, [0, -1.5], {}),
+                               (STEP_ATTRIBUTE, 'go'), (STEP_CALL, [], {})])], plan)
+
+    def test_comments_and_blank_lines(self):
+        plan = parse_script("# keyframe\r\nnao.head.left(0, 30)\r\n\r\narms.up(offset=False);", "\n")
+        self.assertEqual([2, 4], [line for (line, steps) in plan])
+        self.assertEqual((STEP_CALL, [], {'offset' : False}), plan[1][1][-1],
+                         "Leading nao. should be optional and keyword arguments allowed")
+
+    def test_errors_have_line_numbers(self):
+        for (script, line) in [("nao.arms.up()\nnao.arms.up(", 2),
+                               ("nao.arms.up()\n\nimport os", 3),
+                               ("nao.say(open('x'))", 1),
+                               ("nao.__class__", 1),
+                               ("x = 1", 1)]:
+            plan = parse_script(script, "\n")
+            (error_line, steps) = plan[-1]
+            self.assertEqual(line, error_line, "Wrong line for {}".format(script))
+            self.assertEqual(STEP_ERROR, steps[0][0], "Script should not compile: {}".format(script))
+            self.assertEqual(line, steps[0][1].line)
+
+    def test_only_commands_allowed(self):
+        for script in ["nao.env.motion.setStiffnesses('Body', 0.0)",
+                       "nao.naoscript.get(1)",
+                       "nao.arms.nao.go()",
+                       "nao.joints"]:
+            (line, steps) = parse_script(script, "\n")[0]
+            self.assertEqual(STEP_ERROR, steps[0][0], "Script should not compile: {}".format(script))
+        (line, steps) = parse_script("nao.arms.elbows.up().go()\nnao.leds.fade('FaceLeds', 0xff0000, 1.0)", "\n")[1]
+        self.assertEqual(STEP_CALL, steps[-1][0])
+
+    def test_mutable_arguments_copied(self):
+        (line, steps) = parse_script("nao.say(['hello'])", "\n")[0]
+        self.assertEqual(STEP_COPY_CALL, steps[-1][0])
+        nao = FakeNao()
+        run_steps(nao, steps)
+        nao.calls[0][1][0].append('again')
+        self.assertEqual(['hello'], steps[-1][1][0], "Cached arguments should not be changed by a run")
+
+    def test_cached(self):
+        script = "nao.arms.up()\nnao.go()"
+        self.assertTrue(compile_script(script, "\n") is compile_script(script, "\n"),
+                        "Same script should not be parsed again")
+        self.assertFalse(compile_script(script, "\n") is compile_script(script + " ", "\n"))
+
+
+class TestRunScript(unittest.TestCase):
+    def test_run(self):
+        nao = FakeNao()
+        NaoScript(nao).run_script("# keyframe\nnao.set_duration(1.0).head.left(0,30)\nnao.arms.up().go()", "\n")
+        self.assertEqual([('set_duration', (1.0,), {}), ('head.left', (0, 30), {}), ('arms.up', (), {}),
+                          ('arms.go', (), {})], nao.calls)
+
+    def test_error_reported(self):
+        nao = FakeNao()
+        NaoScript(nao).run_script("nao.arms.up()\nnao.arms.up(", "\n")
+        self.assertEqual([('arms.up', (), {}), ('say', ("you have an error in your code on line 2",), {})],
+                         nao.calls, "Lines before the error should run")
+
+    def test_run_steps(self):
+        nao = FakeNao()
+        self.assertTrue(run_steps(nao, [(STEP_ATTRIBUTE, 'go'), (STEP_CALL, [], {})]) is nao)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,88 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+from naoutil.pool import Connection, ConnectionPool
+from naoutil import memory
+
+class FakeMemory(object):
+    def __init__(self):
+        self.is_alive = True
+
+    def ping(self):
+        if not self.is_alive:
+            raise RuntimeError("robot has gone")
+        return True
+
+
+class FakeEnv(object):
+    def __init__(self):
+        self.memory = FakeMemory()
+
+
+class FakeBroker(object):
+    def __init__(self):
+        self.is_shutdown = False
+
+    def shutdown(self):
+        self.is_shutdown = True
+
+
+class FakeSubscriber(object):
+    def __init__(self):
+        self.is_stopped = False
+
+    def stop_dispatch(self):
+        self.is_stopped = True
+
+
+class ConnectionFactory(object):
+    def __init__(self):
+        self.made = []
+
+    def __call__(self, host, port):
+        connection = Connection((host, port), FakeBroker(), FakeEnv(), FakeSubscriber())
+        self.made.append(connection)
+        return connection
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_reuse_healthy_connection(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory)
+        c1 = pool.acquire('nao.local', 9559)
+        pool.release(c1)
+        c2 = pool.acquire('nao.local', 9559)
+        self.assertTrue(c1 is c2, "Released connection should be reused")
+        self.assertTrue(memory.subscriber_module() is c1.subscriber,
+                        "Reused connection's subscriber module should be used")
+        self.assertEqual(1, len(factory.made))
+        memory.forget_subscriber_module()
+
+    def test_unhealthy_connection_replaced(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory)
+        c1 = pool.acquire('nao.local', 9559)
+        pool.release(c1)
+        c1.env.memory.is_alive = False
+        c2 = pool.acquire('nao.local', 9559)
+        self.assertFalse(c1 is c2)
+        self.assertTrue(c1.broker.is_shutdown, "Broken connection should be closed")
+        self.assertTrue(c1.subscriber.is_stopped)
+
+    def test_other_robots_closed(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory)
+        c1 = pool.acquire('nao.local', 9559)
+        pool.release(c1)
+        c2 = pool.acquire('10.0.0.5', 9559)
+        self.assertTrue(c1.broker.is_shutdown, "Connection to another robot should be closed")
+        pool.release(c2)
+        pool.close_all()
+        self.assertTrue(c2.broker.is_shutdown)
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,182 @@
+'''
+Created on 18 Oct 2026
+'''
+import math
+import unittest
+
+from fluentnao.nao import Nao
+from fluentnao.timeline import Timeline, timeline_from_data, timeline_from_script
+from fluentnao.dryrun import DryRunEnvironment
+from fluentnao.tasks import DEFAULT_TIMEOUT_MS
+from test_nao import FakeEnv, RunningMotion
+
+class FakeLeds(object):
+    def __init__(self):
+        self.calls = []
+        self.post = self
+
+    def __getattr__(self, method):
+        if method.startswith('_'):
+            raise AttributeError(method)
+        def call(*args):
+            self.calls.append((method,) + args)
+            if method == 'listGroup':
+                return [args[0] + "1", args[0] + "2"]
+            return len(self.calls)
+        return call
+
+
+class LedEnv(FakeEnv):
+    def __init__(self):
+        super(LedEnv, self).__init__()
+        self.leds = FakeLeds()
+
+
+class TestLeds(unittest.TestCase):
+    def test_head_group_created_once(self):
+        env = LedEnv()
+        nao = Nao(env)
+        nao.leds.head(0xFF0000).head(0x0000FF)
+        self.assertEqual(['listGroup', 'listGroup', 'listGroup', 'createGroup', 'fadeRGB', 'fadeRGB'],
+                         [c[0] for c in env.leds.calls])
+        self.assertEqual(('fadeRGB', 'FluentNaoHead', 0x0000FF, 0), env.leds.calls[-1])
+
+    def test_posted_fades_tracked(self):
+        env = LedEnv()
+        nao = Nao(env)
+        nao.leds.post.eyes(0xFF0000, 1.0).chest(0x00FF00, 1.0)
+        self.assertEqual([1, 2], nao.leds.tasks)
+        nao.leds.wait()
+        self.assertEqual([], nao.leds.tasks)
+        self.assertEqual(('wait', 2, 0), env.leds.calls[-1])
+
+
+class TestTimeline(unittest.TestCase):
+    def test_segments_follow_each_other(self):
+        timeline = Timeline()
+        timeline.add_move('HeadYaw', [0.5], [1.0])
+        timeline.add_move('HeadPitch', [0.1], [2.0])
+        timeline.end_segment()
+        timeline.add_move('HeadYaw', [-0.5], [0.5])
+        (names, angles, times) = timeline.to_lists()
+        self.assertEqual(['HeadYaw', 'HeadPitch'], names)
+        self.assertEqual([[0.5, 0.5, -0.5], [0.1]], angles)
+        self.assertEqual([[1.0, 2.0, 2.5], [2.0]], times,
+                         "Second segment should start when the longest move of the first has finished")
+        self.assertEqual(2.5, timeline.duration())
+
+    def test_from_data(self):
+        data = [{ 'changes' : { 'HeadYaw' : 0.5 }, 'duration' : 2.0, 'is_blocking' : True },
+                { 'changes' : { 'HeadYaw' : 0.0, 'LHand' : 1.0 }, 'is_blocking' : True }]
+        (names, angles, times) = timeline_from_data(data).to_lists()
+        self.assertEqual([[2.0, 3.0]], [times[names.index('HeadYaw')]],
+                         "Keyframe without duration should use the default")
+        self.assertEqual([3.0], times[names.index('LHand')])
+
+    def test_joint_holds_while_still(self):
+        shoulder = { 'changes' : { 'LShoulderPitch' : 0.5 }, 'duration' : 1.0 }
+        head = { 'changes' : { 'HeadYaw' : 0.5 }, 'duration' : 1.0 }
+        back = { 'changes' : { 'LShoulderPitch' : 0.0 }, 'duration' : 1.0 }
+        timeline = timeline_from_data([shoulder, head, back])
+        (names, angles, times) = timeline.to_lists({ 'HeadYaw' : 0.2 })
+        self.assertEqual([0.2, 0.5], angles[names.index('HeadYaw')])
+        self.assertEqual([1.0, 2.0], times[names.index('HeadYaw')],
+                         "Head should stay still until its keyframe starts")
+        self.assertEqual([0.5, 0.5, 0.0], angles[names.index('LShoulderPitch')])
+        self.assertEqual([1.0, 2.0, 3.0], times[names.index('LShoulderPitch')],
+                         "Shoulder should hold its angle while the head moves")
+
+        env = FakeEnv()
+        Nao(env).play(timeline)
+        (names, angles, times) = env.motion.calls[0]
+        self.assertEqual([0.0, 0.5], angles[names.index('HeadYaw')],
+                         "Playing should hold the head at its current angle")
+
+    def test_identical_keyframe_holds(self):
+        data = [{ 'changes' : { 'HeadYaw' : 0.5, 'LHand' : 1.0 }, 'duration' : 1.0 },
+                { 'changes' : { 'HeadYaw' : 0.5, 'LHand' : 1.0 }, 'duration' : 2.0 },
+                { 'changes' : { 'HeadYaw' : 0.0, 'LHand' : 1.0 }, 'duration' : 1.0 }]
+        timeline = timeline_from_data(data)
+        (names, angles, times) = timeline.to_lists()
+        self.assertEqual([[0.5, 0.5, 0.0], [1.0]], angles)
+        self.assertEqual([[1.0, 3.0, 4.0], [1.0]], times,
+                         "Keyframe which doesn't move should still take its time")
+        self.assertEqual(4.0, timeline.duration())
+
+    def test_hold_only_segment(self):
+        timeline = Timeline()
+        timeline.add_move('HeadYaw', [0.5], [1.0])
+        timeline.end_segment()
+        timeline.add_move('HeadYaw', [0.5], [2.0])
+        timeline.end_segment()
+        self.assertEqual(3.0, timeline.duration())
+
+    def test_leds_scheduled_with_moves(self):
+        env = LedEnv()
+        nao = Nao(env)
+        script = "nao.set_duration(1.0).head.left(0,0)\nnao.leds.post.eyes(0xFF0000, 0.5)\nnao.go()\n" \
+                 "nao.set_duration(2.0).head.right(0,0)\nnao.leds.eyes(0x00FF00, 1.0).go()"
+        timeline = timeline_from_script(nao, script)
+        self.assertEqual([], env.leds.calls, "Recording a timeline should not change the LEDs")
+        self.assertEqual([('FaceLeds', [0xFF0000, 0xFF0000, 0x00FF00], [0.5, 1.0, 2.0])], timeline.led_lists(),
+                         "Eyes should stay red until the second keyframe starts")
+        nao.play(timeline).go()
+        self.assertEqual([('fadeListRGB', 'FaceLeds', [0xFF0000, 0xFF0000, 0x00FF00], [0.5, 1.0, 2.0])],
+                         env.leds.calls)
+        self.assertEqual(1, len(env.motion.calls))
+
+    def test_later_led_fades_start_with_their_segment(self):
+        timeline = Timeline()
+        timeline.add_move('HeadYaw', [0.5], [1.0])
+        timeline.end_segment()
+        timeline.add_led('ChestLeds', 0x00FF00, 0.5)
+        self.assertEqual([('ChestLeds', [0x00FF00], [1.5])], timeline.led_lists())
+        self.assertEqual({ 'ChestLeds' : 1.0 }, timeline.led_start_times)
+
+    def test_from_script_plays_once(self):
+        env = FakeEnv()
+        nao = Nao(env)
+        script = "# keyframe\nnao.set_duration(1.0).head.left(0,0)\nnao.go()\nnao.set_duration(2.0).head.right(0,0).go()"
+        timeline = timeline_from_script(nao, script)
+        self.assertEqual([], env.motion.calls, "Recording a timeline should not move the robot")
+        self.assertEqual(3.0, timeline.duration())
+        nao.play(timeline).go()
+        self.assertEqual([(['HeadYaw'], [[math.radians(90), math.radians(-90)]], [[1.0, 3.0]])], env.motion.calls,
+                         "Whole timeline should be sent in one call")
+
+    def test_long_timeline_waited_for(self):
+        class WaitingMotion(RunningMotion):
+            def wait(self, task_id, timeout):
+                self.timeout = timeout
+                super(WaitingMotion, self).wait(task_id, timeout)
+        env = FakeEnv()
+        env.motion = WaitingMotion()
+        data = [{ 'changes' : { 'HeadYaw' : i % 2 }, 'duration' : 2.0 } for i in range(10)]
+        nao = Nao(env)
+        nao.play(timeline_from_data(data)).go()
+        self.assertTrue(env.motion.timeout > 20000, "go() should wait for the whole 20s timeline")
+        self.assertTrue(env.motion.timeout <= DEFAULT_TIMEOUT_MS + 20000)
+        self.assertEqual({}, nao.job_seconds)
+
+    def test_script_with_other_commands_not_recorded(self):
+        env = LedEnv()
+        nao = Nao(env)
+        script = "nao.set_duration(1.0).head.left(0,0)\nnao.go()\nnao.say('hello')\nnao.head.right(0,0).go()"
+        self.assertEqual(None, timeline_from_script(nao, script), "Speech can't be put on a timeline")
+        self.assertEqual([], env.motion.calls)
+        self.assertTrue(nao.env is env)
+        self.assertTrue(nao.timeline is None)
+
+    def test_balance_not_recorded(self):
+        env = DryRunEnvironment()
+        nao = Nao(env)
+        script = "nao.balance_on()\nnao.legs.left_out(0,0,False).go()\nnao.balance_off()"
+        self.assertEqual(None, timeline_from_script(nao, script))
+        self.assertEqual([], env.calls,
+                         "Balance should not be turned on while recording")
+        self.assertFalse(nao.balance_session.is_active())
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()
@@ -0,0 +1,46 @@
+'''
+Created on 18 Oct 2026
+'''
+import unittest
+
+import numpy as np
+
+from recorder.topology import JOINT_NAMES, JOINT_BITS, JOINT_CHAIN_HEAD, CHAIN_MASKS, ALL_JOINTS_MASK, \
+    joint_mask, joint_names, joint_count, mask_union, mask_intersection, is_subset, mask_from_bools, masks_to_bools
+
+class TestJointMask(unittest.TestCase):
+    def test_round_trip(self):
+        names = ['RHand', 'HeadYaw', 'LKneePitch']
+        mask = joint_mask(names)
+        self.assertEqual(3, joint_count(mask))
+        self.assertEqual(['HeadYaw', 'LKneePitch', 'RHand'], joint_names(mask),
+                         "Names should be returned in JOINT_NAMES order")
+        self.assertEqual(mask, joint_mask(mask), "A mask should be returned unchanged")
+
+    def test_all_joints(self):
+        self.assertEqual(ALL_JOINTS_MASK, joint_mask(JOINT_NAMES))
+        self.assertEqual(ALL_JOINTS_MASK, CHAIN_MASKS['Body'])
+        self.assertTrue(ALL_JOINTS_MASK < 2 ** 32, "All joints should fit in 32 bits")
+
+    def test_set_operations(self):
+        head = joint_mask(JOINT_CHAIN_HEAD)
+        yaw = JOINT_BITS['HeadYaw']
+        self.assertTrue(is_subset(yaw, head))
+        self.assertFalse(is_subset(head, yaw))
+        self.assertEqual(head, mask_union(yaw, JOINT_BITS['HeadPitch']))
+        self.assertEqual(yaw, mask_intersection(head, yaw | JOINT_BITS['RHand']))
+        self.assertEqual(0, mask_intersection(head, CHAIN_MASKS['LeftArm']))
+
+    def test_bools(self):
+        flags = np.zeros(len(JOINT_NAMES), dtype=bool)
+        flags[[1, 25]] = True
+        mask = mask_from_bools(flags)
+        self.assertEqual(['HeadPitch', 'RHand'], joint_names(mask))
+        self.assertEqual(flags.tolist(), masks_to_bools(mask).tolist())
+        self.assertEqual((2, len(JOINT_NAMES)), masks_to_bools([mask, 0]).shape)
+        self.assertEqual(flags.tolist(), masks_to_bools(flags).tolist(), "Booleans should be unchanged")
+
+
+if __name__ == "__main__":
+    # import sys;sys.argv = ['', 'Test.testName']
+    unittest.main()